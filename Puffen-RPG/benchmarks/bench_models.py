@@ -0,0 +1,61 @@
+# ============================================
+# FILE: benchmarks/bench_models.py
+# ============================================
+"""Laddning av en stor guild: rå dicts mot modeller.
+
+Kör från Puffen-RPG-mappen:  python benchmarks/bench_models.py [antal karaktärer]
+"""
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import ITEMS  # noqa: E402
+from models import Character, Inventory, Item  # noqa: E402
+
+
+def make_records(count: int) -> dict:
+    rng = random.Random(8)
+    item_ids = sorted(ITEMS)
+    records = {}
+    for i in range(count):
+        inventory = Inventory()
+        for item_id in rng.sample(item_ids, 10):
+            inventory.add(Item.from_catalog(item_id), rng.randint(1, 3))
+        character = Character(
+            name=f"Hjälte {i}", char_class=rng.choice(["Fighter", "Wizard", "Rogue"]),
+            stats={"strength": 5, "speed": 5, "charisma": 5, "intelligence": 5, "health": 5},
+            hp=25, max_hp=25, ac=12, gold=rng.randint(0, 500), inventory=inventory,
+            spells=[] if i % 3 else None
+        )
+        records[str(i)] = character.to_dict()
+    return records
+
+
+def measure(label: str, fn):
+    # Tid och minne mäts i separata körningar, tracemalloc gör allt långsammare
+    elapsed = min(timeit.repeat(fn, number=1, repeat=3))
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {elapsed * 1000:8.0f} ms {size / 1e6:8.1f} MB")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    text = json.dumps(make_records(count))
+    print(f"{count} karaktärer, {len(text) / count:.0f} B per post på disk")
+
+    records = measure("json.loads", lambda: json.loads(text))
+    models = measure("from_dict", lambda: {key: Character.from_dict(r) for key, r in records.items()})
+    measure("to_dict", lambda: {key: c.to_dict() for key, c in models.items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# ============================================
+# FILE: benchmarks/bench_storage.py
+# ============================================
+"""Skrivning av enstaka poster: JSON-journal, SQLite och en hel omskrivning.
+
+Kör från Puffen-RPG-mappen:  python benchmarks/bench_storage.py [antal karaktärer] [antal ändringar]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import JsonBackend, SqliteBackend, encode  # noqa: E402
+from shared.atomic import write_text_atomic  # noqa: E402
+
+GUILD = "1"
+
+
+def character(i: int, gold: int = 0) -> dict:
+    return {
+        "name": f"Hjälte {i}", "class": "Fighter", "hp": 25, "max_hp": 25, "gold": gold,
+        "stats": {"strength": 5, "speed": 5, "charisma": 5, "intelligence": 5, "health": 5},
+        "inventory": [{"id": "longsword"}, {"id": "healing_potion", "quantity": 3}],
+    }
+
+
+def bench_backend(label: str, backend, count: int, updates: int):
+    backend.load_guild(GUILD)
+    backend.write({(GUILD, "characters", str(i)): encode(character(i)) for i in range(count)})
+    times = []
+    for n in range(updates):
+        started = time.perf_counter()
+        backend.write({(GUILD, "characters", str(n % count)): encode(character(n, gold=n))})
+        times.append(time.perf_counter() - started)
+    backend.close()
+    report(label, times)
+
+
+def bench_rewrite(path: str, count: int, updates: int):
+    # Så som den gamla dnd_data.json skrevs: hela filen vid varje ändring
+    data = {"characters": {f"{GUILD}_{i}": character(i) for i in range(count)}}
+    times = []
+    for n in range(updates):
+        started = time.perf_counter()
+        data["characters"][f"{GUILD}_{n % count}"] = character(n, gold=n)
+        write_text_atomic(path, json.dumps(data, indent=2, ensure_ascii=False))
+        times.append(time.perf_counter() - started)
+    report("hel omskrivning", times)
+
+
+def report(label: str, times: list):
+    times.sort()
+    mean = sum(times) / len(times) * 1000
+    print(f"{label:<18} medel {mean:8.2f} ms   median {times[len(times) // 2] * 1000:8.2f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"{count} karaktärer, {updates} ändringar av en post, en skrivning per ändring")
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_backend("JSON-journal", JsonBackend(os.path.join(tmp, "guilds")), count, updates)
+        bench_backend("SQLite (WAL)", SqliteBackend(os.path.join(tmp, "dnd_data.db")), count, updates)
+        bench_rewrite(os.path.join(tmp, "dnd_data.json"), count, updates)
+
+
+if __name__ == "__main__":
+    main()
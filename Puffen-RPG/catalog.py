@@ -0,0 +1,73 @@
+# ============================================
+# FILE: catalog.py
+# ============================================
+
+# Inventories sparar bara id och egna avvikelser, så en ändrad stat här
+# slår igenom för alla karaktärer nästa gång de laddas.
+# Ta aldrig bort ett id – sätt price till None för att sluta sälja det.
+# Tas ett id ändå bort laddas befintliga items som "Okänt item (<id>)".
+
+# {id: item}. Items med price säljs i /shop.
+ITEMS = {
+    # ⚔️ Weapons
+    "dagger": {"name": "Dagger", "type": "Weapon", "price": 2, "damage": "1d4", "description": "En liten kniv"},
+    "shortsword": {"name": "Shortsword", "type": "Weapon", "price": 10, "damage": "1d6", "description": "Ett kort svärd"},
+    "longsword": {"name": "Longsword", "type": "Weapon", "price": 15, "damage": "1d8", "description": "Ett långt svärd"},
+    "greatsword": {"name": "Greatsword", "type": "Weapon", "price": 50, "damage": "2d6", "description": "Ett massivt tvåhandssvärd"},
+    "battleaxe": {"name": "Battleaxe", "type": "Weapon", "price": 10, "damage": "1d8", "description": "En stridsyxa"},
+    "mace": {"name": "Mace", "type": "Weapon", "price": 5, "damage": "1d6", "description": "En klubba"},
+    "spear": {"name": "Spear", "type": "Weapon", "price": 1, "damage": "1d6", "description": "Ett spjut"},
+    "crossbow": {"name": "Crossbow", "type": "Weapon", "price": 25, "damage": "1d8", "description": "En armborst"},
+    "longbow": {"name": "Longbow", "type": "Weapon", "price": 50, "damage": "1d8", "description": "En långbåge"},
+    "flaming_longsword": {"name": "Flaming Longsword (+1, 1d6 fire)", "type": "Weapon", "damage": "1d8+1d6"},
+    "frost_greatsword": {"name": "Frost Greatsword (+1, 1d6 cold)", "type": "Weapon", "damage": "2d6+1d6"},
+    "staff_of_power": {"name": "Staff of Power", "type": "Weapon", "damage": "1d6"},
+    "holy_avenger": {"name": "Holy Avenger (+3 Longsword)", "type": "Weapon", "damage": "1d8+3"},
+    "vorpal_sword": {"name": "Vorpal Sword (Crit on 19-20)", "type": "Weapon", "damage": "2d6"},
+
+    # 🛡️ Armor
+    "leather_armor": {"name": "Leather Armor", "type": "Armor", "price": 10, "ac_bonus": 1, "description": "Lätt läderrustning"},
+    "chainmail": {"name": "Chainmail", "type": "Armor", "price": 75, "ac_bonus": 6, "description": "Ringbrynja"},
+    "plate_armor": {"name": "Plate Armor", "type": "Armor", "price": 1500, "ac_bonus": 8, "description": "Full platrustning"},
+    "shield": {"name": "Shield", "type": "Armor", "price": 10, "ac_bonus": 2, "description": "En träsköld"},
+    "plate_armor_1": {"name": "Plate Armor +1", "type": "Armor", "ac_bonus": 9},
+    "armor_of_invulnerability": {"name": "Armor of Invulnerability", "type": "Armor", "ac_bonus": 10},
+
+    # 🧪 Consumables
+    "healing_potion": {"name": "Healing Potion", "type": "Consumable", "price": 50, "effect": "2d4+2", "description": "Återställer 2d4+2 HP"},
+    "greater_healing_potion": {"name": "Greater Healing Potion", "type": "Consumable", "price": 150, "effect": "4d4+4", "description": "Återställer 4d4+4 HP"},
+    "superior_healing_potion": {"name": "Superior Healing Potion", "type": "Consumable", "effect": "8d4+8"},
+    "supreme_healing_potion": {"name": "Supreme Healing Potion", "type": "Consumable", "effect": "10d4+20"},
+    "potion_of_strength": {"name": "Potion of Strength", "type": "Consumable", "price": 100, "effect": "+2 STR", "description": "Ger +2 STR i 1 timme"},
+    "antidote": {"name": "Antidote", "type": "Consumable", "price": 50, "effect": "Remove Poison", "description": "Tar bort poisoned condition"},
+    "rations": {"name": "Rations (10 days)", "type": "Consumable", "price": 5, "description": "Mat för 10 dagar"},
+
+    # 📦 Misc
+    "rope": {"name": "Rope (50 ft)", "type": "Misc", "price": 1, "description": "50 fot rep"},
+    "torches": {"name": "Torch (10)", "type": "Misc", "price": 1, "description": "10 facklor"},
+    "backpack": {"name": "Backpack", "type": "Misc", "price": 2, "description": "En ryggsäck"},
+    "bedroll": {"name": "Bedroll", "type": "Misc", "price": 1, "description": "En sovsäck"},
+    "lockpicks": {"name": "Lockpicks", "type": "Misc", "price": 25, "description": "Verktyg för att öppna lås"},
+    "ring_of_protection": {"name": "Ring of Protection (+1 AC)", "type": "Misc"},
+    "amulet_of_health": {"name": "Amulet of Health (+2 CON)", "type": "Misc"},
+    "cloak_of_elvenkind": {"name": "Cloak of Elvenkind (Stealth advantage)", "type": "Misc"},
+    "ring_of_spell_storing": {"name": "Ring of Spell Storing", "type": "Misc"},
+    "boots_of_speed": {"name": "Boots of Speed (Double movement)", "type": "Misc"},
+    "belt_of_giant_strength": {"name": "Belt of Giant Strength (+4 STR)", "type": "Misc"},
+    "ring_of_three_wishes": {"name": "Ring of Three Wishes", "type": "Misc"},
+    "deck_of_many_things": {"name": "Deck of Many Things", "type": "Misc"},
+    "tome_of_clear_thought": {"name": "Tome of Clear Thought (+2 INT)", "type": "Misc"},
+}
+
+# {namn i gemener: id}
+_BY_NAME = {item["name"].lower(): item_id for item_id, item in ITEMS.items()}
+
+
+def find_id(name: str):
+    """Hittar ett katalog-id från ett itemnamn (skiftlägesokänsligt)."""
+    return _BY_NAME.get(name.lower())
+
+
+def shop_items() -> dict:
+    """Alla items som säljs, som {id: item}."""
+    return {item_id: item for item_id, item in ITEMS.items() if item.get("price") is not None}
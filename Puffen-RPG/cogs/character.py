@@ -5,9 +5,7 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Optional, Literal
-from config import DATA_FILE
-import json
-import os
+from models import Character
 
 # Fördefinierade statspaket (alla summerar till 30 poäng)
 PRESETS = {
@@ -23,29 +21,8 @@ class CharacterCog(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.data_file = DATA_FILE
-        self.data = self.load_data()
+        self.repo = bot.repo
 
-    def load_data(self):
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"characters": {}}
-
-    def save_data(self):
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
-
-    def get_character(self, user_id: str, guild_id: str):
-        key = f"{guild_id}_{user_id}"
-        return self.data["characters"].get(key)
-
-    def save_character(self, user_id: str, guild_id: str, character: dict):
-        key = f"{guild_id}_{user_id}"
-        self.data["characters"][key] = character
-        self.save_data()
-
-    # 🧑 Skapa karaktär med preset
     @app_commands.command(name="createchar", description="Skapa en ny karaktär med färdiga stats")
     async def create_character(
         self,
@@ -54,13 +31,11 @@ class CharacterCog(commands.Cog):
         char_class: Literal["Fighter", "Wizard", "Rogue", "Cleric", "Ranger", "Paladin", "Barbarian", "Bard", "Druid", "Warlock", "Monk", "Sorcerer"] = "Fighter",
         preset: Literal["Balanced", "Tank", "Speedster", "Face", "Mage"] = "Balanced"
     ):
-        key = f"{interaction.guild.id}_{interaction.user.id}"
-
-        if key in self.data["characters"]:
+        if self.repo.get_character(str(interaction.user.id), str(interaction.guild.id)):
             await interaction.response.send_message("❌ Du har redan en karaktär! Använd `/deletechar` först.", ephemeral=True)
             return
 
-        stats = PRESETS[preset]
+        stats = dict(PRESETS[preset])
         strength = stats["strength"]
         speed = stats["speed"]
         charisma = stats["charisma"]
@@ -70,26 +45,16 @@ class CharacterCog(commands.Cog):
         max_hp = health * 5
         ac = 10 + (speed // 2)
 
-        character = {
-            "name": name,
-            "class": char_class,
-            "level": 1,
-            "xp": 0,
-            "stats": stats,
-            "hp": max_hp,
-            "max_hp": max_hp,
-            "temp_hp": 0,
-            "ac": ac,
-            "proficiency": 2,
-            "inventory": [],
-            "gold": 0,
-            "conditions": [],
-            "spells": None,
-            "spell_slots": None,
-            "spell_slots_used": None
-        }
-
-        self.save_character(str(interaction.user.id), str(interaction.guild.id), character)
+        character = Character(
+            name=name,
+            char_class=char_class,
+            stats=stats,
+            hp=max_hp,
+            max_hp=max_hp,
+            ac=ac
+        )
+
+        self.repo.save_character(str(interaction.user.id), str(interaction.guild.id), character)
 
         embed = discord.Embed(
             title=f"⚔️ Karaktär Skapad: {name}",
@@ -107,7 +72,7 @@ class CharacterCog(commands.Cog):
     @app_commands.command(name="sheet", description="Visa din karaktärsblad")
     async def show_sheet(self, interaction: discord.Interaction, target: Optional[discord.Member] = None):
         target_user = target or interaction.user
-        character = self.get_character(str(target_user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(target_user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -117,36 +82,39 @@ class CharacterCog(commands.Cog):
             return
 
         embed = discord.Embed(
-            title=f"⚔️ {character['name']}",
-            description=f"**{character['class']}** | Level {character['level']} | XP: {character['xp']}",
+            title=f"⚔️ {character.name}",
+            description=f"**{character.char_class}** | Level {character.level} | XP: {character.xp}",
             color=discord.Color.blue()
         )
 
-        hp_percentage = character['hp'] / character['max_hp']
+        hp_percentage = character.hp / character.max_hp
         hp_bar = "█" * int(hp_percentage * 10) + "░" * (10 - int(hp_percentage * 10))
-        hp_text = f"{hp_bar}\n{character['hp']}/{character['max_hp']}"
-        if character.get('temp_hp', 0) > 0:
-            hp_text += f" (+{character['temp_hp']} temp)"
+        hp_text = f"{hp_bar}\n{character.hp}/{character.max_hp}"
+        if character.temp_hp > 0:
+            hp_text += f" (+{character.temp_hp} temp)"
         embed.add_field(name="❤️ HP", value=hp_text, inline=False)
 
-        stats_text = "\n".join([f"**{stat.capitalize()}**: {value}" for stat, value in character["stats"].items()])
+        stats_text = "\n".join([f"**{stat.capitalize()}**: {value}" for stat, value in character.stats.items()])
         embed.add_field(name="📊 Stats", value=stats_text, inline=True)
 
-        combat_text = f"**AC**: {character['ac']}\n**Proficiency**: +{character['proficiency']}"
+        combat_text = f"**AC**: {character.ac}\n**Proficiency**: +{character.proficiency}"
         embed.add_field(name="⚔️ Combat", value=combat_text, inline=True)
 
-        if character.get('conditions'):
-            conditions_text = ", ".join(character['conditions'])
+        if character.conditions:
+            conditions_text = ", ".join(character.conditions)
             embed.add_field(name="🎭 Conditions", value=conditions_text, inline=False)
 
-        if character['inventory']:
-            inv_text = "\n".join([f"• {item['name']}" for item in character['inventory'][:3]])
-            if len(character['inventory']) > 3:
-                inv_text += f"\n... och {len(character['inventory']) - 3} till"
+        if character.inventory:
+            stacks = list(character.inventory)
+            inv_text = "\n".join([
+                f"• {item.name}" + (f" x{item.quantity}" if item.quantity > 1 else "") for item in stacks[:3]
+            ])
+            if len(stacks) > 3:
+                inv_text += f"\n... och {len(stacks) - 3} till"
         else:
             inv_text = "*Tomt*"
         embed.add_field(name="🎒 Inventory", value=inv_text, inline=False)
-        embed.add_field(name="💰 Gold", value=f"{character['gold']} gp", inline=True)
+        embed.add_field(name="💰 Gold", value=f"{character.gold} gp", inline=True)
 
         await interaction.response.send_message(embed=embed)
 
@@ -157,7 +125,7 @@ class CharacterCog(commands.Cog):
         interaction: discord.Interaction,
         preset: Optional[Literal["Balanced", "Tank", "Speedster", "Face", "Mage"]] = None
     ):
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message("❌ Du har ingen karaktär!", ephemeral=True)
@@ -167,31 +135,31 @@ class CharacterCog(commands.Cog):
             await interaction.response.send_message("❌ Du måste välja ett preset för att uppdatera!", ephemeral=True)
             return
 
-        stats = PRESETS[preset]
-        character['stats'] = stats
-        character['max_hp'] = stats['health'] * 5
-        character['hp'] = min(character['hp'], character['max_hp'])
-        character['ac'] = 10 + (stats['speed'] // 2)
+        stats = dict(PRESETS[preset])
+        character.stats = stats
+        character.max_hp = stats['health'] * 5
+        character.hp = min(character.hp, character.max_hp)
+        character.ac = 10 + (stats['speed'] // 2)
 
-        self.save_character(str(interaction.user.id), str(interaction.guild.id), character)
+        self.repo.save_character(str(interaction.user.id), str(interaction.guild.id), character)
 
         await interaction.response.send_message(
-            f"✅ Karaktär **{character['name']}** uppdaterad till preset {preset}!\n"
-            f"Max HP: {character['max_hp']} | AC: {character['ac']}"
+            f"✅ Karaktär **{character.name}** uppdaterad till preset {preset}!\n"
+            f"Max HP: {character.max_hp} | AC: {character.ac}"
         )
 
     # 🗑️ Ta bort karaktär
     @app_commands.command(name="deletechar", description="Ta bort din karaktär")
     async def delete_character(self, interaction: discord.Interaction):
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
-            await interaction.response
-            key = f"{interaction.guild.id}_{interaction.user.id}"
-            del self.data["characters"][key]
-            self.save_data()
+            await interaction.response.send_message("❌ Du har ingen karaktär!", ephemeral=True)
+            return
+
+        self.repo.delete_character(str(interaction.user.id), str(interaction.guild.id))
 
-            await interaction.response.send_message(f"✅ **{character['name']}** har tagits bort!", ephemeral=True)
+        await interaction.response.send_message(f"✅ **{character.name}** har tagits bort!", ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(CharacterCog(bot))
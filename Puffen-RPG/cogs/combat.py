@@ -3,41 +3,19 @@ from discord.ext import commands
 from discord import app_commands
 import random
 from typing import Optional
-from config import DATA_FILE, CONDITIONS
-import json
-import os
+from config import CONDITIONS
 
 class CombatCog(commands.Cog):
     """Cog för strid och combat-relaterade kommandon."""
 
     def __init__(self, bot):
         self.bot = bot
-        self.data_file = DATA_FILE
-        self.data = self.load_data()
-
-    def load_data(self):
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"characters": {}}
-
-    def save_data(self):
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
-
-    def get_character(self, user_id: str, guild_id: str):
-        key = f"{guild_id}_{user_id}"
-        return self.data["characters"].get(key)
-
-    def save_character(self, user_id: str, guild_id: str, character: dict):
-        key = f"{guild_id}_{user_id}"
-        self.data["characters"][key] = character
-        self.save_data()
+        self.repo = bot.repo
 
     @app_commands.command(name="initiative", description="Slå initiative för strid")
     async def initiative(self, interaction: discord.Interaction):
         """Slår initiative (d20 + Speed modifier)."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -46,12 +24,12 @@ class CombatCog(commands.Cog):
             )
             return
 
-        speed_bonus = character['stats']['speed'] // 2
+        speed_bonus = character.stats['speed'] // 2
         roll = random.randint(1, 20)
         total = roll + speed_bonus
 
         embed = discord.Embed(
-            title=f"🎲 {character['name']} - Initiative",
+            title=f"🎲 {character.name} - Initiative",
             description=f"1d20 ({roll}) + {speed_bonus} (Speed) = **{total}**",
             color=discord.Color.orange()
         )
@@ -61,7 +39,7 @@ class CombatCog(commands.Cog):
     @app_commands.command(name="attack", description="Gör en attack med ditt vapen")
     async def attack(self, interaction: discord.Interaction, target: Optional[str] = "target"):
         """Gör en attack roll och damage roll."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -71,7 +49,7 @@ class CombatCog(commands.Cog):
             return
 
         # Hitta vapen
-        weapons = [i for i in character['inventory'] if i['type'] == 'Weapon' and i.get('damage')]
+        weapons = [i for i in character.inventory if i.type == 'Weapon' and i.damage]
         if not weapons:
             await interaction.response.send_message(
                 "❌ Du har inget vapen med damage! Lägg till ett med `/additem`",
@@ -82,15 +60,15 @@ class CombatCog(commands.Cog):
         weapon = weapons[0]
 
         # Attack roll (använder strength + proficiency)
-        str_bonus = character['stats']['strength'] // 2
-        attack_mod = str_bonus + character['proficiency']
+        str_bonus = character.stats['strength'] // 2
+        attack_mod = str_bonus + character.proficiency
 
         attack_roll = random.randint(1, 20)
         attack_total = attack_roll + attack_mod
 
         embed = discord.Embed(
-            title=f"⚔️ {character['name']} attackerar {target}!",
-            description=f"Vapen: **{weapon['name']}**",
+            title=f"⚔️ {character.name} attackerar {target}!",
+            description=f"Vapen: **{weapon.name}**",
             color=discord.Color.red()
         )
 
@@ -102,7 +80,7 @@ class CombatCog(commands.Cog):
 
         # Damage roll
         if attack_roll != 1:
-            damage_dice = weapon['damage']
+            damage_dice = weapon.damage
             num_dice, die_size = damage_dice.split('d')
             num_dice = int(num_dice)
             die_size = int(die_size)
@@ -134,7 +112,7 @@ class CombatCog(commands.Cog):
     ):
         """Healar en karaktär."""
         target_user = target or interaction.user
-        character = self.get_character(str(target_user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(target_user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -143,18 +121,18 @@ class CombatCog(commands.Cog):
             )
             return
 
-        old_hp = character['hp']
-        character['hp'] = min(character['hp'] + amount, character['max_hp'])
-        actual_heal = character['hp'] - old_hp
+        old_hp = character.hp
+        character.hp = min(character.hp + amount, character.max_hp)
+        actual_heal = character.hp - old_hp
 
-        self.save_character(str(target_user.id), str(interaction.guild.id), character)
+        self.repo.save_character(str(target_user.id), str(interaction.guild.id), character)
 
         embed = discord.Embed(
-            title=f"💚 {character['name']} healas!",
+            title=f"💚 {character.name} healas!",
             description=f"+{actual_heal} HP",
             color=discord.Color.green()
         )
-        embed.add_field(name="HP", value=f"{old_hp} → {character['hp']}/{character['max_hp']}")
+        embed.add_field(name="HP", value=f"{old_hp} → {character.hp}/{character.max_hp}")
 
         await interaction.response.send_message(embed=embed)
 
@@ -167,7 +145,7 @@ class CombatCog(commands.Cog):
     ):
         """Lägger till en condition."""
         target_user = target or interaction.user
-        character = self.get_character(str(target_user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(target_user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -176,23 +154,19 @@ class CombatCog(commands.Cog):
             )
             return
 
-        # Initiera conditions om det inte finns
-        if 'conditions' not in character:
-            character['conditions'] = []
-
-        if condition in character['conditions']:
+        if condition in character.conditions:
             await interaction.response.send_message(
-                f"❌ {character['name']} har redan condition: **{condition}**",
+                f"❌ {character.name} har redan condition: **{condition}**",
                 ephemeral=True
             )
             return
 
-        character['conditions'].append(condition)
-        self.save_character(str(target_user.id), str(interaction.guild.id), character)
+        character.conditions.append(condition)
+        self.repo.save_character(str(target_user.id), str(interaction.guild.id), character)
 
         embed = discord.Embed(
             title=f"🎭 Condition Tillagd",
-            description=f"**{character['name']}** har nu condition: **{condition}**",
+            description=f"**{character.name}** har nu condition: **{condition}**",
             color=discord.Color.orange()
         )
 
@@ -207,7 +181,7 @@ class CombatCog(commands.Cog):
     ):
         """Tar bort en condition."""
         target_user = target or interaction.user
-        character = self.get_character(str(target_user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(target_user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -216,19 +190,19 @@ class CombatCog(commands.Cog):
             )
             return
 
-        if 'conditions' not in character or condition not in character['conditions']:
+        if condition not in character.conditions:
             await interaction.response.send_message(
-                f"❌ {character['name']} har inte condition: **{condition}**",
+                f"❌ {character.name} har inte condition: **{condition}**",
                 ephemeral=True
             )
             return
 
-        character['conditions'].remove(condition)
-        self.save_character(str(target_user.id), str(interaction.guild.id), character)
+        character.conditions.remove(condition)
+        self.repo.save_character(str(target_user.id), str(interaction.guild.id), character)
 
         embed = discord.Embed(
             title=f"🎭 Condition Borttagen",
-            description=f"**{character['name']}** har inte längre condition: **{condition}**",
+            description=f"**{character.name}** har inte längre condition: **{condition}**",
             color=discord.Color.green()
         )
 
@@ -257,7 +231,7 @@ class CombatCog(commands.Cog):
     ):
         """Lägger till temporary HP."""
         target_user = target or interaction.user
-        character = self.get_character(str(target_user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(target_user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -266,18 +240,14 @@ class CombatCog(commands.Cog):
             )
             return
 
-        # Initiera temp_hp om det inte finns
-        if 'temp_hp' not in character:
-            character['temp_hp'] = 0
-
-        old_temp = character['temp_hp']
-        character['temp_hp'] = max(character['temp_hp'], amount)  # Temp HP stacks not, tar högsta
+        old_temp = character.temp_hp
+        character.temp_hp = max(character.temp_hp, amount)  # Temp HP stacks not, tar högsta
 
-        self.save_character(str(target_user.id), str(interaction.guild.id), character)
+        self.repo.save_character(str(target_user.id), str(interaction.guild.id), character)
 
         embed = discord.Embed(
             title=f"🛡️ Temporary HP",
-            description=f"**{character['name']}** har nu {character['temp_hp']} temp HP",
+            description=f"**{character.name}** har nu {character.temp_hp} temp HP",
             color=discord.Color.blue()
         )
 
@@ -2,42 +2,15 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Literal, Optional
-from config import DATA_FILE
-import json
-import os
+from models import Item, Monster
+from repository import slugify
 
 class GMCog(commands.Cog):
     """Cog för GM (Game Master) kommandon."""
 
     def __init__(self, bot):
         self.bot = bot
-        self.data_file = DATA_FILE
-        self.data = self.load_data()
-
-    def load_data(self):
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # Initiera npcs och monsters om de inte finns
-                if 'npcs' not in data:
-                    data['npcs'] = {}
-                if 'monsters' not in data:
-                    data['monsters'] = {}
-                return data
-        return {"characters": {}, "npcs": {}, "monsters": {}}
-
-    def save_data(self):
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
-
-    def get_character(self, user_id: str, guild_id: str):
-        key = f"{guild_id}_{user_id}"
-        return self.data["characters"].get(key)
-
-    def save_character(self, user_id: str, guild_id: str, character: dict):
-        key = f"{guild_id}_{user_id}"
-        self.data["characters"][key] = character
-        self.save_data()
+        self.repo = bot.repo
 
     @app_commands.command(name="damage", description="[GM] Ge skada till en spelare")
     @app_commands.checks.has_permissions(administrator=True)
@@ -48,7 +21,7 @@ class GMCog(commands.Cog):
         amount: int
     ):
         """[GM] Ge skada till en spelare."""
-        character = self.get_character(str(target.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(target.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -57,26 +30,26 @@ class GMCog(commands.Cog):
             )
             return
 
-        old_hp = character['hp']
-        old_temp = character.get('temp_hp', 0)
+        old_hp = character.hp
+        old_temp = character.temp_hp
 
         # Damage tar först temp HP
         if old_temp > 0:
             if amount <= old_temp:
-                character['temp_hp'] -= amount
+                character.temp_hp -= amount
                 damage_to_hp = 0
             else:
                 damage_to_hp = amount - old_temp
-                character['temp_hp'] = 0
+                character.temp_hp = 0
         else:
             damage_to_hp = amount
 
-        character['hp'] = max(0, character['hp'] - damage_to_hp)
+        character.hp = max(0, character.hp - damage_to_hp)
 
-        self.save_character(str(target.id), str(interaction.guild.id), character)
+        self.repo.save_character(str(target.id), str(interaction.guild.id), character)
 
         embed = discord.Embed(
-            title=f"💔 {character['name']} tar skada!",
+            title=f"💔 {character.name} tar skada!",
             description=f"-{amount} damage",
             color=discord.Color.red()
         )
@@ -84,17 +57,17 @@ class GMCog(commands.Cog):
         if old_temp > 0:
             embed.add_field(
                 name="🛡️ Temp HP",
-                value=f"{old_temp} → {character['temp_hp']}",
+                value=f"{old_temp} → {character.temp_hp}",
                 inline=True
             )
 
         embed.add_field(
             name="❤️ HP",
-            value=f"{old_hp} → {character['hp']}/{character['max_hp']}",
+            value=f"{old_hp} → {character.hp}/{character.max_hp}",
             inline=True
         )
 
-        if character['hp'] == 0:
+        if character.hp == 0:
             embed.set_footer(text="☠️ Karaktären är nere!")
 
         await interaction.response.send_message(embed=embed)
@@ -106,12 +79,12 @@ class GMCog(commands.Cog):
         interaction: discord.Interaction,
         target: discord.Member,
         item_name: str,
-        item_type: Literal["Weapon", "Armor", "Consumable", "Misc"] = "Misc",
+        item_type: Optional[Literal["Weapon", "Armor", "Consumable", "Misc"]] = None,
         damage: str = None,
         ac_bonus: int = None
     ):
         """[GM] Ger ett item till en spelare."""
-        character = self.get_character(str(target.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(target.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -120,17 +93,12 @@ class GMCog(commands.Cog):
             )
             return
 
-        item = {
-            "name": item_name,
-            "type": item_type,
-            "damage": damage,
-            "ac_bonus": ac_bonus
-        }
-        character['inventory'].append(item)
-        self.save_character(str(target.id), str(interaction.guild.id), character)
+        item = Item.from_name(item_name, item_type, damage, ac_bonus)
+        character.inventory.add(item)
+        self.repo.save_character(str(target.id), str(interaction.guild.id), character)
 
         await interaction.response.send_message(
-            f"✅ **{item_name}** har getts till {character['name']}!"
+            f"✅ **{item_name}** har getts till {character.name}!"
         )
 
     @app_commands.command(name="givexp", description="[GM] Ge XP till en spelare")
@@ -142,7 +110,7 @@ class GMCog(commands.Cog):
         xp: int
     ):
         """[GM] Ger XP till en spelare."""
-        character = self.get_character(str(target.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(target.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -151,11 +119,11 @@ class GMCog(commands.Cog):
             )
             return
 
-        character['xp'] += xp
-        self.save_character(str(target.id), str(interaction.guild.id), character)
+        character.xp += xp
+        self.repo.save_character(str(target.id), str(interaction.guild.id), character)
 
         await interaction.response.send_message(
-            f"✅ **{character['name']}** fick {xp} XP! (Totalt: {character['xp']} XP)"
+            f"✅ **{character.name}** fick {xp} XP! (Totalt: {character.xp} XP)"
         )
 
     @app_commands.command(name="givegold", description="[GM] Ge guld till en spelare")
@@ -167,7 +135,7 @@ class GMCog(commands.Cog):
         gold: int
     ):
         """[GM] Ger guld till en spelare."""
-        character = self.get_character(str(target.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(target.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -176,18 +144,17 @@ class GMCog(commands.Cog):
             )
             return
 
-        character['gold'] += gold
-        self.save_character(str(target.id), str(interaction.guild.id), character)
+        character.gold += gold
+        self.repo.save_character(str(target.id), str(interaction.guild.id), character)
 
         await interaction.response.send_message(
-            f"✅ **{character['name']}** fick {gold} gold! (Totalt: {character['gold']} gp)"
+            f"✅ **{character.name}** fick {gold} gold! (Totalt: {character.gold} gp)"
         )
 
     @app_commands.command(name="party", description="Visa alla karaktärer i gruppen")
     async def show_party(self, interaction: discord.Interaction):
         """Visar alla karaktärer i servern."""
-        guild_chars = {k: v for k, v in self.data["characters"].items()
-                      if k.startswith(f"{interaction.guild.id}_")}
+        guild_chars = self.repo.scan("characters", str(interaction.guild.id))
 
         if not guild_chars:
             await interaction.response.send_message("❌ Inga karaktärer finns i denna server!", ephemeral=True)
@@ -199,19 +166,18 @@ class GMCog(commands.Cog):
             color=discord.Color.blue()
         )
 
-        for key, char in guild_chars.items():
-            user_id = key.split('_')[1]
+        for user_id, char in guild_chars.items():
             member = interaction.guild.get_member(int(user_id))
-            hp_bar = "█" * int((char['hp'] / char['max_hp']) * 5) + "░" * (5 - int((char['hp'] / char['max_hp']) * 5))
+            hp_bar = "█" * int((char.hp / char.max_hp) * 5) + "░" * (5 - int((char.hp / char.max_hp) * 5))
 
-            char_info = f"**{char['class']} {char['level']}** | HP: {hp_bar} {char['hp']}/{char['max_hp']}\n"
-            char_info += f"AC: {char['ac']} | Gold: {char['gold']}gp"
+            char_info = f"**{char.char_class} {char.level}** | HP: {hp_bar} {char.hp}/{char.max_hp}\n"
+            char_info += f"AC: {char.ac} | Gold: {char.gold}gp"
 
-            if char.get('conditions'):
-                char_info += f"\n🎭 {', '.join(char['conditions'])}"
+            if char.conditions:
+                char_info += f"\n🎭 {', '.join(char.conditions)}"
 
             embed.add_field(
-                name=f"⚔️ {char['name']} ({member.display_name if member else 'Unknown'})",
+                name=f"⚔️ {char.name} ({member.display_name if member else 'Unknown'})",
                 value=char_info,
                 inline=False
             )
@@ -227,7 +193,7 @@ class GMCog(commands.Cog):
         hp: int
     ):
         """[GM] Sätter HP för en spelare."""
-        character = self.get_character(str(target.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(target.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -236,11 +202,11 @@ class GMCog(commands.Cog):
             )
             return
 
-        character['hp'] = max(0, min(hp, character['max_hp']))
-        self.save_character(str(target.id), str(interaction.guild.id), character)
+        character.hp = max(0, min(hp, character.max_hp))
+        self.repo.save_character(str(target.id), str(interaction.guild.id), character)
 
         await interaction.response.send_message(
-            f"✅ **{character['name']}**'s HP är nu {character['hp']}/{character['max_hp']}"
+            f"✅ **{character.name}**'s HP är nu {character.hp}/{character.max_hp}"
         )
 
     @app_commands.command(name="createnpc", description="[GM] Skapa en NPC")
@@ -254,19 +220,16 @@ class GMCog(commands.Cog):
         description: Optional[str] = None
     ):
         """[GM] Skapar en NPC."""
-        key = f"{interaction.guild.id}_{name.lower().replace(' ', '_')}"
-
-        npc = {
-            "name": name,
-            "hp": hp,
-            "max_hp": hp,
-            "ac": ac,
-            "description": description,
-            "guild_id": str(interaction.guild.id)
-        }
+        npc = Monster(
+            name=name,
+            hp=hp,
+            max_hp=hp,
+            ac=ac,
+            description=description,
+            guild_id=str(interaction.guild.id)
+        )
 
-        self.data["npcs"][key] = npc
-        self.save_data()
+        self.repo.put("npcs", str(interaction.guild.id), slugify(name), npc)
 
         embed = discord.Embed(
             title=f"👤 NPC Skapad: {name}",
@@ -291,21 +254,18 @@ class GMCog(commands.Cog):
         description: Optional[str] = None
     ):
         """[GM] Skapar ett monster."""
-        key = f"{interaction.guild.id}_{name.lower().replace(' ', '_')}"
-
-        monster = {
-            "name": name,
-            "hp": hp,
-            "max_hp": hp,
-            "ac": ac,
-            "attack_bonus": attack_bonus,
-            "damage": damage,
-            "description": description,
-            "guild_id": str(interaction.guild.id)
-        }
-
-        self.data["monsters"][key] = monster
-        self.save_data()
+        monster = Monster(
+            name=name,
+            hp=hp,
+            max_hp=hp,
+            ac=ac,
+            attack_bonus=attack_bonus,
+            damage=damage,
+            description=description,
+            guild_id=str(interaction.guild.id)
+        )
+
+        self.repo.put("monsters", str(interaction.guild.id), slugify(name), monster)
 
         embed = discord.Embed(
             title=f"👹 Monster Skapat: {name}",
@@ -321,8 +281,7 @@ class GMCog(commands.Cog):
     @app_commands.command(name="npcs", description="[GM] Visa alla NPCs")
     async def show_npcs(self, interaction: discord.Interaction):
         """Visar alla NPCs i servern."""
-        guild_npcs = {k: v for k, v in self.data["npcs"].items()
-                     if v.get('guild_id') == str(interaction.guild.id)}
+        guild_npcs = self.repo.scan("npcs", str(interaction.guild.id))
 
         if not guild_npcs:
             await interaction.response.send_message("❌ Inga NPCs finns i denna server!", ephemeral=True)
@@ -335,13 +294,13 @@ class GMCog(commands.Cog):
         )
 
         for key, npc in guild_npcs.items():
-            hp_bar = "█" * int((npc['hp'] / npc['max_hp']) * 5) + "░" * (5 - int((npc['hp'] / npc['max_hp']) * 5))
-            npc_info = f"HP: {hp_bar} {npc['hp']}/{npc['max_hp']} | AC: {npc['ac']}"
-            if npc.get('description'):
-                npc_info += f"\n*{npc['description']}*"
+            hp_bar = "█" * int((npc.hp / npc.max_hp) * 5) + "░" * (5 - int((npc.hp / npc.max_hp) * 5))
+            npc_info = f"HP: {hp_bar} {npc.hp}/{npc.max_hp} | AC: {npc.ac}"
+            if npc.description:
+                npc_info += f"\n*{npc.description}*"
 
             embed.add_field(
-                name=f"👤 {npc['name']}",
+                name=f"👤 {npc.name}",
                 value=npc_info,
                 inline=False
             )
@@ -351,8 +310,7 @@ class GMCog(commands.Cog):
     @app_commands.command(name="monsters", description="[GM] Visa alla monsters")
     async def show_monsters(self, interaction: discord.Interaction):
         """Visar alla monsters i servern."""
-        guild_monsters = {k: v for k, v in self.data["monsters"].items()
-                         if v.get('guild_id') == str(interaction.guild.id)}
+        guild_monsters = self.repo.scan("monsters", str(interaction.guild.id))
 
         if not guild_monsters:
             await interaction.response.send_message("❌ Inga monsters finns i denna server!", ephemeral=True)
@@ -365,14 +323,14 @@ class GMCog(commands.Cog):
         )
 
         for key, monster in guild_monsters.items():
-            hp_bar = "█" * int((monster['hp'] / monster['max_hp']) * 5) + "░" * (5 - int((monster['hp'] / monster['max_hp']) * 5))
-            monster_info = f"HP: {hp_bar} {monster['hp']}/{monster['max_hp']}\n"
-            monster_info += f"AC: {monster['ac']} | Attack: +{monster['attack_bonus']} ({monster['damage']})"
-            if monster.get('description'):
-                monster_info += f"\n*{monster['description']}*"
+            hp_bar = "█" * int((monster.hp / monster.max_hp) * 5) + "░" * (5 - int((monster.hp / monster.max_hp) * 5))
+            monster_info = f"HP: {hp_bar} {monster.hp}/{monster.max_hp}\n"
+            monster_info += f"AC: {monster.ac} | Attack: +{monster.attack_bonus} ({monster.damage})"
+            if monster.description:
+                monster_info += f"\n*{monster.description}*"
 
             embed.add_field(
-                name=f"👹 {monster['name']}",
+                name=f"👹 {monster.name}",
                 value=monster_info,
                 inline=False
             )
@@ -389,31 +347,30 @@ class GMCog(commands.Cog):
         is_monster: bool = False
     ):
         """[GM] Ger skada till en NPC eller monster."""
-        key = f"{interaction.guild.id}_{name.lower().replace(' ', '_')}"
-        entity_dict = self.data["monsters"] if is_monster else self.data["npcs"]
+        collection = "monsters" if is_monster else "npcs"
         entity_type = "Monster" if is_monster else "NPC"
+        entity = self.repo.get(collection, str(interaction.guild.id), slugify(name))
 
-        if key not in entity_dict:
+        if not entity:
             await interaction.response.send_message(
                 f"❌ Kunde inte hitta {entity_type}: **{name}**",
                 ephemeral=True
             )
             return
 
-        entity = entity_dict[key]
-        old_hp = entity['hp']
-        entity['hp'] = max(0, entity['hp'] - amount)
-        self.save_data()
+        old_hp = entity.hp
+        entity.hp = max(0, entity.hp - amount)
+        self.repo.put(collection, str(interaction.guild.id), slugify(name), entity)
 
         embed = discord.Embed(
-            title=f"💔 {entity['name']} tar skada!",
+            title=f"💔 {entity.name} tar skada!",
             description=f"-{amount} damage",
             color=discord.Color.red()
         )
-        embed.add_field(name="HP", value=f"{old_hp} → {entity['hp']}/{entity['max_hp']}")
+        embed.add_field(name="HP", value=f"{old_hp} → {entity.hp}/{entity.max_hp}")
 
-        if entity['hp'] == 0:
-            embed.set_footer(text=f"☠️ {entity['name']} är besegrad!")
+        if entity.hp == 0:
+            embed.set_footer(text=f"☠️ {entity.name} är besegrad!")
 
         await interaction.response.send_message(embed=embed)
 
@@ -421,36 +378,26 @@ class GMCog(commands.Cog):
     @app_commands.checks.has_permissions(administrator=True)
     async def delete_npc(self, interaction: discord.Interaction, name: str):
         """[GM] Tar bort en NPC."""
-        key = f"{interaction.guild.id}_{name.lower().replace(' ', '_')}"
-
-        if key not in self.data["npcs"]:
+        if not self.repo.delete("npcs", str(interaction.guild.id), slugify(name)):
             await interaction.response.send_message(
                 f"❌ Kunde inte hitta NPC: **{name}**",
                 ephemeral=True
             )
             return
 
-        del self.data["npcs"][key]
-        self.save_data()
-
         await interaction.response.send_message(f"✅ NPC **{name}** har tagits bort!")
 
     @app_commands.command(name="deletemonster", description="[GM] Ta bort ett monster")
     @app_commands.checks.has_permissions(administrator=True)
     async def delete_monster(self, interaction: discord.Interaction, name: str):
         """[GM] Tar bort ett monster."""
-        key = f"{interaction.guild.id}_{name.lower().replace(' ', '_')}"
-
-        if key not in self.data["monsters"]:
+        if not self.repo.delete("monsters", str(interaction.guild.id), slugify(name)):
             await interaction.response.send_message(
                 f"❌ Kunde inte hitta monster: **{name}**",
                 ephemeral=True
             )
             return
 
-        del self.data["monsters"][key]
-        self.save_data()
-
         await interaction.response.send_message(f"✅ Monster **{name}** har tagits bort!")
 
 async def setup(bot):
@@ -2,81 +2,80 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Optional, Literal
-from config import DATA_FILE
-import json
-import os
 import random
+from catalog import ITEMS
+from models import Item, Treasure
+from repository import TransactionConflict, slugify
 
 class LootCog(commands.Cog):
     """Cog för loot tables och random loot generation."""
 
     def __init__(self, bot):
         self.bot = bot
-        self.data_file = DATA_FILE
-        self.data = self.load_data()
+        self.repo = bot.repo
 
-        # Loot tables
+        # Loot tables (id:n i catalog.py)
         self.loot_tables = {
             "Common": {
                 "gold": (1, 10),
                 "items": [
-                    {"name": "Rope (50 ft)", "type": "Misc", "weight": 20},
-                    {"name": "Torch (10)", "type": "Misc", "weight": 20},
-                    {"name": "Rations (10 days)", "type": "Consumable", "weight": 20},
-                    {"name": "Bedroll", "type": "Misc", "weight": 15},
-                    {"name": "Dagger", "type": "Weapon", "damage": "1d4", "weight": 15},
-                    {"name": "Healing Potion", "type": "Consumable", "effect": "2d4+2", "weight": 10},
+                    {"id": "rope", "weight": 20},
+                    {"id": "torches", "weight": 20},
+                    {"id": "rations", "weight": 20},
+                    {"id": "bedroll", "weight": 15},
+                    {"id": "dagger", "weight": 15},
+                    {"id": "healing_potion", "weight": 10},
                 ]
             },
             "Uncommon": {
                 "gold": (10, 50),
                 "items": [
-                    {"name": "Shortsword", "type": "Weapon", "damage": "1d6", "weight": 15},
-                    {"name": "Longsword", "type": "Weapon", "damage": "1d8", "weight": 15},
-                    {"name": "Leather Armor", "type": "Armor", "ac_bonus": 1, "weight": 15},
-                    {"name": "Healing Potion", "type": "Consumable", "effect": "2d4+2", "weight": 20},
-                    {"name": "Greater Healing Potion", "type": "Consumable", "effect": "4d4+4", "weight": 10},
-                    {"name": "Crossbow", "type": "Weapon", "damage": "1d8", "weight": 10},
-                    {"name": "Shield", "type": "Armor", "ac_bonus": 2, "weight": 10},
-                    {"name": "Lockpicks", "type": "Misc", "weight": 5},
+                    {"id": "shortsword", "weight": 15},
+                    {"id": "longsword", "weight": 15},
+                    {"id": "leather_armor", "weight": 15},
+                    {"id": "healing_potion", "weight": 20},
+                    {"id": "greater_healing_potion", "weight": 10},
+                    {"id": "crossbow", "weight": 10},
+                    {"id": "shield", "weight": 10},
+                    {"id": "lockpicks", "weight": 5},
                 ]
             },
             "Rare": {
                 "gold": (50, 200),
                 "items": [
-                    {"name": "Greatsword", "type": "Weapon", "damage": "2d6", "weight": 15},
-                    {"name": "Longbow", "type": "Weapon", "damage": "1d8", "weight": 15},
-                    {"name": "Chainmail", "type": "Armor", "ac_bonus": 6, "weight": 15},
-                    {"name": "Greater Healing Potion", "type": "Consumable", "effect": "4d4+4", "weight": 20},
-                    {"name": "Potion of Strength", "type": "Consumable", "effect": "+2 STR", "weight": 10},
-                    {"name": "Ring of Protection (+1 AC)", "type": "Misc", "weight": 10},
-                    {"name": "Amulet of Health (+2 CON)", "type": "Misc", "weight": 10},
-                    {"name": "Cloak of Elvenkind (Stealth advantage)", "type": "Misc", "weight": 5},
+                    {"id": "greatsword", "weight": 15},
+                    {"id": "longbow", "weight": 15},
+                    {"id": "chainmail", "weight": 15},
+                    {"id": "greater_healing_potion", "weight": 20},
+                    {"id": "potion_of_strength", "weight": 10},
+                    {"id": "ring_of_protection", "weight": 10},
+                    {"id": "amulet_of_health", "weight": 10},
+                    {"id": "cloak_of_elvenkind", "weight": 5},
                 ]
             },
             "Epic": {
                 "gold": (200, 1000),
                 "items": [
-                    {"name": "Flaming Longsword (+1, 1d6 fire)", "type": "Weapon", "damage": "1d8+1d6", "weight": 15},
-                    {"name": "Frost Greatsword (+1, 1d6 cold)", "type": "Weapon", "damage": "2d6+1d6", "weight": 15},
-                    {"name": "Plate Armor +1", "type": "Armor", "ac_bonus": 9, "weight": 15},
-                    {"name": "Ring of Spell Storing", "type": "Misc", "weight": 10},
-                    {"name": "Boots of Speed (Double movement)", "type": "Misc", "weight": 10},
-                    {"name": "Belt of Giant Strength (+4 STR)", "type": "Misc", "weight": 10},
-                    {"name": "Superior Healing Potion", "type": "Consumable", "effect": "8d4+8", "weight": 15},
-                    {"name": "Staff of Power", "type": "Weapon", "damage": "1d6", "weight": 10},
+                    {"id": "flaming_longsword", "weight": 15},
+                    {"id": "frost_greatsword", "weight": 15},
+                    {"id": "plate_armor_1", "weight": 15},
+                    {"id": "ring_of_spell_storing", "weight": 10},
+                    {"id": "boots_of_speed", "weight": 10},
+                    {"id": "belt_of_giant_strength", "weight": 10},
+                    {"id": "superior_healing_potion", "weight": 15},
+                    {"id": "staff_of_power", "weight": 10},
                 ]
             },
             "Legendary": {
                 "gold": (1000, 5000),
                 "items": [
-                    {"name": "Holy Avenger (+3 Longsword)", "type": "Weapon", "damage": "1d8+3", "weight": 20},
-                    {"name": "Vorpal Sword (Crit on 19-20)", "type": "Weapon", "damage": "2d6", "weight": 20},
-                    {"name": "Armor of Invulnerability", "type": "Armor", "ac_bonus": 10, "weight": 20},
-                    {"name": "Ring of Three Wishes", "type": "Misc", "weight": 15},
-                    {"name": "Deck of Many Things", "type": "Misc", "weight": 10},
-                    {"name": "Tome of Clear Thought (+2 INT)", "type": "Misc", "weight": 10},
-                    {"name": "Supreme Healing Potion", "type": "Consumable", "effect": "10d4+20", "weight": 5},
+                    {"id": "holy_avenger", "weight": 20},
+                    {"id": "vorpal_sword", "weight": 20},
+                    {"id": "armor_of_invulnerability", "weight": 20},
+                    {"id": "ring_of_three_wishes", "weight": 15},
+                    {"id": "deck_of_many_things", "weight": 10},
+                    {"id": "tome_of_clear_thought", "weight": 10},
+                    {"id": "supreme_healing_potion", "weight": 5},
                 ]
             }
         }
@@ -101,25 +100,6 @@ class LootCog(commands.Cog):
             "Demon Lord": "Legendary"
         }
 
-    def load_data(self):
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"characters": {}}
-
-    def save_data(self):
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
-
-    def get_character(self, user_id: str, guild_id: str):
-        key = f"{guild_id}_{user_id}"
-        return self.data["characters"].get(key)
-
-    def save_character(self, user_id: str, guild_id: str, character: dict):
-        key = f"{guild_id}_{user_id}"
-        self.data["characters"][key] = character
-        self.save_data()
-
     def generate_loot(self, rarity: str, num_items: int = 1):
         """Genererar random loot från en loot table."""
         if rarity not in self.loot_tables:
@@ -141,14 +121,7 @@ class LootCog(commands.Cog):
             for item_template in table["items"]:
                 cumulative += item_template["weight"]
                 if rand <= cumulative:
-                    item = {
-                        "name": item_template["name"],
-                        "type": item_template["type"],
-                        "damage": item_template.get("damage"),
-                        "ac_bonus": item_template.get("ac_bonus"),
-                        "effect": item_template.get("effect")
-                    }
-                    items.append(item)
+                    items.append(Item.from_catalog(item_template["id"]))
                     break
 
         return gold, items
@@ -181,7 +154,7 @@ class LootCog(commands.Cog):
 
         # If target specified, give loot
         if target:
-            character = self.get_character(str(target.id), str(interaction.guild.id))
+            character = self.repo.get_character(str(target.id), str(interaction.guild.id))
 
             if not character:
                 await interaction.response.send_message(
@@ -190,9 +163,10 @@ class LootCog(commands.Cog):
                 )
                 return
 
-            character["gold"] += gold
-            character["inventory"].extend(items)
-            self.save_character(str(target.id), str(interaction.guild.id), character)
+            character.gold += gold
+            for item in items:
+                character.inventory.add(item)
+            self.repo.save_character(str(target.id), str(interaction.guild.id), character)
 
         # Create embed
         rarity_colors = {
@@ -214,13 +188,13 @@ class LootCog(commands.Cog):
         if items:
             items_text = ""
             for item in items:
-                items_text += f"• **{item['name']}**"
-                if item.get('damage'):
-                    items_text += f" ({item['damage']} damage)"
-                elif item.get('ac_bonus'):
-                    items_text += f" (+{item['ac_bonus']} AC)"
-                elif item.get('effect'):
-                    items_text += f" ({item['effect']})"
+                items_text += f"• **{item.name}**"
+                if item.damage:
+                    items_text += f" ({item.damage} damage)"
+                elif item.ac_bonus:
+                    items_text += f" (+{item.ac_bonus} AC)"
+                elif item.effect:
+                    items_text += f" ({item.effect})"
                 items_text += "\n"
             embed.add_field(name="🎒 Items", value=items_text, inline=False)
 
@@ -257,7 +231,8 @@ class LootCog(commands.Cog):
         )
 
         items_by_type = {}
-        for item in table["items"]:
+        for entry in table["items"]:
+            item = dict(ITEMS[entry["id"]], weight=entry["weight"])
             item_type = item["type"]
             if item_type not in items_by_type:
                 items_by_type[item_type] = []
@@ -306,7 +281,7 @@ class LootCog(commands.Cog):
 
         # If target specified, give loot
         if target:
-            character = self.get_character(str(target.id), str(interaction.guild.id))
+            character = self.repo.get_character(str(target.id), str(interaction.guild.id))
 
             if not character:
                 await interaction.response.send_message(
@@ -315,9 +290,10 @@ class LootCog(commands.Cog):
                 )
                 return
 
-            character["gold"] += gold
-            character["inventory"].extend(items)
-            self.save_character(str(target.id), str(interaction.guild.id), character)
+            character.gold += gold
+            for item in items:
+                character.inventory.add(item)
+            self.repo.save_character(str(target.id), str(interaction.guild.id), character)
 
         # Create embed
         embed = discord.Embed(
@@ -331,13 +307,13 @@ class LootCog(commands.Cog):
         if items:
             items_text = ""
             for item in items:
-                items_text += f"• **{item['name']}**"
-                if item.get('damage'):
-                    items_text += f" ({item['damage']})"
-                elif item.get('ac_bonus'):
-                    items_text += f" (+{item['ac_bonus']} AC)"
-                elif item.get('effect'):
-                    items_text += f" ({item['effect']})"
+                items_text += f"• **{item.name}**"
+                if item.damage:
+                    items_text += f" ({item.damage})"
+                elif item.ac_bonus:
+                    items_text += f" (+{item.ac_bonus} AC)"
+                elif item.effect:
+                    items_text += f" ({item.effect})"
                 items_text += "\n"
             embed.add_field(name="🎒 Items", value=items_text, inline=False)
 
@@ -388,38 +364,52 @@ class LootCog(commands.Cog):
     ):
         """[GM] Ger random loot till alla spelare i party."""
         # Get all characters in guild
-        guild_chars = {k: v for k, v in self.data["characters"].items()
-                      if k.startswith(f"{interaction.guild.id}_")}
+        guild_id = str(interaction.guild.id)
+        user_ids = list(self.repo.scan("characters", guild_id))
 
-        if not guild_chars:
+        if not user_ids:
             await interaction.response.send_message(
                 "❌ Inga karaktärer finns i denna server!",
                 ephemeral=True
             )
             return
 
+        def distribute(tx):
+            rolled = []
+            for user_id in user_ids:
+                character = tx.get_character(user_id)
+                if not character:
+                    continue
+
+                # Generate loot
+                gold, items = self.generate_loot(rarity, random.randint(1, 2))
+
+                # Give loot
+                character.gold += gold
+                for item in items:
+                    character.inventory.add(item)
+
+                tx.save_character(user_id, character)
+                rolled.append((character, gold, items))
+            return rolled
+
+        # Hela partyt får sin loot i samma commit
+        try:
+            rolled = await self.repo.transaction(guild_id, distribute)
+        except TransactionConflict:
+            await interaction.response.send_message("❌ Partyt ändrades samtidigt, försök igen!", ephemeral=True)
+            return
+
         embed = discord.Embed(
             title=f"🎁 Party Loot Distribution - {rarity}",
-            description=f"Rolling loot for {len(guild_chars)} characters...",
+            description=f"Rolling loot for {len(rolled)} characters...",
             color=discord.Color.gold()
         )
 
         total_gold = 0
         total_items = 0
 
-        for key, character in guild_chars.items():
-            user_id = key.split('_')[1]
-
-            # Generate loot
-            gold, items = self.generate_loot(rarity, random.randint(1, 2))
-
-            # Give loot
-            character["gold"] += gold
-            character["inventory"].extend(items)
-
-            # Save
-            self.data["characters"][key] = character
-
+        for character, gold, items in rolled:
             # Track totals
             total_gold += gold
             total_items += len(items)
@@ -427,15 +417,14 @@ class LootCog(commands.Cog):
             # Add to embed
             items_text = f"💰 {gold} gp"
             if items:
-                items_text += f"\n🎒 {len(items)} items: " + ", ".join([i['name'] for i in items])
+                items_text += f"\n🎒 {len(items)} items: " + ", ".join([i.name for i in items])
 
             embed.add_field(
-                name=f"⚔️ {character['name']}",
+                name=f"⚔️ {character.name}",
                 value=items_text,
                 inline=False
             )
 
-        self.save_data()
 
         embed.set_footer(text=f"Total: {total_gold} gp, {total_items} items distributed")
 
@@ -451,29 +440,21 @@ class LootCog(commands.Cog):
         description: Optional[str] = None
     ):
         """[GM] Skapar en treasure chest som spelare kan öppna."""
-        if "treasures" not in self.data:
-            self.data["treasures"] = {}
-
-        treasure_id = f"{interaction.guild.id}_{name.lower().replace(' ', '_')}"
-
-        if treasure_id in self.data["treasures"]:
+        if self.repo.get("treasures", str(interaction.guild.id), slugify(name)):
             await interaction.response.send_message(
                 f"❌ Treasure **{name}** finns redan!",
                 ephemeral=True
             )
             return
 
-        treasure = {
-            "name": name,
-            "gold": gold,
-            "items": [],
-            "description": description or "A mysterious treasure chest",
-            "opened_by": [],
-            "guild_id": str(interaction.guild.id)
-        }
+        treasure = Treasure(
+            name=name,
+            gold=gold,
+            description=description or "A mysterious treasure chest",
+            guild_id=str(interaction.guild.id)
+        )
 
-        self.data["treasures"][treasure_id] = treasure
-        self.save_data()
+        self.repo.put("treasures", str(interaction.guild.id), slugify(name), treasure)
 
         embed = discord.Embed(
             title=f"💎 Treasure Created: {name}",
@@ -497,38 +478,29 @@ class LootCog(commands.Cog):
         ac_bonus: Optional[int] = None
     ):
         """[GM] Lägger till ett item i en treasure chest."""
-        if "treasures" not in self.data:
-            self.data["treasures"] = {}
-
-        treasure_id = f"{interaction.guild.id}_{treasure_name.lower().replace(' ', '_')}"
+        treasure_id = slugify(treasure_name)
+        treasure = self.repo.get("treasures", str(interaction.guild.id), treasure_id)
 
-        if treasure_id not in self.data["treasures"]:
+        if not treasure:
             await interaction.response.send_message(
                 f"❌ Treasure **{treasure_name}** finns inte!",
                 ephemeral=True
             )
             return
 
-        treasure = self.data["treasures"][treasure_id]
+        item = Item.from_name(item_name, item_type, damage, ac_bonus)
 
-        item = {
-            "name": item_name,
-            "type": item_type,
-            "damage": damage,
-            "ac_bonus": ac_bonus
-        }
-
-        treasure["items"].append(item)
-        self.save_data()
+        treasure.items.append(item)
+        self.repo.put("treasures", str(interaction.guild.id), treasure_id, treasure)
 
         await interaction.response.send_message(
-            f"✅ **{item_name}** tillagt till treasure **{treasure['name']}**!"
+            f"✅ **{item_name}** tillagt till treasure **{treasure.name}**!"
         )
 
     @app_commands.command(name="opentreasure", description="Öppna en treasure chest")
     async def open_treasure(self, interaction: discord.Interaction, treasure_name: str):
         """Öppnar en treasure chest och får loot."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -537,45 +509,42 @@ class LootCog(commands.Cog):
             )
             return
 
-        if "treasures" not in self.data:
-            self.data["treasures"] = {}
+        treasure_id = slugify(treasure_name)
+        treasure = self.repo.get("treasures", str(interaction.guild.id), treasure_id)
 
-        treasure_id = f"{interaction.guild.id}_{treasure_name.lower().replace(' ', '_')}"
-
-        if treasure_id not in self.data["treasures"]:
+        if not treasure:
             await interaction.response.send_message(
                 f"❌ Treasure **{treasure_name}** finns inte!",
                 ephemeral=True
             )
             return
 
-        treasure = self.data["treasures"][treasure_id]
-
-        if str(interaction.user.id) in treasure["opened_by"]:
+        if str(interaction.user.id) in treasure.opened_by:
             await interaction.response.send_message(
-                f"❌ Du har redan öppnat **{treasure['name']}**!",
+                f"❌ Du har redan öppnat **{treasure.name}**!",
                 ephemeral=True
             )
             return
 
         # Give loot
-        character["gold"] += treasure["gold"]
-        character["inventory"].extend(treasure["items"])
-        treasure["opened_by"].append(str(interaction.user.id))
+        character.gold += treasure.gold
+        for item in treasure.items:
+            character.inventory.add(item)
+        treasure.opened_by.append(str(interaction.user.id))
 
-        self.save_character(str(interaction.user.id), str(interaction.guild.id), character)
-        self.save_data()
+        self.repo.save_character(str(interaction.user.id), str(interaction.guild.id), character)
+        self.repo.put("treasures", str(interaction.guild.id), treasure_id, treasure)
 
         embed = discord.Embed(
-            title=f"💎 {character['name']} öppnar {treasure['name']}!",
-            description=treasure["description"],
+            title=f"💎 {character.name} öppnar {treasure.name}!",
+            description=treasure.description,
             color=discord.Color.gold()
         )
 
-        embed.add_field(name="💰 Gold", value=f"+{treasure['gold']} gp", inline=False)
+        embed.add_field(name="💰 Gold", value=f"+{treasure.gold} gp", inline=False)
 
-        if treasure["items"]:
-            items_text = "\n".join([f"• **{item['name']}**" for item in treasure["items"]])
+        if treasure.items:
+            items_text = "\n".join([f"• **{item.name}**" for item in treasure.items])
             embed.add_field(name="🎒 Items", value=items_text, inline=False)
 
         await interaction.response.send_message(embed=embed)
@@ -2,40 +2,15 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Optional, Literal
-from config import DATA_FILE
-import json
-import os
+from models import Objective, Quest
+from repository import TransactionConflict, slugify
 
 class QuestsCog(commands.Cog):
     """Cog för quest tracking och hantering."""
 
     def __init__(self, bot):
         self.bot = bot
-        self.data_file = DATA_FILE
-        self.data = self.load_data()
-
-    def load_data(self):
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # Initiera quests om det inte finns
-                if 'quests' not in data:
-                    data['quests'] = {}
-                return data
-        return {"characters": {}, "quests": {}}
-
-    def save_data(self):
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
-
-    def get_character(self, user_id: str, guild_id: str):
-        key = f"{guild_id}_{user_id}"
-        return self.data["characters"].get(key)
-
-    def save_character(self, user_id: str, guild_id: str, character: dict):
-        key = f"{guild_id}_{user_id}"
-        self.data["characters"][key] = character
-        self.save_data()
+        self.repo = bot.repo
 
     @app_commands.command(name="createquest", description="[GM] Skapa en quest")
     @app_commands.checks.has_permissions(administrator=True)
@@ -49,30 +24,23 @@ class QuestsCog(commands.Cog):
         difficulty: Literal["Easy", "Medium", "Hard", "Deadly"] = "Medium"
     ):
         """[GM] Skapar en quest."""
-        quest_id = f"{interaction.guild.id}_{name.lower().replace(' ', '_')}"
-
-        if quest_id in self.data["quests"]:
+        if self.repo.get("quests", str(interaction.guild.id), slugify(name)):
             await interaction.response.send_message(
                 f"❌ Quest **{name}** finns redan!",
                 ephemeral=True
             )
             return
 
-        quest = {
-            "name": name,
-            "description": description,
-            "xp_reward": xp_reward,
-            "gold_reward": gold_reward,
-            "difficulty": difficulty,
-            "status": "Available",
-            "guild_id": str(interaction.guild.id),
-            "accepted_by": [],
-            "completed_by": [],
-            "objectives": []
-        }
+        quest = Quest(
+            name=name,
+            description=description,
+            xp_reward=xp_reward,
+            gold_reward=gold_reward,
+            difficulty=difficulty,
+            guild_id=str(interaction.guild.id)
+        )
 
-        self.data["quests"][quest_id] = quest
-        self.save_data()
+        self.repo.put("quests", str(interaction.guild.id), slugify(name), quest)
 
         difficulty_colors = {
             "Easy": discord.Color.green(),
@@ -102,21 +70,21 @@ class QuestsCog(commands.Cog):
         objective: str
     ):
         """[GM] Lägger till ett objective till en quest."""
-        quest_id = f"{interaction.guild.id}_{quest_name.lower().replace(' ', '_')}"
+        quest_id = slugify(quest_name)
+        quest = self.repo.get("quests", str(interaction.guild.id), quest_id)
 
-        if quest_id not in self.data["quests"]:
+        if not quest:
             await interaction.response.send_message(
                 f"❌ Quest **{quest_name}** finns inte!",
                 ephemeral=True
             )
             return
 
-        quest = self.data["quests"][quest_id]
-        quest["objectives"].append({"text": objective, "completed": False})
-        self.save_data()
+        quest.objectives.append(Objective(text=objective))
+        self.repo.put("quests", str(interaction.guild.id), quest_id, quest)
 
         await interaction.response.send_message(
-            f"✅ Objective tillagt till **{quest['name']}**: {objective}"
+            f"✅ Objective tillagt till **{quest.name}**: {objective}"
         )
 
     @app_commands.command(name="quests", description="Visa alla tillgängliga quests")
@@ -126,14 +94,19 @@ class QuestsCog(commands.Cog):
         filter: Literal["All", "Available", "Active", "Completed"] = "All"
     ):
         """Visar alla quests."""
-        guild_quests = {k: v for k, v in self.data["quests"].items()
-                       if v.get("guild_id") == str(interaction.guild.id)}
-
-        if not guild_quests:
+        guild_id = str(interaction.guild.id)
+        if filter == "Active":
+            guild_quests = self.repo.user_quests(guild_id, str(interaction.user.id), "accepted")
+        elif filter == "Completed":
+            guild_quests = self.repo.user_quests(guild_id, str(interaction.user.id), "completed")
+        else:
+            guild_quests = self.repo.scan("quests", guild_id)
+
+        if not guild_quests and filter in ("All", "Available"):
             await interaction.response.send_message("❌ Inga quests finns i denna server!", ephemeral=True)
             return
 
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         embed = discord.Embed(
             title=f"📜 Quests - {interaction.guild.name}",
@@ -150,34 +123,34 @@ class QuestsCog(commands.Cog):
 
         for quest_id, quest in guild_quests.items():
             # Filter logic
-            if filter == "Available" and quest["status"] != "Available":
+            if filter == "Available" and quest.status != "Available":
                 continue
-            if filter == "Active" and (not character or str(interaction.user.id) not in quest["accepted_by"]):
+            if filter == "Active" and (not character or str(interaction.user.id) not in quest.accepted_by):
                 continue
-            if filter == "Completed" and (not character or str(interaction.user.id) not in quest["completed_by"]):
+            if filter == "Completed" and (not character or str(interaction.user.id) not in quest.completed_by):
                 continue
 
             # Build quest info
-            quest_info = f"*{quest['description']}*\n\n"
-            quest_info += f"{difficulty_icons.get(quest['difficulty'], '⚪')} **{quest['difficulty']}** | "
-            quest_info += f"⭐ {quest['xp_reward']} XP | 💰 {quest['gold_reward']} gp\n"
+            quest_info = f"*{quest.description}*\n\n"
+            quest_info += f"{difficulty_icons.get(quest.difficulty, '⚪')} **{quest.difficulty}** | "
+            quest_info += f"⭐ {quest.xp_reward} XP | 💰 {quest.gold_reward} gp\n"
 
             # Objectives
-            if quest["objectives"]:
+            if quest.objectives:
                 quest_info += "\n**Objectives:**\n"
-                for i, obj in enumerate(quest["objectives"], 1):
-                    status = "✅" if obj["completed"] else "⬜"
-                    quest_info += f"{status} {i}. {obj['text']}\n"
+                for i, obj in enumerate(quest.objectives, 1):
+                    status = "✅" if obj.completed else "⬜"
+                    quest_info += f"{status} {i}. {obj.text}\n"
 
             # Status
-            if character and str(interaction.user.id) in quest["completed_by"]:
+            if character and str(interaction.user.id) in quest.completed_by:
                 quest_info += "\n🏆 **COMPLETED**"
-            elif character and str(interaction.user.id) in quest["accepted_by"]:
+            elif character and str(interaction.user.id) in quest.accepted_by:
                 quest_info += "\n📌 **ACTIVE**"
             else:
-                quest_info += f"\n📜 **{quest['status']}**"
+                quest_info += f"\n📜 **{quest.status}**"
 
-            embed.add_field(name=f"📜 {quest['name']}", value=quest_info, inline=False)
+            embed.add_field(name=f"📜 {quest.name}", value=quest_info, inline=False)
 
         if len(embed.fields) == 0:
             embed.description = f"Inga quests matchar filter: {filter}"
@@ -187,7 +160,7 @@ class QuestsCog(commands.Cog):
     @app_commands.command(name="acceptquest", description="Acceptera en quest")
     async def accept_quest(self, interaction: discord.Interaction, quest_name: str):
         """Accepterar en quest."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -196,43 +169,42 @@ class QuestsCog(commands.Cog):
             )
             return
 
-        quest_id = f"{interaction.guild.id}_{quest_name.lower().replace(' ', '_')}"
+        quest_id = slugify(quest_name)
+        quest = self.repo.get("quests", str(interaction.guild.id), quest_id)
 
-        if quest_id not in self.data["quests"]:
+        if not quest:
             await interaction.response.send_message(
                 f"❌ Quest **{quest_name}** finns inte!",
                 ephemeral=True
             )
             return
 
-        quest = self.data["quests"][quest_id]
-
-        if str(interaction.user.id) in quest["accepted_by"]:
+        if str(interaction.user.id) in quest.accepted_by:
             await interaction.response.send_message(
-                f"❌ Du har redan accepterat **{quest['name']}**!",
+                f"❌ Du har redan accepterat **{quest.name}**!",
                 ephemeral=True
             )
             return
 
-        if str(interaction.user.id) in quest["completed_by"]:
+        if str(interaction.user.id) in quest.completed_by:
             await interaction.response.send_message(
-                f"❌ Du har redan slutfört **{quest['name']}**!",
+                f"❌ Du har redan slutfört **{quest.name}**!",
                 ephemeral=True
             )
             return
 
-        quest["accepted_by"].append(str(interaction.user.id))
-        self.save_data()
+        quest.accepted_by.append(str(interaction.user.id))
+        self.repo.put("quests", str(interaction.guild.id), quest_id, quest)
 
         embed = discord.Embed(
             title=f"📜 Quest Accepterad!",
-            description=f"**{character['name']}** har accepterat **{quest['name']}**",
+            description=f"**{character.name}** har accepterat **{quest.name}**",
             color=discord.Color.green()
         )
-        embed.add_field(name="📝 Description", value=quest['description'], inline=False)
+        embed.add_field(name="📝 Description", value=quest.description, inline=False)
 
-        if quest["objectives"]:
-            obj_text = "\n".join([f"{i}. {obj['text']}" for i, obj in enumerate(quest["objectives"], 1)])
+        if quest.objectives:
+            obj_text = "\n".join([f"{i}. {obj.text}" for i, obj in enumerate(quest.objectives, 1)])
             embed.add_field(name="🎯 Objectives", value=obj_text, inline=False)
 
         await interaction.response.send_message(embed=embed)
@@ -246,29 +218,28 @@ class QuestsCog(commands.Cog):
         objective_number: int
     ):
         """[GM] Markerar ett objective som slutfört."""
-        quest_id = f"{interaction.guild.id}_{quest_name.lower().replace(' ', '_')}"
+        quest_id = slugify(quest_name)
+        quest = self.repo.get("quests", str(interaction.guild.id), quest_id)
 
-        if quest_id not in self.data["quests"]:
+        if not quest:
             await interaction.response.send_message(
                 f"❌ Quest **{quest_name}** finns inte!",
                 ephemeral=True
             )
             return
 
-        quest = self.data["quests"][quest_id]
-
-        if objective_number < 1 or objective_number > len(quest["objectives"]):
+        if objective_number < 1 or objective_number > len(quest.objectives):
             await interaction.response.send_message(
-                f"❌ Objective {objective_number} finns inte! Quest har {len(quest['objectives'])} objectives.",
+                f"❌ Objective {objective_number} finns inte! Quest har {len(quest.objectives)} objectives.",
                 ephemeral=True
             )
             return
 
-        quest["objectives"][objective_number - 1]["completed"] = True
-        self.save_data()
+        quest.objectives[objective_number - 1].completed = True
+        self.repo.put("quests", str(interaction.guild.id), quest_id, quest)
 
         await interaction.response.send_message(
-            f"✅ Objective {objective_number} slutfört för **{quest['name']}**!"
+            f"✅ Objective {objective_number} slutfört för **{quest.name}**!"
         )
 
     @app_commands.command(name="completequest", description="[GM] Markera en quest som slutförd för en spelare")
@@ -280,60 +251,61 @@ class QuestsCog(commands.Cog):
         player: discord.Member
     ):
         """[GM] Markerar en quest som slutförd och ger rewards."""
-        character = self.get_character(str(player.id), str(interaction.guild.id))
+        quest_id = slugify(quest_name)
 
-        if not character:
-            await interaction.response.send_message(
-                f"❌ {player.display_name} har ingen karaktär!",
-                ephemeral=True
-            )
-            return
+        def complete(tx):
+            character = tx.get_character(str(player.id))
 
-        quest_id = f"{interaction.guild.id}_{quest_name.lower().replace(' ', '_')}"
+            if not character:
+                return f"❌ {player.display_name} har ingen karaktär!", None
 
-        if quest_id not in self.data["quests"]:
-            await interaction.response.send_message(
-                f"❌ Quest **{quest_name}** finns inte!",
-                ephemeral=True
-            )
-            return
+            quest = tx.get("quests", quest_id)
 
-        quest = self.data["quests"][quest_id]
+            if not quest:
+                return f"❌ Quest **{quest_name}** finns inte!", None
 
-        if str(player.id) in quest["completed_by"]:
-            await interaction.response.send_message(
-                f"❌ {player.display_name} har redan slutfört **{quest['name']}**!",
-                ephemeral=True
-            )
-            return
+            if str(player.id) in quest.completed_by:
+                return f"❌ {player.display_name} har redan slutfört **{quest.name}**!", None
 
-        # Mark as completed
-        if str(player.id) not in quest["completed_by"]:
-            quest["completed_by"].append(str(player.id))
-        if str(player.id) in quest["accepted_by"]:
-            quest["accepted_by"].remove(str(player.id))
+            # Mark as completed
+            quest.completed_by.append(str(player.id))
+            if str(player.id) in quest.accepted_by:
+                quest.accepted_by.remove(str(player.id))
 
-        # Give rewards
-        character["xp"] += quest["xp_reward"]
-        character["gold"] += quest["gold_reward"]
+            # Give rewards
+            character.xp += quest.xp_reward
+            character.gold += quest.gold_reward
 
-        self.save_character(str(player.id), str(interaction.guild.id), character)
-        self.save_data()
+            tx.save_character(str(player.id), character)
+            tx.put("quests", quest_id, quest)
+            return None, (character, quest)
+
+        try:
+            error, result = await self.repo.transaction(str(interaction.guild.id), complete)
+        except TransactionConflict:
+            await interaction.response.send_message("❌ Questen ändrades samtidigt, försök igen!", ephemeral=True)
+            return
+
+        if error:
+            await interaction.response.send_message(error, ephemeral=True)
+            return
+
+        character, quest = result
 
         embed = discord.Embed(
             title=f"🏆 Quest Slutförd!",
-            description=f"**{character['name']}** slutförde **{quest['name']}**!",
+            description=f"**{character.name}** slutförde **{quest.name}**!",
             color=discord.Color.gold()
         )
-        embed.add_field(name="⭐ XP Earned", value=f"+{quest['xp_reward']} XP (Totalt: {character['xp']})", inline=True)
-        embed.add_field(name="💰 Gold Earned", value=f"+{quest['gold_reward']} gp (Totalt: {character['gold']})", inline=True)
+        embed.add_field(name="⭐ XP Earned", value=f"+{quest.xp_reward} XP (Totalt: {character.xp})", inline=True)
+        embed.add_field(name="💰 Gold Earned", value=f"+{quest.gold_reward} gp (Totalt: {character.gold})", inline=True)
 
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="abandonquest", description="Avbryt en quest")
     async def abandon_quest(self, interaction: discord.Interaction, quest_name: str):
         """Avbryter en quest."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -342,54 +314,52 @@ class QuestsCog(commands.Cog):
             )
             return
 
-        quest_id = f"{interaction.guild.id}_{quest_name.lower().replace(' ', '_')}"
+        quest_id = slugify(quest_name)
+        quest = self.repo.get("quests", str(interaction.guild.id), quest_id)
 
-        if quest_id not in self.data["quests"]:
+        if not quest:
             await interaction.response.send_message(
                 f"❌ Quest **{quest_name}** finns inte!",
                 ephemeral=True
             )
             return
 
-        quest = self.data["quests"][quest_id]
-
-        if str(interaction.user.id) not in quest["accepted_by"]:
+        if str(interaction.user.id) not in quest.accepted_by:
             await interaction.response.send_message(
-                f"❌ Du har inte accepterat **{quest['name']}**!",
+                f"❌ Du har inte accepterat **{quest.name}**!",
                 ephemeral=True
             )
             return
 
-        quest["accepted_by"].remove(str(interaction.user.id))
-        self.save_data()
+        quest.accepted_by.remove(str(interaction.user.id))
+        self.repo.put("quests", str(interaction.guild.id), quest_id, quest)
 
         await interaction.response.send_message(
-            f"✅ Du har avbrutit **{quest['name']}**"
+            f"✅ Du har avbrutit **{quest.name}**"
         )
 
     @app_commands.command(name="deletequest", description="[GM] Ta bort en quest")
     @app_commands.checks.has_permissions(administrator=True)
     async def delete_quest(self, interaction: discord.Interaction, quest_name: str):
         """[GM] Tar bort en quest."""
-        quest_id = f"{interaction.guild.id}_{quest_name.lower().replace(' ', '_')}"
+        quest_id = slugify(quest_name)
+        quest = self.repo.get("quests", str(interaction.guild.id), quest_id)
 
-        if quest_id not in self.data["quests"]:
+        if not quest:
             await interaction.response.send_message(
                 f"❌ Quest **{quest_name}** finns inte!",
                 ephemeral=True
             )
             return
 
-        quest_name_actual = self.data["quests"][quest_id]["name"]
-        del self.data["quests"][quest_id]
-        self.save_data()
+        self.repo.delete("quests", str(interaction.guild.id), quest_id)
 
-        await interaction.response.send_message(f"✅ Quest **{quest_name_actual}** har tagits bort!")
+        await interaction.response.send_message(f"✅ Quest **{quest.name}** har tagits bort!")
 
     @app_commands.command(name="myquests", description="Visa dina aktiva quests")
     async def my_quests(self, interaction: discord.Interaction):
         """Visar dina aktiva quests."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -398,10 +368,9 @@ class QuestsCog(commands.Cog):
             )
             return
 
-        active_quests = []
-        for quest_id, quest in self.data["quests"].items():
-            if str(interaction.user.id) in quest["accepted_by"]:
-                active_quests.append(quest)
+        active_quests = list(
+            self.repo.user_quests(str(interaction.guild.id), str(interaction.user.id)).values()
+        )
 
         if not active_quests:
             await interaction.response.send_message(
@@ -411,29 +380,29 @@ class QuestsCog(commands.Cog):
             return
 
         embed = discord.Embed(
-            title=f"📜 {character['name']}'s Active Quests",
+            title=f"📜 {character.name}'s Active Quests",
             description=f"Du har {len(active_quests)} aktiva quest(s)",
             color=discord.Color.blue()
         )
 
         for quest in active_quests:
-            quest_info = f"*{quest['description']}*\n\n"
+            quest_info = f"*{quest.description}*\n\n"
 
             # Progress
-            if quest["objectives"]:
-                completed = sum(1 for obj in quest["objectives"] if obj["completed"])
-                total = len(quest["objectives"])
+            if quest.objectives:
+                completed = sum(1 for obj in quest.objectives if obj.completed)
+                total = len(quest.objectives)
                 progress = "█" * completed + "░" * (total - completed)
                 quest_info += f"**Progress:** {progress} ({completed}/{total})\n"
 
                 quest_info += "\n**Objectives:**\n"
-                for i, obj in enumerate(quest["objectives"], 1):
-                    status = "✅" if obj["completed"] else "⬜"
-                    quest_info += f"{status} {i}. {obj['text']}\n"
+                for i, obj in enumerate(quest.objectives, 1):
+                    status = "✅" if obj.completed else "⬜"
+                    quest_info += f"{status} {i}. {obj.text}\n"
 
-            quest_info += f"\n**Rewards:** ⭐ {quest['xp_reward']} XP | 💰 {quest['gold_reward']} gp"
+            quest_info += f"\n**Rewards:** ⭐ {quest.xp_reward} XP | 💰 {quest.gold_reward} gp"
 
-            embed.add_field(name=f"📜 {quest['name']}", value=quest_info, inline=False)
+            embed.add_field(name=f"📜 {quest.name}", value=quest_info, inline=False)
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -1,71 +1,27 @@
+import random
 import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Optional, Literal
-from config import DATA_FILE
-import json
-import os
+from catalog import find_id, shop_items
+from models import Item
+from repository import TransactionConflict
+
+def roll_healing(effect: str):
+    """Slår en healing-effekt som "2d4+2". None om den inte går att tolka."""
+    try:
+        dice_part, bonus = effect.split('+') if '+' in effect else (effect, '0')
+        num_dice, die_size = dice_part.split('d')
+        return sum(random.randint(1, int(die_size)) for _ in range(int(num_dice))) + int(bonus)
+    except ValueError:
+        return None
 
 class ShopCog(commands.Cog):
     """Cog för item shop och handel."""
 
     def __init__(self, bot):
         self.bot = bot
-        self.data_file = DATA_FILE
-        self.data = self.load_data()
-
-        # Standard shop items
-        self.shop_items = {
-            # Weapons
-            "Dagger": {"type": "Weapon", "price": 2, "damage": "1d4", "description": "En liten kniv"},
-            "Shortsword": {"type": "Weapon", "price": 10, "damage": "1d6", "description": "Ett kort svärd"},
-            "Longsword": {"type": "Weapon", "price": 15, "damage": "1d8", "description": "Ett långt svärd"},
-            "Greatsword": {"type": "Weapon", "price": 50, "damage": "2d6", "description": "Ett massivt tvåhandssvärd"},
-            "Battleaxe": {"type": "Weapon", "price": 10, "damage": "1d8", "description": "En stridsyxa"},
-            "Mace": {"type": "Weapon", "price": 5, "damage": "1d6", "description": "En klubba"},
-            "Spear": {"type": "Weapon", "price": 1, "damage": "1d6", "description": "Ett spjut"},
-            "Crossbow": {"type": "Weapon", "price": 25, "damage": "1d8", "description": "En armborst"},
-            "Longbow": {"type": "Weapon", "price": 50, "damage": "1d8", "description": "En långbåge"},
-
-            # Armor
-            "Leather Armor": {"type": "Armor", "price": 10, "ac_bonus": 1, "description": "Lätt läderrustning"},
-            "Chainmail": {"type": "Armor", "price": 75, "ac_bonus": 6, "description": "Ringbrynja"},
-            "Plate Armor": {"type": "Armor", "price": 1500, "ac_bonus": 8, "description": "Full platrustning"},
-            "Shield": {"type": "Armor", "price": 10, "ac_bonus": 2, "description": "En träsköld"},
-
-            # Consumables
-            "Healing Potion": {"type": "Consumable", "price": 50, "effect": "2d4+2", "description": "Återställer 2d4+2 HP"},
-            "Greater Healing Potion": {"type": "Consumable", "price": 150, "effect": "4d4+4", "description": "Återställer 4d4+4 HP"},
-            "Potion of Strength": {"type": "Consumable", "price": 100, "effect": "+2 STR", "description": "Ger +2 STR i 1 timme"},
-            "Antidote": {"type": "Consumable", "price": 50, "effect": "Remove Poison", "description": "Tar bort poisoned condition"},
-            "Rations (10 days)": {"type": "Consumable", "price": 5, "description": "Mat för 10 dagar"},
-
-            # Misc
-            "Rope (50 ft)": {"type": "Misc", "price": 1, "description": "50 fot rep"},
-            "Torch (10)": {"type": "Misc", "price": 1, "description": "10 facklor"},
-            "Backpack": {"type": "Misc", "price": 2, "description": "En ryggsäck"},
-            "Bedroll": {"type": "Misc", "price": 1, "description": "En sovsäck"},
-            "Lockpicks": {"type": "Misc", "price": 25, "description": "Verktyg för att öppna lås"},
-        }
-
-    def load_data(self):
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"characters": {}}
-
-    def save_data(self):
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
-
-    def get_character(self, user_id: str, guild_id: str):
-        key = f"{guild_id}_{user_id}"
-        return self.data["characters"].get(key)
-
-    def save_character(self, user_id: str, guild_id: str, character: dict):
-        key = f"{guild_id}_{user_id}"
-        self.data["characters"][key] = character
-        self.save_data()
+        self.repo = bot.repo
 
     @app_commands.command(name="shop", description="Visa shop med alla tillgängliga items")
     async def show_shop(self, interaction: discord.Interaction, category: Optional[Literal["Weapon", "Armor", "Consumable", "Misc"]] = None):
@@ -80,12 +36,12 @@ class ShopCog(commands.Cog):
         categories = [category] if category else ["Weapon", "Armor", "Consumable", "Misc"]
 
         for cat in categories:
-            items_in_cat = {name: item for name, item in self.shop_items.items() if item["type"] == cat}
+            items_in_cat = [item for item in shop_items().values() if item["type"] == cat]
 
             if items_in_cat:
                 items_text = ""
-                for name, item in sorted(items_in_cat.items(), key=lambda x: x[1]["price"]):
-                    items_text += f"**{name}** - {item['price']}gp"
+                for item in sorted(items_in_cat, key=lambda x: x["price"]):
+                    items_text += f"**{item['name']}** - {item['price']}gp"
                     if item.get('damage'):
                         items_text += f" ({item['damage']})"
                     elif item.get('ac_bonus'):
@@ -102,7 +58,7 @@ class ShopCog(commands.Cog):
     @app_commands.command(name="buy", description="Köp ett item från shoppen")
     async def buy_item(self, interaction: discord.Interaction, item_name: str, quantity: int = 1):
         """Köper ett item från shoppen."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -112,13 +68,8 @@ class ShopCog(commands.Cog):
             return
 
         # Hitta item (case insensitive)
-        item_data = None
-        actual_name = None
-        for name, data in self.shop_items.items():
-            if name.lower() == item_name.lower():
-                item_data = data
-                actual_name = name
-                break
+        item_id = find_id(item_name)
+        item_data = shop_items().get(item_id)
 
         if not item_data:
             await interaction.response.send_message(
@@ -131,44 +82,37 @@ class ShopCog(commands.Cog):
             await interaction.response.send_message("❌ Quantity måste vara minst 1!", ephemeral=True)
             return
 
+        actual_name = item_data["name"]
         total_cost = item_data["price"] * quantity
 
-        if character["gold"] < total_cost:
+        if character.gold < total_cost:
             await interaction.response.send_message(
-                f"❌ Du har inte råd! **{actual_name}** kostar {total_cost}gp (x{quantity}), du har {character['gold']}gp.",
+                f"❌ Du har inte råd! **{actual_name}** kostar {total_cost}gp (x{quantity}), du har {character.gold}gp.",
                 ephemeral=True
             )
             return
 
         # Köp item
-        character["gold"] -= total_cost
+        character.gold -= total_cost
 
-        for _ in range(quantity):
-            item = {
-                "name": actual_name,
-                "type": item_data["type"],
-                "damage": item_data.get("damage"),
-                "ac_bonus": item_data.get("ac_bonus"),
-                "effect": item_data.get("effect")
-            }
-            character["inventory"].append(item)
+        character.inventory.add(Item.from_catalog(item_id), quantity)
 
-        self.save_character(str(interaction.user.id), str(interaction.guild.id), character)
+        self.repo.save_character(str(interaction.user.id), str(interaction.guild.id), character)
 
         embed = discord.Embed(
             title="🛍️ Köp Genomfört!",
-            description=f"**{character['name']}** köpte **{actual_name}** x{quantity}",
+            description=f"**{character.name}** köpte **{actual_name}** x{quantity}",
             color=discord.Color.green()
         )
         embed.add_field(name="💰 Kostnad", value=f"{total_cost}gp", inline=True)
-        embed.add_field(name="💰 Kvar", value=f"{character['gold']}gp", inline=True)
+        embed.add_field(name="💰 Kvar", value=f"{character.gold}gp", inline=True)
 
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="sell", description="Sälj ett item från din inventory")
     async def sell_item(self, interaction: discord.Interaction, item_name: str):
         """Säljer ett item från inventory."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -178,11 +122,7 @@ class ShopCog(commands.Cog):
             return
 
         # Hitta item i inventory
-        item_to_sell = None
-        for item in character["inventory"]:
-            if item["name"].lower() == item_name.lower():
-                item_to_sell = item
-                break
+        item_to_sell = character.inventory.find(item_name)
 
         if not item_to_sell:
             await interaction.response.send_message(
@@ -192,29 +132,29 @@ class ShopCog(commands.Cog):
             return
 
         # Beräkna sell price (50% av original price)
-        original_price = self.shop_items.get(item_to_sell["name"], {}).get("price", 1)
+        original_price = item_to_sell.price or 1
         sell_price = original_price // 2
 
         # Sälj item
-        character["inventory"].remove(item_to_sell)
-        character["gold"] += sell_price
+        character.inventory.remove(item_to_sell)
+        character.gold += sell_price
 
-        self.save_character(str(interaction.user.id), str(interaction.guild.id), character)
+        self.repo.save_character(str(interaction.user.id), str(interaction.guild.id), character)
 
         embed = discord.Embed(
             title="💰 Försäljning Genomförd!",
-            description=f"**{character['name']}** sålde **{item_to_sell['name']}**",
+            description=f"**{character.name}** sålde **{item_to_sell.name}**",
             color=discord.Color.blue()
         )
         embed.add_field(name="💰 Fick", value=f"{sell_price}gp", inline=True)
-        embed.add_field(name="💰 Totalt", value=f"{character['gold']}gp", inline=True)
+        embed.add_field(name="💰 Totalt", value=f"{character.gold}gp", inline=True)
 
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="use", description="Använd ett consumable item")
     async def use_item(self, interaction: discord.Interaction, item_name: str, target: Optional[discord.Member] = None):
         """Använder ett consumable item."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -224,11 +164,7 @@ class ShopCog(commands.Cog):
             return
 
         # Hitta item i inventory
-        item_to_use = None
-        for item in character["inventory"]:
-            if item["name"].lower() == item_name.lower() and item["type"] == "Consumable":
-                item_to_use = item
-                break
+        item_to_use = character.inventory.find(item_name, "Consumable")
 
         if not item_to_use:
             await interaction.response.send_message(
@@ -238,7 +174,7 @@ class ShopCog(commands.Cog):
             return
 
         target_user = target or interaction.user
-        target_char = self.get_character(str(target_user.id), str(interaction.guild.id))
+        target_char = self.repo.get_character(str(target_user.id), str(interaction.guild.id))
 
         if not target_char:
             await interaction.response.send_message(
@@ -247,35 +183,40 @@ class ShopCog(commands.Cog):
             )
             return
 
+        effect = item_to_use.effect or "Unknown effect"
+        is_healing = "healing" in item_to_use.name.lower()
+
+        # Effekten tolkas innan något ändras – ett trasigt item förbrukas inte
+        if is_healing:
+            healing = roll_healing(effect)
+            if healing is None:
+                await interaction.response.send_message(
+                    f"❌ Kunde inte tolka effekten **{effect}** för {item_to_use.name}!",
+                    ephemeral=True
+                )
+                return
+
         # Använd item
-        character["inventory"].remove(item_to_use)
+        character.inventory.remove(item_to_use)
 
         embed = discord.Embed(
-            title=f"🧪 {character['name']} använder {item_to_use['name']}!",
+            title=f"🧪 {character.name} använder {item_to_use.name}!",
             color=discord.Color.purple()
         )
 
-        effect = item_to_use.get("effect", "Unknown effect")
-
         # Healing potion
-        if "healing" in item_to_use["name"].lower():
-            # Parse healing (t.ex. "2d4+2")
-            import random
-            dice_part, bonus = effect.split('+') if '+' in effect else (effect, '0')
-            num_dice, die_size = dice_part.split('d')
-            healing = sum(random.randint(1, int(die_size)) for _ in range(int(num_dice))) + int(bonus)
-
-            old_hp = target_char["hp"]
-            target_char["hp"] = min(target_char["hp"] + healing, target_char["max_hp"])
-            actual_healing = target_char["hp"] - old_hp
+        if is_healing:
+            old_hp = target_char.hp
+            target_char.hp = min(target_char.hp + healing, target_char.max_hp)
+            actual_healing = target_char.hp - old_hp
 
             embed.add_field(name="💚 Healing", value=f"+{actual_healing} HP", inline=True)
-            embed.add_field(name="❤️ HP", value=f"{old_hp} → {target_char['hp']}/{target_char['max_hp']}", inline=True)
+            embed.add_field(name="❤️ HP", value=f"{old_hp} → {target_char.hp}/{target_char.max_hp}", inline=True)
 
         # Antidote
-        elif "antidote" in item_to_use["name"].lower():
-            if "Poisoned" in target_char.get("conditions", []):
-                target_char["conditions"].remove("Poisoned")
+        elif "antidote" in item_to_use.name.lower():
+            if "Poisoned" in target_char.conditions:
+                target_char.conditions.remove("Poisoned")
                 embed.add_field(name="🎭 Effect", value="Poisoned condition borttagen!", inline=False)
             else:
                 embed.add_field(name="🎭 Effect", value="Ingen poisoned condition att ta bort", inline=False)
@@ -284,11 +225,11 @@ class ShopCog(commands.Cog):
         else:
             embed.add_field(name="✨ Effect", value=effect, inline=False)
 
-        embed.description = f"På **{target_char['name']}**"
+        embed.description = f"På **{target_char.name}**"
 
-        self.save_character(str(interaction.user.id), str(interaction.guild.id), character)
+        self.repo.save_character(str(interaction.user.id), str(interaction.guild.id), character)
         if target:
-            self.save_character(str(target_user.id), str(interaction.guild.id), target_char)
+            self.repo.save_character(str(target_user.id), str(interaction.guild.id), target_char)
 
         await interaction.response.send_message(embed=embed)
 
@@ -305,58 +246,61 @@ class ShopCog(commands.Cog):
             await interaction.response.send_message("❌ Du kan inte tradea med dig själv!", ephemeral=True)
             return
 
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
-        target_char = self.get_character(str(target.id), str(interaction.guild.id))
+        def trade(tx):
+            character = tx.get_character(str(interaction.user.id))
+            target_char = tx.get_character(str(target.id))
 
-        if not character:
-            await interaction.response.send_message("❌ Du har ingen karaktär!", ephemeral=True)
-            return
+            if not character:
+                return "❌ Du har ingen karaktär!", None
 
-        if not target_char:
-            await interaction.response.send_message(f"❌ {target.display_name} har ingen karaktär!", ephemeral=True)
-            return
+            if not target_char:
+                return f"❌ {target.display_name} har ingen karaktär!", None
 
-        # Trade item
-        item_to_trade = None
-        if item_name.lower() != "none":
-            for item in character["inventory"]:
-                if item["name"].lower() == item_name.lower():
-                    item_to_trade = item
-                    break
+            # Trade item
+            item_to_trade = None
+            if item_name.lower() != "none":
+                item_to_trade = character.inventory.find(item_name)
 
-            if not item_to_trade:
-                await interaction.response.send_message(
-                    f"❌ Du har inte **{item_name}** i din inventory!",
-                    ephemeral=True
-                )
-                return
+                if not item_to_trade:
+                    return f"❌ Du har inte **{item_name}** i din inventory!", None
 
-            character["inventory"].remove(item_to_trade)
-            target_char["inventory"].append(item_to_trade)
+            # Kolla guldet innan något flyttas
+            if gold_amount > 0 and character.gold < gold_amount:
+                return f"❌ Du har inte {gold_amount}gp! Du har {character.gold}gp.", None
 
-        # Trade gold
-        if gold_amount > 0:
-            if character["gold"] < gold_amount:
-                await interaction.response.send_message(
-                    f"❌ Du har inte {gold_amount}gp! Du har {character['gold']}gp.",
-                    ephemeral=True
-                )
-                return
+            if item_to_trade:
+                target_char.inventory.add(character.inventory.remove(item_to_trade))
+
+            # Trade gold
+            if gold_amount > 0:
+                character.gold -= gold_amount
+                target_char.gold += gold_amount
+
+            # Båda karaktärerna sparas tillsammans eller inte alls
+            tx.save_character(str(interaction.user.id), character)
+            tx.save_character(str(target.id), target_char)
+            return None, (character, target_char, item_to_trade)
 
-            character["gold"] -= gold_amount
-            target_char["gold"] += gold_amount
+        try:
+            error, result = await self.repo.transaction(str(interaction.guild.id), trade)
+        except TransactionConflict:
+            await interaction.response.send_message("❌ Traden krockade med andra ändringar, försök igen!", ephemeral=True)
+            return
+
+        if error:
+            await interaction.response.send_message(error, ephemeral=True)
+            return
 
-        self.save_character(str(interaction.user.id), str(interaction.guild.id), character)
-        self.save_character(str(target.id), str(interaction.guild.id), target_char)
+        character, target_char, item_to_trade = result
 
         embed = discord.Embed(
             title="🤝 Trade Genomförd!",
-            description=f"**{character['name']}** → **{target_char['name']}**",
+            description=f"**{character.name}** → **{target_char.name}**",
             color=discord.Color.blue()
         )
 
         if item_to_trade:
-            embed.add_field(name="📦 Item", value=item_to_trade["name"], inline=True)
+            embed.add_field(name="📦 Item", value=item_to_trade.name, inline=True)
         if gold_amount > 0:
             embed.add_field(name="💰 Guld", value=f"{gold_amount}gp", inline=True)
 
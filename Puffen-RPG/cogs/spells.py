@@ -2,36 +2,14 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Optional
-from config import DATA_FILE
-import json
-import os
+from models import Spell
 
 class SpellsCog(commands.Cog):
     """Cog för spell tracking och hantering."""
 
     def __init__(self, bot):
         self.bot = bot
-        self.data_file = DATA_FILE
-        self.data = self.load_data()
-
-    def load_data(self):
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"characters": {}}
-
-    def save_data(self):
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
-
-    def get_character(self, user_id: str, guild_id: str):
-        key = f"{guild_id}_{user_id}"
-        return self.data["characters"].get(key)
-
-    def save_character(self, user_id: str, guild_id: str, character: dict):
-        key = f"{guild_id}_{user_id}"
-        self.data["characters"][key] = character
-        self.save_data()
+        self.repo = bot.repo
 
     @app_commands.command(name="addspell", description="Lägg till en spell till din spellbook")
     async def add_spell(
@@ -43,7 +21,7 @@ class SpellsCog(commands.Cog):
         description: Optional[str] = None
     ):
         """Lägger till en spell till karaktärens spellbook."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -52,9 +30,9 @@ class SpellsCog(commands.Cog):
             )
             return
 
-        if character.get('spells') is None:
+        if character.spells is None:
             await interaction.response.send_message(
-                f"❌ Din karaktär (**{character['class']}**) är inte en spellcaster!",
+                f"❌ Din karaktär (**{character.char_class}**) är inte en spellcaster!",
                 ephemeral=True
             )
             return
@@ -66,15 +44,10 @@ class SpellsCog(commands.Cog):
             )
             return
 
-        spell = {
-            "name": name,
-            "level": level,
-            "damage": damage,
-            "description": description
-        }
+        spell = Spell(name=name, level=level, damage=damage, description=description)
 
-        character['spells'].append(spell)
-        self.save_character(str(interaction.user.id), str(interaction.guild.id), character)
+        character.spells.append(spell)
+        self.repo.save_character(str(interaction.user.id), str(interaction.guild.id), character)
 
         spell_type = "Cantrip" if level == 0 else f"Level {level} Spell"
         await interaction.response.send_message(
@@ -85,7 +58,7 @@ class SpellsCog(commands.Cog):
     async def show_spellbook(self, interaction: discord.Interaction, target: Optional[discord.Member] = None):
         """Visar karaktärens spellbook."""
         target_user = target or interaction.user
-        character = self.get_character(str(target_user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(target_user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -94,41 +67,41 @@ class SpellsCog(commands.Cog):
             )
             return
 
-        if character.get('spells') is None:
+        if character.spells is None:
             await interaction.response.send_message(
-                f"❌ {character['name']} (**{character['class']}**) är inte en spellcaster!",
+                f"❌ {character.name} (**{character.char_class}**) är inte en spellcaster!",
                 ephemeral=True
             )
             return
 
         embed = discord.Embed(
-            title=f"📖 {character['name']}'s Spellbook",
-            description=f"**{character['class']}** | Level {character['level']}",
+            title=f"📖 {character.name}'s Spellbook",
+            description=f"**{character.char_class}** | Level {character.level}",
             color=discord.Color.purple()
         )
 
-        if not character['spells']:
+        if not character.spells:
             embed.description += "\n\n*Spellbook är tom! Använd `/addspell` för att lägga till spells.*"
         else:
             # Gruppera spells efter level
             for spell_level in range(10):  # 0-9
-                spells_at_level = [s for s in character['spells'] if s['level'] == spell_level]
+                spells_at_level = [s for s in character.spells if s.level == spell_level]
                 if spells_at_level:
                     level_name = "Cantrips" if spell_level == 0 else f"Level {spell_level}"
                     spells_text = ""
                     for spell in spells_at_level:
-                        spells_text += f"• **{spell['name']}**"
-                        if spell.get('damage'):
-                            spells_text += f" ({spell['damage']})"
-                        if spell.get('description'):
-                            spells_text += f"\n  *{spell['description']}*"
+                        spells_text += f"• **{spell.name}**"
+                        if spell.damage:
+                            spells_text += f" ({spell.damage})"
+                        if spell.description:
+                            spells_text += f"\n  *{spell.description}*"
                         spells_text += "\n"
                     embed.add_field(name=f"✨ {level_name}", value=spells_text, inline=False)
 
         # Visa spell slots
-        if character.get('spell_slots'):
+        if character.spell_slots:
             slots_text = ""
-            for i, (total, used) in enumerate(zip(character['spell_slots'], character['spell_slots_used']), 1):
+            for i, (total, used) in enumerate(zip(character.spell_slots, character.spell_slots_used), 1):
                 if total > 0:
                     remaining = total - used
                     slots_text += f"**Lvl {i}**: {'○' * remaining}{'●' * used} ({remaining}/{total})\n"
@@ -145,7 +118,7 @@ class SpellsCog(commands.Cog):
         spell_level: Optional[int] = None
     ):
         """Castar en spell och använder en spell slot."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -154,17 +127,17 @@ class SpellsCog(commands.Cog):
             )
             return
 
-        if character.get('spells') is None:
+        if character.spells is None:
             await interaction.response.send_message(
-                f"❌ Din karaktär (**{character['class']}**) är inte en spellcaster!",
+                f"❌ Din karaktär (**{character.char_class}**) är inte en spellcaster!",
                 ephemeral=True
             )
             return
 
         # Hitta spellen
         spell = None
-        for s in character['spells']:
-            if s['name'].lower() == spell_name.lower():
+        for s in character.spells:
+            if s.name.lower() == spell_name.lower():
                 spell = s
                 break
 
@@ -176,25 +149,25 @@ class SpellsCog(commands.Cog):
             return
 
         # Om det är en cantrip, ingen spell slot behövs
-        if spell['level'] == 0:
+        if spell.level == 0:
             embed = discord.Embed(
-                title=f"✨ {character['name']} castar {spell['name']}!",
+                title=f"✨ {character.name} castar {spell.name}!",
                 description="**Cantrip** - ingen spell slot används",
                 color=discord.Color.blue()
             )
-            if spell.get('damage'):
-                embed.add_field(name="💥 Damage", value=spell['damage'], inline=True)
-            if spell.get('description'):
-                embed.add_field(name="📝 Description", value=spell['description'], inline=False)
+            if spell.damage:
+                embed.add_field(name="💥 Damage", value=spell.damage, inline=True)
+            if spell.description:
+                embed.add_field(name="📝 Description", value=spell.description, inline=False)
             await interaction.response.send_message(embed=embed)
             return
 
         # Bestäm vilken level att casta på
-        cast_level = spell_level if spell_level is not None else spell['level']
+        cast_level = spell_level if spell_level is not None else spell.level
 
-        if cast_level < spell['level']:
+        if cast_level < spell.level:
             await interaction.response.send_message(
-                f"❌ Kan inte casta en level {spell['level']} spell med en level {cast_level} spell slot!",
+                f"❌ Kan inte casta en level {spell.level} spell med en level {cast_level} spell slot!",
                 ephemeral=True
             )
             return
@@ -208,7 +181,7 @@ class SpellsCog(commands.Cog):
 
         # Kolla om det finns spell slots kvar
         slot_index = cast_level - 1
-        if character['spell_slots'][slot_index] <= character['spell_slots_used'][slot_index]:
+        if character.spell_slots[slot_index] <= character.spell_slots_used[slot_index]:
             await interaction.response.send_message(
                 f"❌ Inga level {cast_level} spell slots kvar!",
                 ephemeral=True
@@ -216,31 +189,31 @@ class SpellsCog(commands.Cog):
             return
 
         # Använd spell slot
-        character['spell_slots_used'][slot_index] += 1
-        self.save_character(str(interaction.user.id), str(interaction.guild.id), character)
+        character.spell_slots_used[slot_index] += 1
+        self.repo.save_character(str(interaction.user.id), str(interaction.guild.id), character)
 
         # Skapa embed
         embed = discord.Embed(
-            title=f"✨ {character['name']} castar {spell['name']}!",
+            title=f"✨ {character.name} castar {spell.name}!",
             description=f"**Level {cast_level} Spell Slot** används",
             color=discord.Color.purple()
         )
 
-        if spell.get('damage'):
-            embed.add_field(name="💥 Damage", value=spell['damage'], inline=True)
-        if spell.get('description'):
-            embed.add_field(name="📝 Description", value=spell['description'], inline=False)
+        if spell.damage:
+            embed.add_field(name="💥 Damage", value=spell.damage, inline=True)
+        if spell.description:
+            embed.add_field(name="📝 Description", value=spell.description, inline=False)
 
         # Visa återstående slots
-        remaining = character['spell_slots'][slot_index] - character['spell_slots_used'][slot_index]
-        embed.set_footer(text=f"Level {cast_level} slots: {remaining}/{character['spell_slots'][slot_index]} kvar")
+        remaining = character.spell_slots[slot_index] - character.spell_slots_used[slot_index]
+        embed.set_footer(text=f"Level {cast_level} slots: {remaining}/{character.spell_slots[slot_index]} kvar")
 
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="longrest", description="Ta en long rest och återställ HP och spell slots")
     async def long_rest(self, interaction: discord.Interaction):
         """Tar en long rest och återställer HP och spell slots."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -250,33 +223,33 @@ class SpellsCog(commands.Cog):
             return
 
         # Återställ HP
-        old_hp = character['hp']
-        character['hp'] = character['max_hp']
+        old_hp = character.hp
+        character.hp = character.max_hp
 
         # Ta bort temp HP
-        character['temp_hp'] = 0
+        character.temp_hp = 0
 
         # Återställ spell slots
-        if character.get('spell_slots_used'):
-            character['spell_slots_used'] = [0] * 9
+        if character.spell_slots_used:
+            character.spell_slots_used = [0] * 9
 
         # Ta bort vissa conditions (inte alla)
-        if character.get('conditions'):
+        if character.conditions:
             # Behåll bara permanenta conditions
             permanent_conditions = []
-            character['conditions'] = permanent_conditions
+            character.conditions = permanent_conditions
 
-        self.save_character(str(interaction.user.id), str(interaction.guild.id), character)
+        self.repo.save_character(str(interaction.user.id), str(interaction.guild.id), character)
 
         embed = discord.Embed(
-            title=f"😴 {character['name']} tar en Long Rest",
+            title=f"😴 {character.name} tar en Long Rest",
             description="8 timmars vila...",
             color=discord.Color.green()
         )
 
-        embed.add_field(name="❤️ HP Återställt", value=f"{old_hp} → {character['hp']}/{character['max_hp']}", inline=False)
+        embed.add_field(name="❤️ HP Återställt", value=f"{old_hp} → {character.hp}/{character.max_hp}", inline=False)
 
-        if character.get('spell_slots'):
+        if character.spell_slots:
             embed.add_field(name="✨ Spell Slots", value="Alla spell slots återställda!", inline=False)
 
         embed.add_field(name="🎭 Conditions", value="De flesta conditions borttagna", inline=False)
@@ -286,7 +259,7 @@ class SpellsCog(commands.Cog):
     @app_commands.command(name="shortrest", description="Ta en short rest och slå hit dice för healing")
     async def short_rest(self, interaction: discord.Interaction, hit_dice: int = 1):
         """Tar en short rest och använder hit dice för healing."""
-        character = self.get_character(str(interaction.user.id), str(interaction.guild.id))
+        character = self.repo.get_character(str(interaction.user.id), str(interaction.guild.id))
 
         if not character:
             await interaction.response.send_message(
@@ -303,7 +276,7 @@ class SpellsCog(commands.Cog):
             return
 
         # Slå hit dice (d6 för simplicitet, kan anpassas per class)
-        con_mod = (character['stats']['constitution'] - 10) // 2
+        con_mod = (character.stats['constitution'] - 10) // 2
         healing = 0
         rolls = []
 
@@ -312,14 +285,14 @@ class SpellsCog(commands.Cog):
             rolls.append(roll)
             healing += roll + con_mod
 
-        old_hp = character['hp']
-        character['hp'] = min(character['hp'] + healing, character['max_hp'])
-        actual_healing = character['hp'] - old_hp
+        old_hp = character.hp
+        character.hp = min(character.hp + healing, character.max_hp)
+        actual_healing = character.hp - old_hp
 
-        self.save_character(str(interaction.user.id), str(interaction.guild.id), character)
+        self.repo.save_character(str(interaction.user.id), str(interaction.guild.id), character)
 
         embed = discord.Embed(
-            title=f"☕ {character['name']} tar en Short Rest",
+            title=f"☕ {character.name} tar en Short Rest",
             description=f"Använder {hit_dice} hit dice",
             color=discord.Color.blue()
         )
@@ -332,7 +305,7 @@ class SpellsCog(commands.Cog):
         )
         embed.add_field(
             name="❤️ HP",
-            value=f"{old_hp} → {character['hp']}/{character['max_hp']} (+{actual_healing})",
+            value=f"{old_hp} → {character.hp}/{character.max_hp} (+{actual_healing})",
             inline=False
         )
 
@@ -17,10 +17,32 @@ PREFIX = '!'
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_FOLDER = os.path.join(BASE_DIR, "data")
 DATA_FILE = os.path.join(DATA_FOLDER, "dnd_data.json")
+DB_FILE = os.path.join(DATA_FOLDER, "dnd_data.db")
+# En JSON-fil per guild (json-backend); en gammal dnd_data.json delas upp automatiskt
+SHARD_FOLDER = os.path.join(DATA_FOLDER, "guilds")
+# Ändringar läggs i en journal per guild; skriv ny snapshot efter X journalrader
+JOURNAL_COMPACT_AFTER = 200
+
+# Lagring: "json" (dnd_data.json) eller "sqlite" (dnd_data.db, WAL)
+# Vid första start med sqlite importeras dnd_data.json automatiskt
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'json')
 
 # Skapa data folder om den inte finns
 os.makedirs(DATA_FOLDER, exist_ok=True)
 
+# Write-behind: spara samlat var X sekund, eller direkt efter Y ändringar
+SAVE_INTERVAL = 5
+SAVE_MAX_PENDING = 50
+
+# Guilds i minnet: max antal laddade, och släpp en guild efter X sekunder utan aktivitet
+GUILD_CACHE_SIZE = 100
+GUILD_IDLE_TIMEOUT = 600
+
+# Loggning: logs/bot.log roteras vid X MB, Y gamla filer sparas (gzippade om LOG_COMPRESS)
+LOG_MAX_MB = 5
+LOG_BACKUPS = 3
+LOG_COMPRESS = True
+
 # D&D 5e Conditions
 CONDITIONS = [
     "Blinded",
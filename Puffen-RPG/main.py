@@ -1,13 +1,30 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
 import asyncio
 import os
+import sys
+import time
 import logging
+from config import (
+    DATA_FOLDER, DATA_FILE, DB_FILE, SHARD_FOLDER, STORAGE_BACKEND, JOURNAL_COMPACT_AFTER,
+    SAVE_INTERVAL, SAVE_MAX_PENDING, GUILD_CACHE_SIZE, GUILD_IDLE_TIMEOUT,
+    LOG_MAX_MB, LOG_BACKUPS, LOG_COMPRESS
+)
+
+# Kod som delas med Puffen ligger i shared/ i repots rot
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.logqueue import queued, rotating_file, stop_listeners
+from shared.command_sync import force_requested, sync_if_changed
+from repository import RPGRepository
+from storage import create_backend
 
 # 📁 Basmapp för projektet
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 COGS_DIR = os.path.join(BASE_DIR, "cogs")
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
+# 🔁 Hash av senast synkade kommandoträd
+COMMAND_SYNC_FILE = os.path.join(DATA_FOLDER, "command_sync.json")
 
 # 📝 Skapa loggmapp om den saknas
 os.makedirs(LOGS_DIR, exist_ok=True)
@@ -18,12 +35,13 @@ TOKEN = os.getenv(f"{BOT_NAME.upper().replace('-', '_')}_TOKEN")
 if not TOKEN:
     raise RuntimeError(f"❌ TOKEN för {BOT_NAME} saknas i miljön")
 
-# 🔔 Loggning till fil
-logging.basicConfig(
-    filename=os.path.join(LOGS_DIR, "bot.log"),
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)-8s] %(message)s"
-)
+# 🔔 Loggning till fil – via en kö, så skrivning och rotation sker i en bakgrundstråd
+logging.getLogger().setLevel(logging.INFO)
+logging.getLogger().addHandler(queued(rotating_file(
+    os.path.join(LOGS_DIR, "bot.log"),
+    "%(asctime)s [%(levelname)-8s] %(message)s",
+    max_mb=LOG_MAX_MB, backups=LOG_BACKUPS, compress=LOG_COMPRESS
+)))
 logger = logging.getLogger(__name__)
 
 # ⚙️ Discord-intents
@@ -31,10 +49,34 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents, help_command=None)
+class RPGTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # 🗂️ Ladda guildens data i en tråd innan kommandot körs, så
+        # cogs synkrona läsningar aldrig läser från disk på event-loopen
+        if interaction.guild_id is not None:
+            await self.client.repo.load(str(interaction.guild_id))
+        return True
+
+class RPGBot(commands.Bot):
+    async def close(self):
+        # 💾 Spara osparad data innan nedstängning
+        await self.repo.close()
+        await super().close()
+
+bot = RPGBot(command_prefix="!", intents=intents, help_command=None, tree_cls=RPGTree)
+
+# 💾 Delat datalager – en enda kopia av datan för alla cogs
+bot.repo = RPGRepository(
+    create_backend(STORAGE_BACKEND, DATA_FILE, DB_FILE, SHARD_FOLDER, JOURNAL_COMPACT_AFTER),
+    flush_interval=SAVE_INTERVAL,
+    max_pending=SAVE_MAX_PENDING,
+    max_guilds=GUILD_CACHE_SIZE,
+    idle_timeout=GUILD_IDLE_TIMEOUT
+)
 
 @bot.event
 async def setup_hook():
+    bot.repo.start()
     logger.info("🔄 Laddar cogs...")
 
     # Ladda alla cogs från cogs-mappen
@@ -46,12 +88,14 @@ async def setup_hook():
             except Exception as e:
                 logger.error(f"❌ Kunde inte ladda {filename}: {e}")
 
-    # Synka slash commands
+    # Synka slash commands – bara om trädet ändrats sedan förra synken (eller --force-sync)
+    sync_started = time.perf_counter()
     try:
-        await bot.tree.sync()
-        logger.info("✅ Slash commands synkade!")
+        if await sync_if_changed(bot.tree, COMMAND_SYNC_FILE, force=force_requested()) is not None:
+            logger.info("✅ Slash commands synkade!")
     except Exception as e:
         logger.error(f"❌ Slash sync misslyckades: {e}")
+    logger.info(f"⏱️ Kommandosynk klar på {(time.perf_counter() - sync_started) * 1000:.0f} ms")
 
 @bot.event
 async def on_ready():
@@ -78,9 +122,25 @@ async def on_command_error(ctx, error):
 @bot.command(name="sync")
 @commands.is_owner()
 async def sync_commands(ctx):
-    await bot.tree.sync()
+    # Tvingad synk; hashen sparas så nästa start inte synkar i onödan
+    await sync_if_changed(bot.tree, COMMAND_SYNC_FILE, force=True)
     await ctx.send("✅ Slash commands synkade!")
 
+@bot.command(name="storage")
+@commands.is_owner()
+async def storage_stats(ctx):
+    stats = bot.repo.stats
+    await ctx.send(
+        f"💾 {stats['mutations']} ändringar, {stats['flushes']} skrivningar, "
+        f"{stats['coalesced']} sammanslagna\n"
+        f"⏱️ Loop: {stats['last_loop_ms']:.1f} ms (max {stats['max_loop_ms']:.1f}) | "
+        f"Skrivning: {stats['last_write_ms']:.1f} ms (max {stats['max_write_ms']:.1f})\n"
+        f"🗂️ {bot.repo.loaded_guilds} guilds i minnet, {stats['guild_loads']} laddningar "
+        f"({stats['loop_loads']} på loopen), "
+        f"{stats['evictions']} utkastade\n"
+        f"🔒 {stats['transactions']} transaktioner, {stats['conflicts']} krockar"
+    )
+
 def main():
     try:
         logger.info("🚀 Startar Puffen-RPG...")
@@ -89,6 +149,8 @@ def main():
         logger.error("❌ Ogiltig token! Kolla din miljövariabel")
     except Exception as e:
         logger.error(f"❌ Ett fel uppstod: {e}")
+    finally:
+        stop_listeners()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,354 @@
+# ============================================
+# FILE: models.py
+# ============================================
+from catalog import ITEMS, find_id
+
+
+class Model:
+    """Bas för datamodellerna.
+
+    Varje modell listar sina fält i ``__slots__`` (ingen ``__dict__`` per
+    objekt) och deras standardvärden i ``_defaults``. Vid serialisering
+    utelämnas fält som har sitt standardvärde, så t.ex. ett item utan
+    damage aldrig sparar ``"damage": null``.
+    """
+
+    __slots__ = ()
+    # fält -> standardvärde (listor och dicts kopieras per objekt)
+    _defaults = {}
+    # fält -> nyckel i JSON när de skiljer sig (t.ex. char_class -> "class")
+    _keys = {}
+    # fält -> modellklass för listor av modeller, eller en behållare
+    # med from_list()/to_list() (t.ex. Inventory)
+    _nested = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Förberäknad fältlista: (fält, JSON-nyckel, standardvärde, kopieras?, behållare)
+        cls._fields = tuple(
+            (
+                name, cls._keys.get(name, name), cls._defaults.get(name),
+                isinstance(cls._defaults.get(name), (list, dict)), _container(cls._nested.get(name))
+            )
+            for name in cls.__slots__
+        )
+
+    def __init__(self, **fields):
+        for name, _, default, mutable, nested in self._fields:
+            if name in fields:
+                value = fields.pop(name)
+            else:
+                value = default.copy() if mutable else default
+            if nested is not None and isinstance(value, list):
+                value = nested.from_list(value)
+            setattr(self, name, value)
+        if fields:
+            raise TypeError(f"{type(self).__name__} har inga fält: {', '.join(fields)}")
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        obj = cls.__new__(cls)
+        for name, key, default, mutable, nested in cls._fields:
+            value = data.get(key)
+            if value is None:
+                value = default.copy() if mutable else default
+            if nested is not None and value is not None:
+                value = nested.from_list(value)
+            setattr(obj, name, value)
+        return obj
+
+    def to_dict(self) -> dict:
+        data = {}
+        for name, key, default, _, nested in self._fields:
+            value = getattr(self, name)
+            if nested is not None and value is not None:
+                value = nested.to_list(value)
+            if value == default:
+                continue
+            data[key] = value
+        return data
+
+    def update_from(self, other):
+        """Tar över alla fält från ``other`` (samma modell) på plats."""
+        for name in self.__slots__:
+            setattr(self, name, getattr(other, name))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class _ModelList:
+    """Behållare för en vanlig lista av modeller."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def from_list(self, values):
+        return [v if isinstance(v, Model) else self.model.from_dict(v) for v in values]
+
+    @staticmethod
+    def to_list(values):
+        return [v.to_dict() for v in values]
+
+
+def _container(nested):
+    if isinstance(nested, type) and issubclass(nested, Model):
+        return _ModelList(nested)
+    return nested
+
+
+class Item(Model):
+    """Ett item, oftast en referens till katalogen (catalog.py).
+
+    Katalog-items sparas bara som id plus de fält som avviker från
+    katalogen; resten fylls i från katalogen när de laddas.
+    """
+    __slots__ = ("item_id", "name", "type", "damage", "ac_bonus", "effect", "quantity")
+    _defaults = {"type": "Misc", "quantity": 1}
+    _keys = {"item_id": "id"}
+    # Fält som kan komma från katalogen
+    _catalog_fields = ("name", "type", "damage", "ac_bonus", "effect")
+
+    @classmethod
+    def from_catalog(cls, item_id: str, **overrides):
+        """Skapar ett katalog-item; overrides som är None ignoreras."""
+        base = ITEMS[item_id]
+        fields = {name: base.get(name) for name in cls._catalog_fields}
+        fields.update({name: value for name, value in overrides.items() if value is not None})
+        return cls(item_id=item_id, **fields)
+
+    @classmethod
+    def from_name(cls, name: str, item_type: str = None, damage: str = None, ac_bonus: int = None):
+        """Ett katalog-item om namnet finns i katalogen, annars ett eget item."""
+        item_id = find_id(name)
+        if item_id:
+            return cls.from_catalog(item_id, type=item_type, damage=damage, ac_bonus=ac_bonus)
+        return cls(name=name, type=item_type or "Misc", damage=damage, ac_bonus=ac_bonus)
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        # Äldre items utan id kopplas till katalogen via namnet
+        item_id = data.get("id") or find_id(data.get("name") or "")
+        base = _catalog_values(item_id)
+        if base is None:
+            item = super().from_dict(data)
+            if item.name is None:
+                # Id:t finns inte längre i katalogen – ladda ändå, så att en
+                # borttagen katalogpost inte gör hela guilden oladdningsbar
+                item.name = _unknown_name(item_id)
+            return item
+        # Katalog-items är de flesta vid laddning, så fälten sätts direkt från
+        # katalogen och bara de nycklar som faktiskt sparats läggs ovanpå
+        obj = cls.__new__(cls)
+        obj.item_id = item_id
+        obj.name, obj.type, obj.damage, obj.ac_bonus, obj.effect = base
+        obj.quantity = 1
+        for key, value in data.items():
+            if value is not None and key in _ITEM_OVERRIDES:
+                setattr(obj, key, value)
+        return obj
+
+    def to_dict(self) -> dict:
+        base = ITEMS.get(self.item_id)
+        if base is None:
+            data = super().to_dict()
+            if data.get("name") == _unknown_name(self.item_id):
+                # Läggs id:t tillbaka i katalogen får itemet sitt namn igen
+                del data["name"]
+            return data
+        data = {"id": self.item_id}
+        for name in self._catalog_fields:
+            value = getattr(self, name)
+            if value != base.get(name):
+                data[name] = value
+        if self.quantity != 1:
+            data["quantity"] = self.quantity
+        return data
+
+    def key(self) -> tuple:
+        """Identitet för stackning: allt utom antalet."""
+        return (self.item_id, self.name, self.type, self.damage, self.ac_bonus, self.effect)
+
+    @property
+    def price(self):
+        """Katalogpriset, eller None om itemet inte säljs."""
+        return ITEMS.get(self.item_id, {}).get("price")
+
+
+def _unknown_name(item_id: str) -> str:
+    return f"Okänt item ({item_id})" if item_id else "Okänt item"
+
+
+# Nycklar i en sparad katalog-post som skriver över katalogen
+_ITEM_OVERRIDES = frozenset(Item._catalog_fields + ("quantity",))
+# {id: (name, type, damage, ac_bonus, effect)} – byggs första gången ett id laddas
+_CATALOG_VALUES = {}
+
+
+def _catalog_values(item_id: str):
+    values = _CATALOG_VALUES.get(item_id)
+    if values is None and item_id in ITEMS:
+        base = ITEMS[item_id]
+        values = tuple(base.get(name) for name in Item._catalog_fields)
+        if values[1] is None:
+            values = values[:1] + (Item._defaults["type"],) + values[2:]
+        _CATALOG_VALUES[item_id] = values
+    return values
+
+
+class Inventory:
+    """Items stackade per identitet, med ett namnindex.
+
+    Samma item lagras en gång med ett antal i stället för en post per
+    enhet. Gamla inventories med en post per enhet slås ihop vid laddning.
+    """
+
+    __slots__ = ("_stacks", "_by_name")
+
+    def __init__(self):
+        # {Item.key(): Item}, i den ordning de lades till
+        self._stacks = {}
+        # {namn i gemener: [Item, ...]}, byggs först när någon söker på namn –
+        # de flesta laddade karaktärer får aldrig sitt inventory genomsökt
+        self._by_name = None
+
+    @classmethod
+    def from_list(cls, values):
+        inventory = cls()
+        for value in values:
+            if isinstance(value, Item):
+                inventory.add(value)
+            else:
+                # Ett nyavkodat item delas inte med någon och kan bli stacken direkt
+                inventory._adopt(Item.from_dict(value))
+        return inventory
+
+    def to_list(self) -> list:
+        return [item.to_dict() for item in self._stacks.values()]
+
+    def add(self, item: Item, quantity: int = None):
+        """Lägger till ``quantity`` st (standard: item.quantity) av ett item."""
+        quantity = item.quantity if quantity is None else quantity
+        key = item.key()
+        stack = self._stacks.get(key)
+        if stack is None:
+            stack = Item.from_dict(item.to_dict())
+            stack.quantity = 0
+            self._stacks[key] = stack
+            if self._by_name is not None:
+                self._by_name.setdefault(item.name.lower(), []).append(stack)
+        stack.quantity += quantity
+        return stack
+
+    def _adopt(self, item: Item):
+        key = item.key()
+        stack = self._stacks.get(key)
+        if stack is None:
+            self._stacks[key] = item
+        else:
+            stack.quantity += item.quantity
+
+    def _names(self) -> dict:
+        if self._by_name is None:
+            self._by_name = {}
+            for stack in self._stacks.values():
+                self._by_name.setdefault(stack.name.lower(), []).append(stack)
+        return self._by_name
+
+    def find(self, name: str, item_type: str = None):
+        """Hittar en stack på namn (skiftlägesokänsligt), ev. av en viss typ."""
+        for stack in self._names().get(name.lower(), ()):
+            if item_type is None or stack.type == item_type:
+                return stack
+        return None
+
+    def remove(self, stack: Item, quantity: int = 1) -> Item:
+        """Tar bort ``quantity`` st från en stack och returnerar dem som ett nytt item."""
+        if quantity > stack.quantity:
+            raise ValueError(f"Bara {stack.quantity} st {stack.name} finns")
+        stack.quantity -= quantity
+        if stack.quantity == 0:
+            same_name = self._names()[stack.name.lower()]
+            del self._stacks[stack.key()]
+            same_name.remove(stack)
+            if not same_name:
+                del self._by_name[stack.name.lower()]
+        removed = Item.from_dict(stack.to_dict())
+        removed.quantity = quantity
+        return removed
+
+    def count(self) -> int:
+        """Totalt antal enheter."""
+        return sum(item.quantity for item in self._stacks.values())
+
+    def __iter__(self):
+        return iter(self._stacks.values())
+
+    def __len__(self):
+        return len(self._stacks)
+
+    def __eq__(self, other):
+        return isinstance(other, Inventory) and self.to_list() == other.to_list()
+
+
+class Spell(Model):
+    __slots__ = ("name", "level", "damage", "description")
+    _defaults = {"level": 0}
+
+
+class Character(Model):
+    __slots__ = (
+        "name", "char_class", "level", "xp", "stats", "hp", "max_hp", "temp_hp", "ac",
+        "proficiency", "inventory", "gold", "conditions", "spells", "spell_slots", "spell_slots_used"
+    )
+    _defaults = {
+        "char_class": "Fighter", "level": 1, "xp": 0, "stats": {}, "hp": 0, "max_hp": 0,
+        "temp_hp": 0, "ac": 10, "proficiency": 2, "inventory": [], "gold": 0, "conditions": []
+    }
+    _keys = {"char_class": "class"}
+    # spells är None för karaktärer som inte kan casta, [] för en tom spellbook
+    _nested = {"inventory": Inventory, "spells": Spell}
+
+
+class Objective(Model):
+    __slots__ = ("text", "completed")
+    _defaults = {"completed": False}
+
+
+class Quest(Model):
+    __slots__ = (
+        "name", "description", "xp_reward", "gold_reward", "difficulty", "status",
+        "guild_id", "accepted_by", "completed_by", "objectives"
+    )
+    _defaults = {
+        "xp_reward": 0, "gold_reward": 0, "difficulty": "Medium", "status": "Available",
+        "accepted_by": [], "completed_by": [], "objectives": []
+    }
+    _nested = {"objectives": Objective}
+
+
+class Monster(Model):
+    """Monster och NPCs (NPCs saknar attack_bonus och damage)."""
+    __slots__ = ("name", "hp", "max_hp", "ac", "attack_bonus", "damage", "description", "guild_id")
+    _defaults = {"hp": 0, "max_hp": 0, "ac": 10}
+
+
+class Treasure(Model):
+    __slots__ = ("name", "gold", "items", "description", "opened_by", "guild_id")
+    _defaults = {"gold": 0, "items": [], "opened_by": []}
+    _nested = {"items": Item}
+
+
+# Modellklass per samling i storage.COLLECTIONS
+MODELS = {
+    "characters": Character,
+    "quests": Quest,
+    "npcs": Monster,
+    "monsters": Monster,
+    "treasures": Treasure,
+}
@@ -0,0 +1,423 @@
+# ============================================
+# FILE: repository.py
+# ============================================
+import asyncio
+import inspect
+import logging
+import random
+import time
+from collections import OrderedDict
+
+from models import MODELS
+from storage import encode
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionConflict(Exception):
+    """En transaktion krockade med andra ändringar för många gånger."""
+
+
+class RPGRepository:
+    """Delat datalager för alla cogs.
+
+    Boten äger en enda instans (``bot.repo``) som håller den enda kopian av
+    datan i minnet och den enda skrivvägen till disk. Posterna hålls som
+    modeller (se models.py) och kodas till JSON först vid en flush.
+
+    Datan är uppdelad per guild. En guild laddas först när den används och
+    släpps ur minnet igen när den varit oanvänd i ``idle_timeout`` sekunder
+    eller när fler än ``max_guilds`` guilds är laddade (LRU). Laddningen
+    görs i en tråd via ``await load(guild_id)``, som boten kör innan varje
+    slash-kommando; de synkrona metoderna hittar då guilden i minnet.
+
+    Ändringar skrivs inte direkt utan markeras som smutsiga och sparas
+    samlat (write-behind) var ``flush_interval`` sekund, eller direkt när
+    ``max_pending`` ändringar har samlats.
+
+    Var datan hamnar bestäms av ``backend`` (se storage.py). Vid en flush
+    kodas bara de smutsiga posterna om på event-loopen; själva skrivningen
+    sker i en tråd så att heartbeats aldrig blockeras av disken.
+    """
+
+    def __init__(
+        self,
+        backend,
+        flush_interval: float = 5.0,
+        max_pending: int = 50,
+        max_guilds: int = 100,
+        idle_timeout: float = 600.0
+    ):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_guilds = max_guilds
+        self.idle_timeout = idle_timeout
+
+        # {guild_id: {collection: {key: record}}}, äldst använd först
+        self._guilds = OrderedDict()
+        self._last_used = {}
+        # Pågående laddningar i tråd: {guild_id: Future}
+        self._loading = {}
+
+        # 🔎 Index per guild: {guild_id: {(user_id, status): {quest_key}}}
+        # samt vilka (user_id, status) varje quest senast indexerades under
+        self._quest_index = {}
+        self._quest_members = {}
+
+        # 🔒 Versionsnummer per post: {guild_id: {(collection, key): version}}
+        # samt antal öppna transaktioner per guild (de släpps inte ur minnet)
+        self._versions = {}
+        self._open_transactions = {}
+
+        # Smutsiga poster som (guild_id, collection, key)
+        self._dirty = set()
+        self._pending = 0
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested = None
+        self._flush_task = None
+
+        # 📊 Statistik
+        self.stats = {
+            "mutations": 0, "flushes": 0, "coalesced": 0,
+            "last_loop_ms": 0.0, "max_loop_ms": 0.0,
+            "last_write_ms": 0.0, "max_write_ms": 0.0,
+            "guild_loads": 0, "evictions": 0, "loop_loads": 0,
+            "transactions": 0, "conflicts": 0,
+        }
+
+    # 🗂️ Guilds i minnet
+    def _guild(self, guild_id: str) -> dict:
+        guild = self._guilds.get(guild_id)
+        if guild is None:
+            # Nödväg: någon läste utan att först awaita load(), så disken
+            # läses på event-loopen. Det är en bugg hos anroparen.
+            logger.error(
+                f"❌ Guild {guild_id} laddades synkront på event-loopen – "
+                f"anropa 'await repo.load()' först"
+            )
+            self.stats["loop_loads"] += 1
+            guild = self._install(guild_id, self._decode(self.backend.load_guild(guild_id)))
+        else:
+            self._guilds.move_to_end(guild_id)
+        self._last_used[guild_id] = time.monotonic()
+        return guild
+
+    @staticmethod
+    def _decode(data: dict) -> dict:
+        return {
+            collection: {key: MODELS[collection].from_dict(record) for key, record in records.items()}
+            for collection, records in data.items()
+        }
+
+    def _install(self, guild_id: str, guild: dict) -> dict:
+        self._guilds[guild_id] = guild
+        self._quest_index[guild_id] = {}
+        self._quest_members[guild_id] = {}
+        self._versions[guild_id] = {}
+        for key, quest in guild["quests"].items():
+            self._index_quest(guild_id, key, quest)
+        self.stats["guild_loads"] += 1
+        return guild
+
+    async def load(self, guild_id: str):
+        """Ser till att guilden finns i minnet. Läsning och avkodning sker
+        i en tråd; samtidiga anrop för samma guild delar på en laddning."""
+        if guild_id in self._guilds:
+            self._guild(guild_id)
+            return
+        future = self._loading.get(guild_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(None, lambda: self._decode(self.backend.load_guild(guild_id)))
+            self._loading[guild_id] = future
+            try:
+                guild = await future
+            finally:
+                del self._loading[guild_id]
+            # Om någon hann ladda den på loopen under tiden gäller den versionen
+            if guild_id not in self._guilds:
+                self._install(guild_id, guild)
+        else:
+            await asyncio.shield(future)
+        self._guild(guild_id)
+
+    @property
+    def loaded_guilds(self) -> int:
+        return len(self._guilds)
+
+    def _evict(self):
+        """Släpper rena guilds som är oanvända eller över LRU-taket."""
+        dirty_guilds = {guild_id for guild_id, _, _ in self._dirty}
+        now = time.monotonic()
+        overflow = len(self._guilds) - self.max_guilds
+        for guild_id in list(self._guilds):
+            idle = now - self._last_used[guild_id] > self.idle_timeout
+            if not (idle or overflow > 0) or guild_id in dirty_guilds or self._open_transactions.get(guild_id):
+                continue
+            del self._guilds[guild_id]
+            del self._last_used[guild_id]
+            del self._quest_index[guild_id]
+            del self._quest_members[guild_id]
+            del self._versions[guild_id]
+            self.backend.evict_guild(guild_id)
+            self.stats["evictions"] += 1
+            overflow -= 1
+
+    # 🔎 Quest-index
+    def _unindex_quest(self, guild_id: str, key: str):
+        index = self._quest_index[guild_id]
+        for member in self._quest_members[guild_id].pop(key, ()):
+            keys = index[member]
+            keys.discard(key)
+            if not keys:
+                del index[member]
+
+    def _index_quest(self, guild_id: str, key: str, quest):
+        # Cogs ändrar questen på plats innan put(), så jämför mot
+        # det som senast indexerades i stället för mot den gamla posten
+        self._unindex_quest(guild_id, key)
+        members = [(user_id, "accepted") for user_id in quest.accepted_by]
+        members += [(user_id, "completed") for user_id in quest.completed_by]
+        index = self._quest_index[guild_id]
+        for member in members:
+            index.setdefault(member, set()).add(key)
+        self._quest_members[guild_id][key] = members
+
+    def user_quests(self, guild_id: str, user_id: str, status: str = "accepted") -> dict:
+        """Returnerar en användares quests med status ``accepted`` eller ``completed``."""
+        quests = self._guild(guild_id)["quests"]
+        keys = self._quest_index[guild_id].get((user_id, status), ())
+        return {key: quests[key] for key in sorted(keys)}
+
+    # 💾 Write-behind
+    def _mark_dirty(self, guild_id: str, collection: str, key: str):
+        self._dirty.add((guild_id, collection, key))
+        self._pending += 1
+        self.stats["mutations"] += 1
+        if self._pending >= self.max_pending and self._flush_requested:
+            self._flush_requested.set()
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty)
+
+    async def flush(self) -> bool:
+        """Sparar smutsiga poster till disk utan att blockera event-loopen."""
+        async with self._flush_lock:
+            if not self._dirty:
+                return False
+
+            # På loopen: koda bara om de smutsiga posterna
+            started = time.perf_counter()
+            dirty, pending = self._dirty, self._pending
+            self._dirty, self._pending = set(), 0
+            changes = {}
+            for guild_id, collection, key in dirty:
+                record = self._guilds[guild_id][collection].get(key)
+                changes[(guild_id, collection, key)] = None if record is None else encode(record.to_dict())
+            loop_ms = (time.perf_counter() - started) * 1000
+
+            # I tråd: låt backend skriva ändringarna
+            started = time.perf_counter()
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.backend.write, changes)
+            except Exception:
+                # Försök igen vid nästa flush
+                self._dirty |= dirty
+                self._pending += pending
+                raise
+            write_ms = (time.perf_counter() - started) * 1000
+
+            self.stats["flushes"] += 1
+            self.stats["coalesced"] += pending - 1
+            self.stats["last_loop_ms"] = loop_ms
+            self.stats["max_loop_ms"] = max(self.stats["max_loop_ms"], loop_ms)
+            self.stats["last_write_ms"] = write_ms
+            self.stats["max_write_ms"] = max(self.stats["max_write_ms"], write_ms)
+            logger.debug(
+                f"💾 Sparade {pending} ändringar ({len(dirty)} poster): "
+                f"{loop_ms:.1f} ms på loopen, {write_ms:.1f} ms skrivning"
+            )
+            return True
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+                async with self._flush_lock:
+                    self._evict()
+            except Exception as e:
+                logger.error(f"❌ Kunde inte spara data: {e}")
+
+    def start(self):
+        """Startar bakgrundsuppgiften som sparar smutsig data."""
+        if self._flush_task is None:
+            self._flush_requested = asyncio.Event()
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Stoppar bakgrundsuppgiften och tvingar fram en sista sparning."""
+        if self._flush_task is not None:
+            # Avbryt aldrig mitt i en pågående skrivning
+            async with self._flush_lock:
+                self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+        self.backend.close()
+        logger.info(
+            f"💾 Data sparad: {self.stats['mutations']} ändringar i {self.stats['flushes']} skrivningar "
+            f"({self.stats['coalesced']} sammanslagna)"
+        )
+
+    # 🔑 Generiska operationer
+    def get(self, collection: str, guild_id: str, key: str):
+        return self._guild(guild_id)[collection].get(key)
+
+    def put(self, collection: str, guild_id: str, key: str, record):
+        self._guild(guild_id)[collection][key] = record
+        if collection == "quests":
+            self._index_quest(guild_id, key, record)
+        self._bump(guild_id, collection, key)
+        self._mark_dirty(guild_id, collection, key)
+
+    def delete(self, collection: str, guild_id: str, key: str):
+        record = self._guild(guild_id)[collection].pop(key, None)
+        if record is not None:
+            if collection == "quests":
+                self._unindex_quest(guild_id, key)
+            self._bump(guild_id, collection, key)
+            self._mark_dirty(guild_id, collection, key)
+        return record
+
+    def scan(self, collection: str, guild_id: str) -> dict:
+        """Returnerar alla poster i en guild som {key: record}."""
+        return dict(self._guild(guild_id)[collection])
+
+    # 🔒 Transaktioner
+    def _bump(self, guild_id: str, collection: str, key: str):
+        versions = self._versions[guild_id]
+        versions[(collection, key)] = versions.get((collection, key), 0) + 1
+
+    def version(self, collection: str, guild_id: str, key: str) -> int:
+        self._guild(guild_id)
+        return self._versions[guild_id].get((collection, key), 0)
+
+    async def transaction(self, guild_id: str, work, retries: int = 10):
+        """Kör ``work(tx)`` som en transaktion och returnerar dess resultat.
+
+        ``work`` (vanlig eller async funktion) läser och skriver via ``tx``
+        och får kopior av posterna. Alla skrivningar görs samtidigt vid
+        commit, och bara om ingen av de lästa posterna har ändrats sedan dess;
+        annars körs ``work`` om, upp till ``retries`` gånger.
+
+        En krock kan bara uppstå om ``work`` gör ``await`` mellan läsning och
+        commit. Vid commit skrivs ändringarna in i de lagrade objekten, så
+        referenser som andra kommandon redan hämtat med get() visar
+        resultatet och kan sparas igen utan att skriva över det. En post som
+        transaktionen tagit bort ska däremot inte sparas via en gammal referens.
+        """
+        self._open_transactions[guild_id] = self._open_transactions.get(guild_id, 0) + 1
+        try:
+            for attempt in range(retries):
+                tx = Transaction(self, guild_id)
+                result = work(tx)
+                if inspect.isawaitable(result):
+                    result = await result
+                if tx.commit():
+                    self.stats["transactions"] += 1
+                    return result
+                self.stats["conflicts"] += 1
+                # Vänta lite (slumpat, växande) så att krockande ändringar hinner klart
+                await asyncio.sleep(random.uniform(0, 0.005 * 2 ** attempt))
+        finally:
+            self._open_transactions[guild_id] -= 1
+            if not self._open_transactions[guild_id]:
+                del self._open_transactions[guild_id]
+        raise TransactionConflict(f"Transaktionen i guild {guild_id} krockade {retries} gånger")
+
+    # ⚔️ Karaktärer
+    def get_character(self, user_id: str, guild_id: str):
+        return self.get("characters", guild_id, user_id)
+
+    def save_character(self, user_id: str, guild_id: str, character):
+        self.put("characters", guild_id, user_id, character)
+
+    def delete_character(self, user_id: str, guild_id: str):
+        return self.delete("characters", guild_id, user_id)
+
+
+class Transaction:
+    """En pågående transaktion, se ``RPGRepository.transaction``."""
+
+    _DELETED = object()
+
+    def __init__(self, repo: RPGRepository, guild_id: str):
+        self.repo = repo
+        self.guild_id = guild_id
+        # {(collection, key): version när posten först lästes}
+        self._read = {}
+        # {(collection, key): kopia som returnerats av get()}
+        self._copies = {}
+        # {(collection, key): record eller _DELETED}
+        self._writes = {}
+
+    def _track(self, collection: str, key: str):
+        if (collection, key) not in self._read:
+            self._read[(collection, key)] = self.repo.version(collection, self.guild_id, key)
+
+    def get(self, collection: str, key: str):
+        if (collection, key) in self._writes:
+            record = self._writes[(collection, key)]
+            return None if record is self._DELETED else record
+        if (collection, key) not in self._copies:
+            self._track(collection, key)
+            record = self.repo.get(collection, self.guild_id, key)
+            # Arbeta på en kopia så att en avbruten transaktion inte lämnar spår
+            self._copies[(collection, key)] = None if record is None else MODELS[collection].from_dict(record.to_dict())
+        return self._copies[(collection, key)]
+
+    def put(self, collection: str, key: str, record):
+        self._track(collection, key)
+        self._writes[(collection, key)] = record
+
+    def delete(self, collection: str, key: str):
+        self._track(collection, key)
+        self._writes[(collection, key)] = self._DELETED
+
+    def get_character(self, user_id: str):
+        return self.get("characters", user_id)
+
+    def save_character(self, user_id: str, character):
+        self.put("characters", user_id, character)
+
+    def commit(self) -> bool:
+        """Skriver alla ändringar på en gång; False om någon läst post har ändrats."""
+        for (collection, key), version in self._read.items():
+            if self.repo.version(collection, self.guild_id, key) != version:
+                return False
+        for (collection, key), record in self._writes.items():
+            if record is self._DELETED:
+                self.repo.delete(collection, self.guild_id, key)
+                continue
+            current = self.repo.get(collection, self.guild_id, key)
+            if current is not None and current is not record and type(current) is type(record):
+                # Ändra den lagrade posten på plats i stället för att byta ut den
+                current.update_from(record)
+                record = current
+            self.repo.put(collection, self.guild_id, key, record)
+        return True
+
+
+def slugify(name: str) -> str:
+    """Gör om ett namn till nyckeln som används för quests, NPCs m.m."""
+    return name.lower().replace(' ', '_')
@@ -0,0 +1,358 @@
+# ============================================
+# FILE: storage.py
+# ============================================
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Körs filen direkt (python storage.py) ligger repots rot inte på sökvägen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.atomic import write_json_atomic, write_text_atomic
+
+logger = logging.getLogger(__name__)
+
+# Samlingar och namnet på nyckelkolumnen efter guild_id
+COLLECTIONS = {
+    "characters": "user_id",
+    "quests": "name",
+    "npcs": "name",
+    "monsters": "name",
+    "treasures": "name",
+}
+
+
+def encode(record) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+def split_key(full_key: str):
+    """Delar ``{guild_id}_{key}`` i (guild_id, key)."""
+    guild_id, _, key = full_key.partition("_")
+    return guild_id, key
+
+
+def snapshot_path(shard_dir: str, guild_id: str) -> str:
+    return os.path.join(shard_dir, f"{guild_id}.json")
+
+
+def journal_path(shard_dir: str, guild_id: str) -> str:
+    return os.path.join(shard_dir, f"{guild_id}.jsonl")
+
+
+def read_shard(shard_dir: str, guild_id: str, until: int = None):
+    """Läser en guilds snapshot och spelar upp journalen ovanpå.
+
+    Med ``until`` (unix-tid) spelas bara ändringar fram till den tidpunkten
+    upp. Äldre ändringar än snapshoten finns inte kvar, så ett ``until``
+    före senaste kompakteringen ger ``ValueError``.
+    Returnerar (data, antal journalrader).
+    """
+    data = {}
+    path = snapshot_path(shard_dir, guild_id)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # Äldre snapshots saknar tidsstämpel – filens mtime är närmaste svar
+        compacted_at = data.pop("_compacted_at", None) or int(os.path.getmtime(path))
+        if until is not None and until < compacted_at:
+            raise ValueError(
+                f"Guild {guild_id} kompakterades {compacted_at}; "
+                f"tillståndet vid {until} finns inte kvar"
+            )
+    for collection in COLLECTIONS:
+        data.setdefault(collection, {})
+
+    replayed = 0
+    if os.path.exists(journal_path(shard_dir, guild_id)):
+        with open(journal_path(shard_dir, guild_id), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Avbruten sista rad efter en krasch
+                    logger.warning(f"⚠️ Hoppar över trasig journalrad för guild {guild_id}")
+                    continue
+                replayed += 1
+                if until is not None and entry["ts"] > until:
+                    continue
+                if entry["v"] is None:
+                    data[entry["c"]].pop(entry["k"], None)
+                else:
+                    data[entry["c"]][entry["k"]] = entry["v"]
+    return data, replayed
+
+
+class JsonBackend:
+    """En snapshot-fil och en journal per guild i ``guilds/``.
+
+    Varje ändring läggs till sist i ``<guild_id>.jsonl`` som en rad
+    (JSON Lines), så kostnaden per kommando beror inte på hur mycket data
+    guilden har. När journalen blivit ``compact_after`` rader lång skrivs
+    en ny snapshot ``<guild_id>.json`` och journalen töms. Vid laddning
+    läses snapshoten och journalen spelas upp ovanpå.
+
+    Varje post i en laddad guild hålls som färdig JSON-text så att en
+    kompaktering inte behöver koda om något.
+
+    Laddning och skrivning sker i executor-trådar; ett lås håller dem isär.
+    """
+
+    def __init__(self, shard_dir: str, legacy_file: str = None, compact_after: int = 200):
+        self.shard_dir = shard_dir
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        os.makedirs(shard_dir, exist_ok=True)
+        # {guild_id: {collection: {key: json-text}}} för laddade guilds
+        self._encoded = {}
+        # {guild_id: antal rader i journalen}
+        self._journal_lines = {}
+        # Guilds vars journal slutar med en avbruten rad; kompakteras vid nästa skrivning
+        self._torn = set()
+        if legacy_file and os.path.exists(legacy_file):
+            self._split_legacy(legacy_file)
+
+    def _path(self, guild_id: str) -> str:
+        return snapshot_path(self.shard_dir, guild_id)
+
+    def _journal(self, guild_id: str) -> str:
+        return journal_path(self.shard_dir, guild_id)
+
+    def _split_legacy(self, legacy_file: str):
+        """Delar upp en gammal dnd_data.json i en fil per guild (en gång)."""
+        with open(legacy_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        shards = {}
+        for collection in COLLECTIONS:
+            for full_key, record in data.get(collection, {}).items():
+                guild_id, key = split_key(full_key)
+                shards.setdefault(guild_id, {c: {} for c in COLLECTIONS})[collection][key] = encode(record)
+        for guild_id, encoded in shards.items():
+            if not os.path.exists(self._path(guild_id)):
+                write_text_atomic(self._path(guild_id), self._render(encoded))
+        os.replace(legacy_file, legacy_file + ".migrated")
+        logger.info(f"📦 Delade upp {legacy_file} i {len(shards)} guild-filer")
+
+    def load_guild(self, guild_id: str) -> dict:
+        with self._lock:
+            data, replayed = read_shard(self.shard_dir, guild_id)
+            self._encoded[guild_id] = {
+                collection: {k: encode(v) for k, v in records.items()}
+                for collection, records in data.items()
+            }
+            self._journal_lines[guild_id] = replayed
+            if not self._journal_intact(guild_id):
+                # Nya rader får inte hamna efter en avbruten rad, men laddningen
+                # kan ske på loopen – kompakteringen görs av nästa skrivning
+                self._torn.add(guild_id)
+            return data
+
+    def _journal_intact(self, guild_id: str) -> bool:
+        path = self._journal(guild_id)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return True
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def evict_guild(self, guild_id: str):
+        with self._lock:
+            self._encoded.pop(guild_id, None)
+            self._journal_lines.pop(guild_id, None)
+            self._torn.discard(guild_id)
+
+    def write(self, changes: dict):
+        """Skriver ändringar {(guild_id, collection, key): json-text eller None}."""
+        with self._lock:
+            self._write(changes)
+
+    def _write(self, changes: dict):
+        for guild_id in self._torn & {guild_id for guild_id, _, _ in changes}:
+            self.compact(guild_id)
+
+        lines = {}
+        ts = int(time.time())
+        for (guild_id, collection, key), text in changes.items():
+            records = self._encoded[guild_id][collection]
+            if text is None:
+                records.pop(key, None)
+            else:
+                records[key] = text
+            lines.setdefault(guild_id, []).append(
+                f'{{"ts":{ts},"c":{json.dumps(collection)},'
+                f'"k":{json.dumps(key, ensure_ascii=False)},"v":{text or "null"}}}\n'
+            )
+
+        for guild_id, guild_lines in lines.items():
+            with open(self._journal(guild_id), 'a', encoding='utf-8') as f:
+                f.writelines(guild_lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_lines[guild_id] += len(guild_lines)
+            if self._journal_lines[guild_id] >= self.compact_after:
+                self.compact(guild_id)
+
+    def compact(self, guild_id: str):
+        """Skriver en ny snapshot och tömmer journalen.
+
+        Kraschar vi mellan stegen spelas journalen bara upp igen ovanpå den
+        nya snapshoten, vilket ger samma resultat.
+        """
+        with self._lock:
+            write_text_atomic(self._path(guild_id), self._render(self._encoded[guild_id]))
+            with open(self._journal(guild_id), 'w', encoding='utf-8') as f:
+                os.fsync(f.fileno())
+            self._journal_lines[guild_id] = 0
+            self._torn.discard(guild_id)
+        logger.debug(f"🗜️ Kompakterade guild {guild_id}")
+
+    @staticmethod
+    def _render(encoded: dict) -> str:
+        # Tidsstämpeln säger hur långt bak restore kan gå
+        sections = [f'  "_compacted_at": {int(time.time())}']
+        for collection, records in encoded.items():
+            lines = [f"    {json.dumps(key, ensure_ascii=False)}: {text}" for key, text in records.items()]
+            body = "{\n" + ",\n".join(lines) + "\n  }" if lines else "{}"
+            sections.append(f"  {json.dumps(collection)}: {body}")
+        return "{\n" + ",\n".join(sections) + "\n}\n"
+
+    def close(self):
+        # Börja nästa start från en färsk snapshot
+        with self._lock:
+            for guild_id, count in list(self._journal_lines.items()):
+                if count or guild_id in self._torn:
+                    self.compact(guild_id)
+
+
+class SqliteBackend:
+    """SQLite i WAL-läge med en tabell per samling.
+
+    Tabellerna nycklas på (guild_id, user_id) respektive (guild_id, name) och
+    en skrivning uppdaterar bara de rader som faktiskt har ändrats.
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        # Laddning och skrivning sker i executor-trådar och delar anslutningen,
+        # så låset ser till att bara en tråd använder den åt gången
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            for collection, key_column in COLLECTIONS.items():
+                self.conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {collection} ("
+                    f"guild_id TEXT NOT NULL, {key_column} TEXT NOT NULL, data TEXT NOT NULL, "
+                    f"PRIMARY KEY (guild_id, {key_column}))"
+                )
+
+    def is_empty(self) -> bool:
+        return not any(
+            self.conn.execute(f"SELECT 1 FROM {collection} LIMIT 1").fetchone()
+            for collection in COLLECTIONS
+        )
+
+    def load_guild(self, guild_id: str) -> dict:
+        data = {}
+        with self._lock:
+            for collection, key_column in COLLECTIONS.items():
+                rows = self.conn.execute(
+                    f"SELECT {key_column}, data FROM {collection} WHERE guild_id = ?", (guild_id,)
+                ).fetchall()
+                data[collection] = {key: json.loads(text) for key, text in rows}
+        return data
+
+    def evict_guild(self, guild_id: str):
+        pass
+
+    def write(self, changes: dict):
+        """Skriver ändringar {(guild_id, collection, key): json-text eller None} i en transaktion."""
+        with self._lock, self.conn:
+            for (guild_id, collection, key), text in changes.items():
+                key_column = COLLECTIONS[collection]
+                if text is None:
+                    self.conn.execute(
+                        f"DELETE FROM {collection} WHERE guild_id = ? AND {key_column} = ?",
+                        (guild_id, key)
+                    )
+                else:
+                    self.conn.execute(
+                        f"INSERT OR REPLACE INTO {collection} (guild_id, {key_column}, data) VALUES (?, ?, ?)",
+                        (guild_id, key, text)
+                    )
+
+    def close(self):
+        self.conn.close()
+
+
+def _legacy_records(data_file: str, shard_dir: str):
+    """Läser alla poster från guild-filerna, eller från en gammal dnd_data.json."""
+    guild_ids = set()
+    if os.path.isdir(shard_dir):
+        guild_ids = {f.rsplit(".", 1)[0] for f in os.listdir(shard_dir) if f.endswith((".json", ".jsonl"))}
+    if guild_ids:
+        for guild_id in guild_ids:
+            data, _ = read_shard(shard_dir, guild_id)
+            for collection, records in data.items():
+                for key, record in records.items():
+                    yield guild_id, collection, key, record
+    elif os.path.exists(data_file):
+        with open(data_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for collection in COLLECTIONS:
+            for full_key, record in data.get(collection, {}).items():
+                guild_id, key = split_key(full_key)
+                yield guild_id, collection, key, record
+
+
+def import_json(data_file: str, shard_dir: str, db_file: str) -> int:
+    """Engångsimport av JSON-datan till SQLite. Returnerar antal poster."""
+    changes = {
+        (guild_id, collection, key): encode(record)
+        for guild_id, collection, key, record in _legacy_records(data_file, shard_dir)
+    }
+    backend = SqliteBackend(db_file)
+    try:
+        backend.write(changes)
+    finally:
+        backend.close()
+    return len(changes)
+
+
+def create_backend(kind: str, data_file: str, db_file: str, shard_dir: str, compact_after: int = 200):
+    """Skapar backend enligt config (``"json"`` eller ``"sqlite"``)."""
+    if kind == "sqlite":
+        backend = SqliteBackend(db_file)
+        if backend.is_empty():
+            backend.close()
+            count = import_json(data_file, shard_dir, db_file)
+            if count:
+                logger.info(f"📦 Importerade {count} JSON-poster till {db_file}")
+            backend = SqliteBackend(db_file)
+        return backend
+    if kind == "json":
+        return JsonBackend(shard_dir, legacy_file=data_file, compact_after=compact_after)
+    raise ValueError(f"Okänd storage backend: {kind}")
+
+
+if __name__ == "__main__":
+    from config import DATA_FILE, DB_FILE, SHARD_FOLDER
+    if len(sys.argv) == 5 and sys.argv[1] == "restore":
+        # python storage.py restore <guild_id> <unix-tid> <ut.json>
+        # Återskapar en guild som den såg ut vid en tidpunkt sedan senaste kompakteringen
+        _, _, guild_id, until, out_file = sys.argv
+        try:
+            data, _ = read_shard(SHARD_FOLDER, guild_id, until=int(until))
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        write_json_atomic(out_file, data)
+        print(f"✅ Guild {guild_id} vid {until} sparad till {out_file}")
+    else:
+        # python storage.py [dnd_data.db]
+        target = sys.argv[1] if len(sys.argv) > 1 else DB_FILE
+        print(f"✅ Importerade {import_json(DATA_FILE, SHARD_FOLDER, target)} poster till {target}")
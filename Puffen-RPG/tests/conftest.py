@@ -0,0 +1,11 @@
+# ============================================
+# FILE: tests/conftest.py
+# ============================================
+# Testerna importerar modulerna som main.py gör (storage, repository ...)
+# och shared/ från repots rot
+import os
+import sys
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, os.path.dirname(BOT_DIR))
@@ -0,0 +1,84 @@
+# ============================================
+# FILE: tests/test_guild_loading.py
+# ============================================
+import asyncio
+import logging
+import threading
+
+from models import Character
+from repository import RPGRepository
+from storage import JsonBackend, SqliteBackend
+
+
+class RecordingBackend:
+    """Omsluter en backend och noterar vilken tråd som laddar."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.load_threads = []
+
+    def load_guild(self, guild_id):
+        self.load_threads.append(threading.get_ident())
+        return self.backend.load_guild(guild_id)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+def _seeded_json(tmp_path):
+    async def main():
+        repo = RPGRepository(JsonBackend(str(tmp_path / "guilds")))
+        await repo.load("g")
+        repo.save_character("1", "g", Character(name="Puffen", gold=7))
+        await repo.close()
+
+    asyncio.run(main())
+
+
+def test_load_runs_in_executor_and_is_shared(tmp_path):
+    _seeded_json(tmp_path)
+
+    async def main():
+        backend = RecordingBackend(JsonBackend(str(tmp_path / "guilds")))
+        repo = RPGRepository(backend)
+        await asyncio.gather(*(repo.load("g") for _ in range(10)))
+        assert backend.load_threads and threading.get_ident() not in backend.load_threads
+        assert len(backend.load_threads) == 1
+        assert repo.get_character("1", "g").gold == 7
+        assert repo.stats["loop_loads"] == 0
+        # Redan laddad: ingen ny läsning
+        await repo.load("g")
+        assert len(backend.load_threads) == 1
+
+    asyncio.run(main())
+
+
+def test_read_without_load_is_logged_as_error(tmp_path, caplog):
+    _seeded_json(tmp_path)
+    repo = RPGRepository(JsonBackend(str(tmp_path / "guilds")))
+    with caplog.at_level(logging.ERROR, logger="repository"):
+        assert repo.get_character("1", "g").gold == 7
+    assert repo.stats["loop_loads"] == 1
+    assert any("event-loopen" in record.message for record in caplog.records)
+
+
+def test_sqlite_load_and_write_from_threads(tmp_path):
+    """Laddningar och skrivningar från flera trådar på samma anslutning."""
+    async def main():
+        repo = RPGRepository(SqliteBackend(str(tmp_path / "rpg.db")))
+        for guild in range(20):
+            await repo.load(str(guild))
+            for user in range(10):
+                repo.save_character(str(user), str(guild), Character(name=f"{guild}-{user}"))
+
+        flush = asyncio.create_task(repo.flush())
+        await asyncio.gather(*(repo.load(str(g)) for g in range(20, 60)))
+        await flush
+        await repo.close()
+
+        reopened = RPGRepository(SqliteBackend(str(tmp_path / "rpg.db")))
+        await reopened.load("19")
+        assert reopened.get_character("9", "19").name == "19-9"
+        reopened.backend.close()
+
+    asyncio.run(main())
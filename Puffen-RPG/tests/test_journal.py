@@ -0,0 +1,85 @@
+# ============================================
+# FILE: tests/test_journal.py
+# ============================================
+import json
+import os
+
+import pytest
+
+from storage import JsonBackend, encode, journal_path, read_shard, snapshot_path
+
+GUILD = "1"
+
+
+def character(gold: int) -> str:
+    return encode({"name": "Puff", "gold": gold})
+
+
+def test_journal_replays_on_top_of_snapshot(tmp_path):
+    backend = JsonBackend(str(tmp_path), compact_after=3)
+    backend.load_guild(GUILD)
+    backend.write({(GUILD, "characters", "a"): character(1)})
+    backend.write({(GUILD, "characters", "b"): character(2)})
+    # Tredje raden kompakterar, den fjärde hamnar i en ny journal
+    backend.write({(GUILD, "characters", "a"): character(3)})
+    backend.write({(GUILD, "characters", "b"): None})
+
+    with open(journal_path(str(tmp_path), GUILD), encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+    data, replayed = read_shard(str(tmp_path), GUILD)
+    assert replayed == 1
+    assert data["characters"] == {"a": {"name": "Puff", "gold": 3}}
+
+
+def test_torn_journal_is_compacted_by_next_write(tmp_path):
+    backend = JsonBackend(str(tmp_path))
+    backend.load_guild(GUILD)
+    backend.write({(GUILD, "characters", "a"): character(1)})
+    with open(journal_path(str(tmp_path), GUILD), "a", encoding="utf-8") as f:
+        f.write('{"ts":1,"c":"characters","k":"a","v":{"go')
+
+    # Laddningen skriver ingenting – den kan ske på event-loopen
+    fresh = JsonBackend(str(tmp_path))
+    assert fresh.load_guild(GUILD)["characters"]["a"]["gold"] == 1
+    assert not os.path.exists(snapshot_path(str(tmp_path), GUILD))
+
+    fresh.write({(GUILD, "characters", "b"): character(2)})
+    with open(journal_path(str(tmp_path), GUILD), encoding="utf-8") as f:
+        lines = f.readlines()
+    assert len(lines) == 1 and json.loads(lines[0])["k"] == "b"
+    data, _ = read_shard(str(tmp_path), GUILD)
+    assert {k: v["gold"] for k, v in data["characters"].items()} == {"a": 1, "b": 2}
+
+
+def test_restore_before_snapshot_is_refused(tmp_path):
+    backend = JsonBackend(str(tmp_path))
+    backend.load_guild(GUILD)
+    backend.write({(GUILD, "characters", "a"): character(1)})
+    backend.compact(GUILD)
+    compacted_at = read_snapshot_time(tmp_path)
+
+    with pytest.raises(ValueError):
+        read_shard(str(tmp_path), GUILD, until=compacted_at - 1)
+    data, _ = read_shard(str(tmp_path), GUILD, until=compacted_at)
+    assert data["characters"]["a"]["gold"] == 1
+    assert "_compacted_at" not in data
+
+
+def test_restore_stops_at_until(tmp_path):
+    backend = JsonBackend(str(tmp_path))
+    backend.load_guild(GUILD)
+    backend.compact(GUILD)
+    compacted_at = read_snapshot_time(tmp_path)
+    with open(journal_path(str(tmp_path), GUILD), "a", encoding="utf-8") as f:
+        for ts, gold in ((compacted_at + 10, 1), (compacted_at + 20, 2)):
+            f.write(json.dumps({"ts": ts, "c": "characters", "k": "a", "v": {"gold": gold}}) + "\n")
+
+    data, _ = read_shard(str(tmp_path), GUILD, until=compacted_at + 15)
+    assert data["characters"]["a"]["gold"] == 1
+    data, _ = read_shard(str(tmp_path), GUILD)
+    assert data["characters"]["a"]["gold"] == 2
+
+
+def read_snapshot_time(tmp_path) -> int:
+    with open(snapshot_path(str(tmp_path), GUILD), encoding="utf-8") as f:
+        return json.load(f)["_compacted_at"]
@@ -0,0 +1,70 @@
+# ============================================
+# FILE: tests/test_models.py
+# ============================================
+import asyncio
+
+from models import Character, Inventory, Item
+from repository import RPGRepository
+from storage import JsonBackend, encode
+
+
+def test_catalog_item_round_trip():
+    item = Item.from_catalog("longsword", damage="1d10")
+    item.quantity = 2
+    assert item.to_dict() == {"id": "longsword", "damage": "1d10", "quantity": 2}
+    assert Item.from_dict(item.to_dict()) == item
+
+
+def test_legacy_item_is_linked_to_catalog():
+    item = Item.from_dict({"name": "Longsword", "type": "Weapon", "damage": None})
+    assert (item.item_id, item.damage, item.quantity) == ("longsword", "1d8", 1)
+
+
+def test_custom_item_keeps_defaults():
+    item = Item.from_dict({"name": "Pinne"})
+    assert (item.item_id, item.type, item.quantity) == (None, "Misc", 1)
+    assert item.to_dict() == {"name": "Pinne"}
+
+
+def test_loaded_inventory_merges_stacks_and_finds_by_name():
+    inventory = Inventory.from_list([{"id": "dagger"}, {"id": "dagger", "quantity": 2}, {"name": "Pinne"}])
+    assert len(inventory) == 2 and inventory.count() == 4
+
+    dagger = inventory.find("DAGGER")
+    assert dagger.quantity == 3
+    removed = inventory.remove(dagger, 3)
+    assert removed.quantity == 3
+    assert inventory.find("dagger") is None
+    inventory.add(Item.from_catalog("dagger"))
+    assert inventory.find("dagger").quantity == 1
+
+
+def test_remove_last_stack_before_any_lookup():
+    inventory = Inventory.from_list([{"id": "shield"}])
+    inventory.remove(next(iter(inventory)))
+    assert len(inventory) == 0 and inventory.find("shield") is None
+
+
+def test_character_round_trip():
+    character = Character(name="Puff", stats={"health": 5}, inventory=[Item.from_catalog("shield")], spells=[])
+    loaded = Character.from_dict(character.to_dict())
+    assert loaded == character
+    assert loaded.spells == [] and Character.from_dict({"name": "x"}).spells is None
+
+
+def test_removed_catalog_id_still_loads(tmp_path):
+    backend = JsonBackend(str(tmp_path))
+    backend.load_guild("1")
+    backend.write({("1", "characters", "7"): encode(
+        {"name": "Puff", "inventory": [{"id": "removed_sword", "quantity": 2}, {"id": "dagger"}]}
+    )})
+    backend.close()
+
+    repo = RPGRepository(JsonBackend(str(tmp_path)))
+    asyncio.run(repo.load("1"))
+    character = repo.get_character("7", "1")
+    unknown = character.inventory.find("Okänt item (removed_sword)")
+    assert unknown.quantity == 2 and unknown.price is None
+    assert character.inventory.find("dagger") is not None
+    # Platshållarnamnet sparas inte, så id:t kan läggas tillbaka i katalogen
+    assert character.to_dict()["inventory"][0] == {"id": "removed_sword", "quantity": 2}
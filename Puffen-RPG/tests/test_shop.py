@@ -0,0 +1,64 @@
+# ============================================
+# FILE: tests/test_shop.py
+# ============================================
+import asyncio
+from types import SimpleNamespace
+
+from cogs.shop import ShopCog, roll_healing
+from models import Character, Item
+
+
+class FakeRepo:
+    def __init__(self, characters):
+        self.characters = characters
+        self.saved = []
+
+    def get_character(self, user_id, guild_id):
+        return self.characters.get(user_id)
+
+    def save_character(self, user_id, guild_id, character):
+        self.saved.append(user_id)
+
+
+class FakeResponse:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+
+
+def use(character, item_name):
+    repo = FakeRepo({"1": character})
+    cog = ShopCog(SimpleNamespace(repo=repo))
+    interaction = SimpleNamespace(user=SimpleNamespace(id=1), guild=SimpleNamespace(id=2), response=FakeResponse())
+    asyncio.run(ShopCog.use_item.callback(cog, interaction, item_name))
+    return repo, interaction.response.sent
+
+
+def test_roll_healing():
+    assert 4 <= roll_healing("2d4+2") <= 10
+    assert 1 <= roll_healing("1d6") <= 6
+    assert roll_healing("Unknown effect") is None
+
+
+def test_unparsable_effect_keeps_the_item():
+    character = Character(name="Ada", hp=5, max_hp=10)
+    character.inventory.add(Item.from_catalog("healing_potion", effect="lots"))
+
+    repo, sent = use(character, "Healing Potion")
+    assert "Kunde inte tolka" in sent[0][0]
+    assert character.inventory.count() == 1
+    assert character.hp == 5
+    assert repo.saved == []
+
+
+def test_healing_potion_is_used_up():
+    character = Character(name="Ada", hp=1, max_hp=20)
+    character.inventory.add(Item.from_catalog("healing_potion"))
+
+    repo, sent = use(character, "Healing Potion")
+    assert "embed" in sent[0][1]
+    assert character.inventory.count() == 0
+    assert 5 <= character.hp <= 11
+    assert repo.saved == ["1"]
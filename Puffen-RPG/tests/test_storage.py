@@ -0,0 +1,95 @@
+# ============================================
+# FILE: tests/test_storage.py
+# ============================================
+import asyncio
+import json
+import os
+
+import pytest
+
+from models import Character, Quest
+from repository import RPGRepository
+from storage import JsonBackend, SqliteBackend, create_backend, encode, snapshot_path
+
+GUILD = "1"
+
+
+def make_backend(kind: str, tmp_path):
+    if kind == "sqlite":
+        return SqliteBackend(str(tmp_path / "dnd_data.db"))
+    return JsonBackend(str(tmp_path / "guilds"))
+
+
+@pytest.mark.parametrize("kind", ["json", "sqlite"])
+def test_backend_round_trip(kind, tmp_path):
+    backend = make_backend(kind, tmp_path)
+    backend.load_guild(GUILD)
+    backend.write({
+        (GUILD, "characters", "a"): encode({"name": "Puff", "gold": 5}),
+        (GUILD, "characters", "b"): encode({"name": "Pip"}),
+        (GUILD, "quests", "drake"): encode({"name": "Drake"}),
+    })
+    backend.write({(GUILD, "characters", "b"): None, (GUILD, "characters", "a"): encode({"name": "Puff", "gold": 6})})
+    backend.close()
+
+    data = make_backend(kind, tmp_path).load_guild(GUILD)
+    assert data["characters"] == {"a": {"name": "Puff", "gold": 6}}
+    assert data["quests"] == {"drake": {"name": "Drake"}}
+    assert make_backend(kind, tmp_path).load_guild("2")["characters"] == {}
+
+
+def test_legacy_file_is_split_per_guild(tmp_path):
+    legacy = tmp_path / "dnd_data.json"
+    legacy.write_text(json.dumps({
+        "characters": {"1_10": {"name": "Puff"}, "2_20": {"name": "Pip"}},
+        "quests": {"1_drake": {"name": "Drake"}},
+    }), encoding="utf-8")
+
+    backend = JsonBackend(str(tmp_path / "guilds"), legacy_file=str(legacy))
+    assert not legacy.exists() and (tmp_path / "dnd_data.json.migrated").exists()
+    assert os.path.exists(snapshot_path(str(tmp_path / "guilds"), "2"))
+    data = backend.load_guild("1")
+    assert data["characters"] == {"10": {"name": "Puff"}}
+    assert data["quests"] == {"drake": {"name": "Drake"}}
+
+
+def test_sqlite_imports_json_shards_once(tmp_path):
+    shards = JsonBackend(str(tmp_path / "guilds"))
+    shards.load_guild(GUILD)
+    shards.write({(GUILD, "characters", "a"): encode({"name": "Puff"})})
+    shards.close()
+
+    args = ("sqlite", str(tmp_path / "dnd_data.json"), str(tmp_path / "dnd_data.db"), str(tmp_path / "guilds"))
+    backend = create_backend(*args)
+    backend.write({(GUILD, "characters", "b"): encode({"name": "Pip"})})
+    backend.close()
+    # Databasen är inte längre tom, så inget importeras på nytt
+    backend = create_backend(*args)
+    assert sorted(backend.load_guild(GUILD)["characters"]) == ["a", "b"]
+    backend.close()
+
+
+@pytest.mark.parametrize("kind", ["json", "sqlite"])
+def test_repository_coalesces_and_survives_eviction(kind, tmp_path):
+    async def main():
+        repo = RPGRepository(make_backend(kind, tmp_path), max_guilds=1)
+        await repo.load(GUILD)
+        for gold in range(10):
+            repo.save_character("a", GUILD, Character(name="Puff", gold=gold))
+        repo.put("quests", GUILD, "drake", Quest(name="Drake", accepted_by=["a"]))
+        await repo.flush()
+        assert repo.stats["flushes"] == 1 and repo.stats["coalesced"] == 10
+
+        # En andra guild trycker ut den första ur minnet
+        await repo.load("2")
+        repo.save_character("b", "2", Character(name="Pip"))
+        await repo.flush()
+        repo._evict()
+        assert repo.loaded_guilds == 1
+
+        await repo.load(GUILD)
+        assert repo.get_character("a", GUILD).gold == 9
+        assert list(repo.user_quests(GUILD, "a")) == ["drake"]
+        await repo.close()
+
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+# ============================================
+# FILE: tests/test_transactions.py
+# ============================================
+import asyncio
+import random
+
+import pytest
+
+from models import Character
+from repository import RPGRepository, TransactionConflict
+from storage import JsonBackend
+
+GUILD = "1"
+PLAYERS = [str(i) for i in range(20)]
+START_GOLD = 100
+
+
+def make_repo(tmp_path) -> RPGRepository:
+    return RPGRepository(JsonBackend(str(tmp_path / "guilds")))
+
+
+async def seed(repo: RPGRepository):
+    await repo.load(GUILD)
+    for user_id in PLAYERS:
+        repo.save_character(user_id, GUILD, Character(name=f"P{user_id}", gold=START_GOLD))
+
+
+def total_gold(repo: RPGRepository) -> int:
+    return sum(c.gold for c in repo.scan("characters", GUILD).values())
+
+
+def test_concurrent_transfers_keep_gold_constant(tmp_path):
+    """Stresstest: överföringar som gör await mitt i transaktionen krockar
+    med varandra och med vanliga skrivningar, men inget guld försvinner."""
+    async def main():
+        repo = make_repo(tmp_path)
+        await seed(repo)
+        rng = random.Random(1234)
+
+        async def transfer(payer: str, payee: str, amount: int):
+            async def work(tx):
+                source = tx.get_character(payer)
+                target = tx.get_character(payee)
+                # Ge andra uppgifter chansen att ändra samma poster
+                await asyncio.sleep(0)
+                if source.gold < amount:
+                    return False
+                source.gold -= amount
+                target.gold += amount
+                tx.save_character(payer, source)
+                tx.save_character(payee, target)
+                return True
+            return await repo.transaction(GUILD, work, retries=50)
+
+        async def bonus(user_id: str):
+            # Vanlig skrivning utanför transaktioner, som cogs gör
+            character = repo.get_character(user_id, GUILD)
+            await asyncio.sleep(0)
+            character.gold += 1
+            repo.save_character(user_id, GUILD, character)
+
+        jobs = []
+        for _ in range(400):
+            payer, payee = rng.sample(PLAYERS, 2)
+            jobs.append(transfer(payer, payee, rng.randint(1, 30)))
+        for _ in range(100):
+            jobs.append(bonus(rng.choice(PLAYERS)))
+        rng.shuffle(jobs)
+        await asyncio.gather(*jobs)
+
+        assert repo.stats["conflicts"] > 0
+        assert repo.stats["transactions"] == 400
+        assert total_gold(repo) == len(PLAYERS) * START_GOLD + 100
+        assert all(c.gold >= 0 for c in repo.scan("characters", GUILD).values())
+
+        # Samma resultat efter omstart från disk
+        expected = {k: c.gold for k, c in repo.scan("characters", GUILD).items()}
+        await repo.close()
+        reloaded = make_repo(tmp_path)
+        await reloaded.load(GUILD)
+        assert {k: c.gold for k, c in reloaded.scan("characters", GUILD).items()} == expected
+
+    asyncio.run(main())
+
+
+def test_conflict_is_raised_after_retries(tmp_path):
+    async def main():
+        repo = make_repo(tmp_path)
+        await seed(repo)
+
+        def work(tx):
+            character = tx.get_character("0")
+            # Någon annan skriver samma post före varje commit
+            repo.save_character("0", GUILD, repo.get_character("0", GUILD))
+            character.gold = 0
+            tx.save_character("0", character)
+
+        with pytest.raises(TransactionConflict):
+            await repo.transaction(GUILD, work, retries=3)
+        assert repo.stats["conflicts"] == 3
+        assert repo.get_character("0", GUILD).gold == START_GOLD
+
+    asyncio.run(main())
+
+
+def test_failed_work_leaves_no_trace(tmp_path):
+    async def main():
+        repo = make_repo(tmp_path)
+        await seed(repo)
+
+        def work(tx):
+            character = tx.get_character("0")
+            character.gold = 0
+            tx.save_character("0", character)
+            raise RuntimeError("avbruten")
+
+        with pytest.raises(RuntimeError):
+            await repo.transaction(GUILD, work)
+        assert repo.get_character("0", GUILD).gold == START_GOLD
+
+    asyncio.run(main())
+
+
+def test_held_reference_sees_commit(tmp_path):
+    """En referens hämtad före en commit får inte skriva tillbaka gammal data."""
+    async def main():
+        repo = make_repo(tmp_path)
+        await seed(repo)
+        held = repo.get_character("0", GUILD)
+
+        def work(tx):
+            character = tx.get_character("0")
+            character.gold += 50
+            tx.save_character("0", character)
+
+        await repo.transaction(GUILD, work)
+        assert repo.get_character("0", GUILD) is held
+        assert held.gold == START_GOLD + 50
+
+        held.xp += 10
+        repo.save_character("0", GUILD, held)
+        stored = repo.get_character("0", GUILD)
+        assert (stored.gold, stored.xp) == (START_GOLD + 50, 10)
+
+    asyncio.run(main())
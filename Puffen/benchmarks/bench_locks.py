@@ -0,0 +1,54 @@
+# ==================== BENCH_LOCKS.PY ====================
+"""Låsregistret i DataManager med många servrar: vanlig dict mot svaga referenser.
+
+Kör från Puffen-mappen:  python benchmarks/bench_locks.py [antal servrar]
+"""
+import asyncio, os, sys, tempfile, tracemalloc
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, os.path.dirname(BOT_DIR))
+
+# DataManager använder relativa sökvägar (data/, logs/)
+os.chdir(tempfile.mkdtemp(prefix="puffen-bench-"))
+os.makedirs("logs")
+os.makedirs("data")
+
+from cogs.utils_core import DataManager  # noqa: E402
+
+async def run(dm: DataManager, guilds: int):
+    for guild_id in range(guilds):
+        await dm.load_json("role_menu", guild_id, {})
+        await dm.load_json("reaction_roles", guild_id, {})
+
+async def serialised(dm: DataManager) -> bool:
+    """20 samtidiga skrivare på samma fil får aldrig överlappa."""
+    inside, overlap = 0, False
+    async def writer():
+        nonlocal inside, overlap
+        async with dm._get_lock("data/guilds/1.json"):
+            inside += 1
+            overlap |= inside > 1
+            await asyncio.sleep(0)
+            inside -= 1
+    await asyncio.gather(*(writer() for _ in range(20)))
+    return not overlap
+
+def measure(label: str, dm: DataManager, guilds: int):
+    tracemalloc.start()
+    asyncio.run(run(dm, guilds))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ok = asyncio.run(serialised(dm))
+    print(f"{label:<14} {len(dm.locks):>7} lås kvar {size / 1e6:7.1f} MB   serialiserat: {'ja' if ok else 'NEJ'}")
+
+def main():
+    guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print(f"{guilds} servrar, role_menu + reaction_roles per server")
+    plain = DataManager()
+    plain.locks = {}
+    measure("vanlig dict", plain, guilds)
+    measure("svaga värden", DataManager(), guilds)
+
+if __name__ == "__main__":
+    main()
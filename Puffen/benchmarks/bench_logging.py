@@ -0,0 +1,63 @@
+# ==================== BENCH_LOGGING.PY ====================
+"""Latens per kommando med loggning direkt till fil mot via kö (shared/logqueue.py).
+
+Kör från Puffen-mappen:  python benchmarks/bench_logging.py [antal kommandon] [stopp i ms per skrivning]
+Ett stopp > 0 simulerar en disk som ibland hänger sig.
+"""
+import asyncio, logging, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.logqueue import queued, rotating_file, stop_listeners  # noqa: E402
+
+class StallingHandler(logging.Handler):
+    """Lägger en fördröjning framför en riktig filhandler."""
+    def __init__(self, inner: logging.Handler, stall_ms: float):
+        super().__init__()
+        self.inner, self.stall = inner, stall_ms / 1000
+
+    def emit(self, record):
+        time.sleep(self.stall)
+        self.inner.emit(record)
+
+    def close(self):
+        self.inner.close()
+        super().close()
+
+async def commands(logger: logging.Logger, count: int) -> list:
+    latencies = []
+    for i in range(count):
+        started = time.perf_counter()
+        logger.info(f"/quote körd av användare {i}")
+        logger.info(f"svar skickat till kanal {i % 50}")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0)
+    return latencies
+
+def run(label: str, handler: logging.Handler, count: int):
+    logger = logging.getLogger(f"bench.{label}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    latencies = sorted(asyncio.run(commands(logger, count)))
+    logger.removeHandler(handler)
+    mean = sum(latencies) / len(latencies) * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    print(f"{label:<8} medel {mean:8.0f} µs   p99 {p99:8.0f} µs")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    stall_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+    print(f"{count} kommandon, två loggrader per kommando, stopp {stall_ms} ms per skrivning")
+    with tempfile.TemporaryDirectory() as tmp:
+        def handler(name: str) -> logging.Handler:
+            inner = rotating_file(os.path.join(tmp, name), "%(asctime)s - %(message)s", max_mb=1)
+            return StallingHandler(inner, stall_ms) if stall_ms else inner
+        direct = handler("direct.log")
+        run("direkt", direct, count)
+        direct.close()
+        run("kö", queued(handler("queued.log")), count)
+        stop_listeners()
+
+if __name__ == "__main__":
+    main()
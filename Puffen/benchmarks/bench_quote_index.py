@@ -0,0 +1,49 @@
+# ==================== BENCH_QUOTE_INDEX.PY ====================
+"""Sökindexet för citat: bygge, sökningar och avstämning efter att cachen gått ut.
+
+Kör från Puffen-mappen:  python benchmarks/bench_quote_index.py [antal citat]
+"""
+import json, os, random, sys, timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cogs.quote_index import QuoteIndex  # noqa: E402
+
+WORDS = ["och", "är", "det", "inte", "jag", "du", "kaffe", "måndag", "katt", "puffin",
+         "regn", "pizza", "fredag", "möte", "deadline", "semester", "bugg", "server"]
+USERS = ["Anna", "Bosse", "Cissi", "Dante", "Elin"]
+
+def make_items(count: int) -> dict:
+    rng = random.Random(21)
+    # Zipf-liknande fördelning: de första orden är mycket vanligare
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    return {
+        str(i): {"id": i, "quote": " ".join(rng.choices(WORDS, weights, k=8)) + f" ord{i}", "user": rng.choice(USERS)}
+        for i in range(1, count + 1)
+    }
+
+def report(label: str, fn, number: int = 1):
+    best = min(timeit.repeat(fn, number=number, repeat=3)) / number
+    print(f"{label:<34} {best * 1000:9.2f} ms")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    items = make_items(count)
+    print(f"{count} citat")
+    report("bygge (en gång per server)", lambda: QuoteIndex.build(items.items()))
+
+    index = QuoteIndex.build(items.items())
+    for query in ("ord42", "och", "puffin ord42", "och är det", "server semester anna"):
+        report(f"sök \"{query}\"", lambda: index.search(query), number=20)
+
+    # Efter att cachen gått ut läses samma citat in igen som nya objekt
+    reloaded = json.loads(json.dumps(items))
+    def reconcile():
+        for key in index.quotes.keys() - reloaded.keys():
+            index.remove(key)
+        for key in reloaded.keys() - index.quotes.keys():
+            index.add(key, reloaded[key])
+    report("avstämning efter ny inläsning", reconcile)
+
+if __name__ == "__main__":
+    main()
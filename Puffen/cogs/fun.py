@@ -2,6 +2,7 @@
 import random, discord
 from discord.ext import commands
 from discord import app_commands
+from cogs.utils_core import respond_temp
 
 class Fun(commands.Cog):
     def __init__(self, bot):
@@ -16,7 +17,7 @@ class Fun(commands.Cog):
         res = random.choice(["KLAVE", "KRONA"])
         emoji = "🪙" if res == "KRONA" else "🪙"
         embed = discord.Embed(title="🪙 Myntkast", description=f"{interaction.user.mention} Myntet landade på **{res}**!", color=0x00ff99)
-        await interaction.response.send_message(embed=embed, delete_after=60)
+        await respond_temp(interaction, embed=embed)
 
     @app_commands.command(
     name="eightball",
@@ -45,7 +46,7 @@ class Fun(commands.Cog):
             text = f"{interaction.user.mention} kastade **{amount}d{sides}** → `{', '.join(map(str, rolls))}` = **{total}** 🎲"
 
             embed = discord.Embed(title="🎲 Tärningskast", description=text, color=0x9966ff)
-            await interaction.response.send_message(embed=embed, delete_after=60)
+            await respond_temp(interaction, embed=embed)
         except Exception as e:
             await interaction.response.send_message(f"❌ Felaktigt format: {e}", ephemeral=True)
 
@@ -0,0 +1,111 @@
+# ==================== GUILD_STORE.PY ====================
+"""Ett JSON-dokument per server: data/guilds/<guild_id>.json.
+
+Dokumentet håller all data för servern under funktionens namn, t.ex.
+{"quotes": [...], "reaction_roles": {...}, "role_menu": {...}}, så en
+server läses med en enda öppning och parsning.
+
+Varje funktion kodas för sig och dokumentet sätts ihop av de färdiga
+texterna, så en ändrad funktion inte kräver att resten kodas om.
+
+Äldre filer (data/<namn>_<guild_id>.json) viks in automatiskt första
+gången servern läses, eller för alla servrar på en gång med:
+
+    python cogs/guild_store.py [data-mapp]
+"""
+import json, os, re, sys, time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+# Körs filen direkt ligger repots rot (med shared/) inte på sökvägen
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from shared.atomic import write_json_atomic, write_text_atomic
+
+# <namn>_<guild_id>.json, t.ex. reaction_roles_475382162418565152.json
+LEGACY_PATTERN = re.compile(r"^(?P<name>.+)_(?P<guild_id>\d+)\.json$")
+
+def guild_path(data_dir: Path, guild_id: int) -> Path:
+    return data_dir / "guilds" / f"{guild_id}.json"
+
+def legacy_files(data_dir: Path, guild_id: int) -> Dict[str, Path]:
+    """Äldre filer för en server som {namn: sökväg}."""
+    found = {}
+    for file in data_dir.glob(f"*_{guild_id}.json"):
+        match = LEGACY_PATTERN.match(file.name)
+        if match and match["guild_id"] == str(guild_id):
+            found[match["name"]] = file
+    return found
+
+def fold_guild(data_dir: Path, guild_id: int) -> dict:
+    """Viker in äldre filer i serverns dokument och byter namn på dem
+    till .migrated. Finns nyckeln redan i dokumentet vinner dokumentet."""
+    file = guild_path(data_dir, guild_id)
+    doc = read_doc(file)
+    legacy = legacy_files(data_dir, guild_id)
+    if not legacy:
+        return doc
+    for name, path in legacy.items():
+        if name not in doc:
+            with open(path, "r", encoding="utf-8") as f:
+                doc[name] = json.load(f)
+    file.parent.mkdir(parents=True, exist_ok=True)
+    write_json_atomic(file, doc)
+    # Först när dokumentet är skrivet tas de gamla filerna ur bruk
+    for path in legacy.values():
+        os.replace(path, path.with_name(path.name + ".migrated"))
+    return doc
+
+def read_doc(file: Path) -> dict:
+    try:
+        with open(file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def encode_section(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+def render_guild(sections: Dict[str, str]) -> str:
+    """Sätter ihop dokumentet av redan kodade funktioner."""
+    return "{" + ",".join(f"{json.dumps(name, ensure_ascii=False)}:{text}" for name, text in sections.items()) + "}"
+
+def write_guild(file: Path, doc: dict, encoded: Dict[str, str], changed: str) -> Tuple[Dict[str, str], float]:
+    """Skriver serverns dokument. Bara ``changed`` och funktioner som saknas
+    i ``encoded`` kodas; övriga återanvänds som färdig text.
+    Returnerar (de kodade funktionerna, ms som gick åt till kodning)."""
+    started = time.perf_counter()
+    sections = {}
+    for name, data in doc.items():
+        text = encoded.get(name) if name != changed else None
+        sections[name] = text if text is not None else encode_section(data)
+    encode_ms = (time.perf_counter() - started) * 1000
+    file.parent.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(file, render_guild(sections))
+    return sections, encode_ms
+
+def read_guild(data_dir: Path, guild_id: int) -> dict:
+    """Läser serverns dokument; äldre filer viks in första gången."""
+    file = guild_path(data_dir, guild_id)
+    if not file.exists():
+        return fold_guild(data_dir, guild_id)
+    return read_doc(file)
+
+def migrate(data_dir: Path) -> Dict[int, list]:
+    """Viker in alla äldre filer i data_dir. Returnerar {guild_id: [namn, ...]}."""
+    guild_ids = set()
+    for file in data_dir.glob("*_*.json"):
+        match = LEGACY_PATTERN.match(file.name)
+        if match:
+            guild_ids.add(int(match["guild_id"]))
+    migrated = {}
+    for guild_id in sorted(guild_ids):
+        migrated[guild_id] = sorted(legacy_files(data_dir, guild_id))
+        fold_guild(data_dir, guild_id)
+    return migrated
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data")
+    result = migrate(target)
+    for guild_id, names in result.items():
+        print(f"✓ {guild_id}: {', '.join(names)}")
+    print(f"📦 {len(result)} server(ar) migrerade till {target / 'guilds'}")
@@ -0,0 +1,101 @@
+# ==================== QUOTE_DATES.PY ====================
+"""Tidsstämplar och datumindex för citat.
+
+Citaten sparar ``ts`` (Unix-sekunder, lokal tid) bredvid visningsdatumet.
+Indexet är en sorterad lista av (ts, id) så datumintervall och "på denna
+dag" slås upp med bisect i stället för att varje datumsträng tolkas.
+"""
+import bisect, hashlib
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+# Formaten som förekommer i sparade citat och som godtas i kommandon
+DATE_FORMATS = ("%d/%m/%y", "%d-%m-%y", "%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d.%m.%Y", "%d.%m.%y")
+
+def parse_date(text: str) -> Optional[date]:
+    text = (text or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def day_start(day: date) -> int:
+    """Tidsstämpel för midnatt (lokal tid) den dagen."""
+    return int(datetime(day.year, day.month, day.day).timestamp())
+
+def date_to_ts(text: str) -> Optional[int]:
+    day = parse_date(text)
+    return day_start(day) if day else None
+
+def add_timestamps(items: Iterable[dict]) -> int:
+    """Sätter ``ts`` på citat som saknar det. Returnerar antalet som
+    inte gick att tolka (de får ts None och hamnar utanför indexet)."""
+    failed = 0
+    # Samma datumsträng återkommer ofta och strptime är långsam
+    parsed = {}
+    for q in items:
+        if "ts" not in q:
+            text = q.get("date", "")
+            if text not in parsed:
+                parsed[text] = date_to_ts(text)
+            q["ts"] = parsed[text]
+            failed += q["ts"] is None
+    return failed
+
+class DateIndex:
+    def __init__(self):
+        # Sorterad på (ts, id)
+        self.entries: List[Tuple[int, int]] = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def build(cls, quotes: Iterable[dict]):
+        index = cls()
+        index.entries = sorted((q["ts"], q["id"]) for q in quotes if q.get("ts") is not None)
+        return index
+
+    def add(self, quote: dict):
+        if quote.get("ts") is not None:
+            # Nya citat hamnar nästan alltid sist, så insort är billig
+            bisect.insort(self.entries, (quote["ts"], quote["id"]))
+
+    def remove(self, quote: dict):
+        if quote.get("ts") is None:
+            return
+        entry = (quote["ts"], quote["id"])
+        pos = bisect.bisect_left(self.entries, entry)
+        if pos < len(self.entries) and self.entries[pos] == entry:
+            del self.entries[pos]
+
+    def between(self, start: Optional[int] = None, end: Optional[int] = None) -> List[int]:
+        """id för citat med start <= ts < end, äldst först."""
+        lo = 0 if start is None else bisect.bisect_left(self.entries, (start,))
+        hi = len(self.entries) if end is None else bisect.bisect_left(self.entries, (end,))
+        return [quote_id for _, quote_id in self.entries[lo:hi]]
+
+    def on_this_day(self, day: date) -> List[int]:
+        """id för citat från samma dag och månad som ``day`` tidigare år.
+        Ett bisect-par per år i stället för en genomgång av alla citat."""
+        if not self.entries:
+            return []
+        first = datetime.fromtimestamp(self.entries[0][0]).year
+        ids = []
+        for year in range(first, day.year):
+            try:
+                same_day = day.replace(year=year)
+            except ValueError:  # 29 februari
+                continue
+            start = day_start(same_day)
+            ids.extend(self.between(start, day_start(same_day + timedelta(days=1))))
+        return ids
+
+def pick_of_the_day(ids: List[int], guild_id: int, day: date) -> Optional[int]:
+    """Väljer samma id hela dagen (för samma server och samma ids)."""
+    if not ids:
+        return None
+    seed = hashlib.sha1(f"{guild_id}:{day.isoformat()}".encode()).digest()
+    return ids[int.from_bytes(seed[:8], "big") % len(ids)]
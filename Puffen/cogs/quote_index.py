@@ -0,0 +1,93 @@
+# ==================== QUOTE_INDEX.PY ====================
+"""Inverterat index för fritextsökning bland en servers citat.
+
+Varje ord (gemener, \\w+) i citatets text och författare pekar på de
+citat det förekommer i och hur många gånger. Ord i författarnamnet
+väger dubbelt. Indexet uppdateras stegvis med add()/remove() och
+behöver aldrig byggas om vid ändringar.
+"""
+import heapq, math, re
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+AUTHOR_WEIGHT = 2
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+class QuoteIndex:
+    def __init__(self):
+        # {ord: {nyckel: viktad förekomst}}
+        self.postings: Dict[str, Dict[Hashable, int]] = {}
+        # {nyckel: Counter} så ett citat kan tas bort utan att läsas om
+        self.terms: Dict[Hashable, Counter] = {}
+        # {nyckel: citat}
+        self.quotes: Dict[Hashable, dict] = {}
+
+    def __len__(self):
+        return len(self.terms)
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[Hashable, dict]]):
+        index = cls()
+        for key, quote in items:
+            index.add(key, quote)
+        return index
+
+    def add(self, key: Hashable, quote: dict):
+        counts = Counter(tokenize(quote["quote"]))
+        for token in tokenize(quote["user"]):
+            counts[token] += AUTHOR_WEIGHT
+        self.terms[key] = counts
+        self.quotes[key] = quote
+        for token, tf in counts.items():
+            self.postings.setdefault(token, {})[key] = tf
+
+    def remove(self, key: Hashable):
+        self.quotes.pop(key, None)
+        for token in self.terms.pop(key, ()):
+            posting = self.postings[token]
+            del posting[key]
+            if not posting:
+                del self.postings[token]
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[dict, float]]:
+        """Rankar citaten som matchar något av sökorden: först efter hur
+        många av orden som träffar, sedan efter tf·idf.
+        Returnerar [(citat, poäng), ...].
+
+        Citat med alla orden hamnar alltid överst. Finns det minst ``limit``
+        sådana är de hela svaret, och då räcker det att gå igenom det
+        ovanligaste ordets citat i stället för alla citat med "och" i."""
+        total = len(self.terms)
+        postings = sorted(
+            (self.postings[token] for token in set(tokenize(query)) if token in self.postings),
+            key=len
+        )
+        if not postings:
+            return []
+        idfs = [math.log(1 + total / len(posting)) for posting in postings]
+        if len(postings) == 1:
+            posting = postings[0]
+            return [(self.quotes[key], posting[key] * idfs[0]) for key in heapq.nlargest(limit, posting, key=posting.get)]
+
+        in_all = postings[0].keys()
+        for posting in postings[1:]:
+            in_all = in_all & posting.keys()
+        if len(in_all) >= limit:
+            scores = dict.fromkeys(in_all, 0.0)
+            for posting, idf in zip(postings, idfs):
+                for key in in_all:
+                    scores[key] += posting[key] * idf
+            best = heapq.nlargest(limit, scores, key=scores.get)
+            return [(self.quotes[key], scores[key]) for key in best]
+
+        scores: Dict[Hashable, float] = {}
+        matched: Dict[Hashable, int] = {}
+        for posting, idf in zip(postings, idfs):
+            for key, tf in posting.items():
+                scores[key] = scores.get(key, 0.0) + tf * idf
+                matched[key] = matched.get(key, 0) + 1
+        best = heapq.nlargest(limit, scores, key=lambda key: (matched[key], scores[key]))
+        return [(self.quotes[key], scores[key]) for key in best]
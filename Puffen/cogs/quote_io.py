@@ -0,0 +1,90 @@
+# ==================== QUOTE_IO.PY ====================
+"""Import och export av citat som CSV eller JSON Lines.
+
+Filerna läses och skrivs rad för rad mot en fil (t.ex. en
+SpooledTemporaryFile), så hela innehållet aldrig ligger i minnet både
+som bytes och som text. Funktionerna blockerar och körs i en tråd.
+"""
+import csv, hashlib, io, json
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Set, Tuple
+
+FORMATS = ("jsonl", "csv")
+CSV_FIELDS = ("id", "quote", "user", "date")
+
+def detect_format(filename: str) -> str:
+    """"csv" för .csv, annars "jsonl" (.jsonl, .json, .ndjson, .txt)."""
+    return "csv" if filename.lower().endswith(".csv") else "jsonl"
+
+def content_hash(quote: str, user: str) -> str:
+    """Samma text och författare (skiftlägesokänsligt) ger samma hash."""
+    normalized = f"{' '.join(quote.split()).casefold()}\x00{' '.join(user.split()).casefold()}"
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+def _rows(text: io.TextIOBase, fmt: str) -> Iterator[dict]:
+    if fmt == "csv":
+        yield from csv.DictReader(text)
+        return
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+def existing_hashes(quotes: Iterable[dict]) -> Set[str]:
+    return {content_hash(q["quote"], q["user"]) for q in quotes}
+
+def read_quotes(fp: BinaryIO, fmt: str, limit: int, max_length: int, seen: Set[str]) -> Tuple[List[dict], Dict[str, int]]:
+    """Läser upp till ``limit`` nya citat. Citat vars hash finns i
+    ``seen`` hoppas över (och nya hashar läggs till i ``seen``).
+    Läsningen avbryts vid gränsen; räknaren "truncated" blir då True.
+    Returnerar (citat, räknare)."""
+    counts = {"rows": 0, "duplicates": 0, "invalid": 0, "truncated": False}
+    quotes = []
+    text = io.TextIOWrapper(fp, encoding="utf-8-sig", newline="")
+    try:
+        for row in _rows(text, fmt):
+            if len(quotes) >= limit:
+                counts["truncated"] = True
+                break
+            counts["rows"] += 1
+            if not isinstance(row, dict):
+                counts["invalid"] += 1
+                continue
+            quote = str(row.get("quote") or "").strip()
+            user = str(row.get("user") or row.get("author") or "").strip() or "Okänd"
+            if not quote or len(quote) > max_length:
+                counts["invalid"] += 1
+                continue
+            digest = content_hash(quote, user)
+            if digest in seen:
+                counts["duplicates"] += 1
+                continue
+            seen.add(digest)
+            quotes.append({"quote": quote, "user": user, "date": str(row.get("date") or "").strip()})
+    finally:
+        text.detach()
+    return quotes, counts
+
+def write_quotes(fp: BinaryIO, quotes: Iterable[dict], fmt: str) -> int:
+    """Skriver citaten till fp och returnerar antalet."""
+    text = io.TextIOWrapper(fp, encoding="utf-8", newline="")
+    count = 0
+    try:
+        if fmt == "csv":
+            writer = csv.DictWriter(text, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for q in quotes:
+                writer.writerow(q)
+                count += 1
+        else:
+            for q in quotes:
+                text.write(json.dumps(q, ensure_ascii=False) + "\n")
+                count += 1
+        text.flush()
+    finally:
+        text.detach()
+    fp.seek(0)
+    return count
@@ -1,43 +1,188 @@
 # ==================== QUOTES.PY ====================
+import asyncio, itertools, tempfile
+import aiohttp
 import discord
 from discord.ext import commands
 from discord import app_commands
-from datetime import datetime
-from utils_core import dm, logger
-
-class QuotePaginator(discord.ui.View):
-    def __init__(self, quotes):
-        super().__init__(timeout=600)
-        self.quotes = quotes
-        self.page = 0
-        self.per_page = 5   # <-- ändrat till 5 per sida
-        self.max_page = (len(quotes) - 1) // self.per_page
-
-    def get_embed(self):
-        embed = discord.Embed(
-            title=f"📜 Quotes (sida {self.page+1}/{self.max_page+1})",
-            color=0x0099ff
-        )
-        for i, q in enumerate(self.quotes[self.page*self.per_page:(self.page+1)*self.per_page], start=self.page*self.per_page+1):
-            embed.add_field(
-                name=f"{i}.",
-                value=f"\"{q['quote']}\" – {q['user']} – {q['date']}",
-                inline=False
-            )
-        embed.set_footer(text=f"Totalt: {len(self.quotes)} citat")
-        return embed
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from cogs.utils_core import dm, logger, respond_temp
+from cogs.quote_index import QuoteIndex
+from cogs.quote_dates import DateIndex, add_timestamps, date_to_ts, day_start, parse_date, pick_of_the_day
+from cogs.quote_io import detect_format, existing_hashes, read_quotes, write_quotes
+
+QUOTES_PER_PAGE = 5   # <-- ändrat till 5 per sida
+# Antal servrar vars sökindex hålls i minnet
+INDEX_CACHE_SIZE = 64
+SEARCH_RESULTS = 10
+# Import/export buffras i minnet upp till så här mycket, sedan på disk
+SPOOL_MEMORY = 1024 * 1024
+
+def format_quote(q: dict) -> str:
+    return f"\"{q['quote']}\" – {q['user']} – {q['date']}"
+
+def migrate_quotes(quotes: list) -> dict:
+    """Gör om en gammal citatlista till id-format. Befintliga id behålls;
+    citat utan id (eller med ett upptaget id) får nya efter det högsta."""
+    used = [q["id"] for q in quotes if isinstance(q.get("id"), int)]
+    next_id = max(used, default=0) + 1
+    items = {}
+    for q in quotes:
+        quote_id = q.get("id")
+        if not isinstance(quote_id, int) or str(quote_id) in items:
+            quote_id, next_id = next_id, next_id + 1
+        items[str(quote_id)] = {**q, "id": quote_id}
+    return {"next_id": next_id, "items": items}
+
+def upgrade_quotes(store, guild_id: int) -> dict:
+    """Uppgraderar äldre citatformat till id-format med tidsstämplar."""
+    if isinstance(store, list):
+        store = migrate_quotes(store)
+        logger.info(f"📜 Migrerade {len(store['items'])} citat till id-format för {guild_id}")
+    elif not store:
+        return {"next_id": 1, "items": {}, "timestamps": True}
+    if not store.get("timestamps"):
+        # Äldre citat har bara "27/11/25" eller "27-11-25"
+        failed = add_timestamps(store["items"].values())
+        store["timestamps"] = True
+        logger.info(f"🕒 Tidsstämplade {len(store['items'])} citat för {guild_id}" + (f" ({failed} utan tolkbart datum)" if failed else ""))
+    return store
+
+def edit_quotes(guild_id: int):
+    """Ändra serverns citat under serverns lås: ``async with edit_quotes(id) as store``."""
+    return dm.edit("quotes", guild_id, convert=lambda store: upgrade_quotes(store, guild_id))
+
+async def load_quotes(guild_id: int) -> dict:
+    """Serverns citat som {"next_id": n, "items": {"<id>": citat}}.
+    id:n delas ut i stigande ordning och återanvänds aldrig.
+    Varje citat har "ts" (Unix-sekunder) bredvid visningsdatumet.
+    Resultatet delas – ändra det bara via edit_quotes()."""
+    store = await dm.load_json("quotes", guild_id, {})
+    if not store:
+        return {"next_id": 1, "items": {}, "timestamps": True}
+    if isinstance(store, list) or not store.get("timestamps"):
+        async with edit_quotes(guild_id) as store:
+            pass
+    return store
+
+# 🔎 Index per server: {guild_id: (citaten indexen senast stämdes av mot, QuoteIndex, DateIndex)}
+_indexes: "OrderedDict[int, tuple]" = OrderedDict()
+
+def _build_indexes(items: list):
+    return QuoteIndex.build(items), DateIndex.build(q for _, q in items)
+
+async def quote_indexes(guild_id: int):
+    """Citaten med sök- och datumindex. Indexen byggs en gång per server och
+    hålls sedan aktuella av add/delete. Läses citaten in på nytt (t.ex. efter
+    att cachen gått ut) stäms indexen bara av mot id:n – inget byggs om."""
+    store = await load_quotes(guild_id)
+    cached = _indexes.get(guild_id)
+    if cached is not None:
+        _indexes.move_to_end(guild_id)
+        if cached[0] is store:
+            return cached
+        _, index, dates = cached
+    else:
+        # Första bygget görs i en tråd så en stor server inte stoppar event-loopen
+        index, dates = await asyncio.to_thread(_build_indexes, list(store["items"].items()))
+
+    # Citaten kan ha ändrats medan tråden arbetade, eller sedan indexen stämdes av
+    items = store["items"]
+    for key in index.quotes.keys() - items.keys():
+        dates.remove(index.quotes[key])
+        index.remove(key)
+    for key in items.keys() - index.quotes.keys():
+        index.add(key, items[key])
+        dates.add(items[key])
+    _indexes[guild_id] = (store, index, dates)
+    if len(_indexes) > INDEX_CACHE_SIZE:
+        _indexes.popitem(last=False)
+    return store, index, dates
+
+def _index_add(guild_id: int, q: dict):
+    cached = _indexes.get(guild_id)
+    if cached is not None and str(q["id"]) not in cached[1].quotes:
+        cached[1].add(str(q["id"]), q)
+        cached[2].add(q)
 
-    @discord.ui.button(label="⬅️", style=discord.ButtonStyle.secondary)
-    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.page > 0:
-            self.page -= 1
-            await interaction.response.edit_message(embed=self.get_embed())
+def _index_remove(guild_id: int, q: dict):
+    cached = _indexes.get(guild_id)
+    if cached is not None and str(q["id"]) in cached[1].quotes:
+        cached[1].remove(str(q["id"]))
+        cached[2].remove(q)
 
-    @discord.ui.button(label="➡️", style=discord.ButtonStyle.secondary)
-    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.page < self.max_page:
-            self.page += 1
-            await interaction.response.edit_message(embed=self.get_embed())
+def _short_date(ts: int) -> str:
+    return datetime.fromtimestamp(ts).strftime("%d/%m/%y")
+
+async def quote_page(guild_id: int, page: int, start: int = None, end: int = None):
+    """Embed och knappar för en sida. Bara sidans citat plockas ut;
+    inget tillstånd sparas i vyn – sidnumret och ett eventuellt
+    datumintervall (start <= ts < end) ligger i knapparnas custom_id."""
+    dated = start is not None or end is not None
+    if dated:
+        store, _, dates = await quote_indexes(guild_id)
+        items = store["items"]
+        ids = dates.between(start, end)
+        total = len(ids)
+    else:
+        items = (await load_quotes(guild_id))["items"]
+        total = len(items)
+    max_page = max(0, (total - 1) // QUOTES_PER_PAGE)
+    page = min(max(page, 0), max_page)
+    first = page * QUOTES_PER_PAGE
+
+    title = "📜 Quotes"
+    if dated:
+        since = _short_date(start) if start is not None else "…"
+        until = _short_date(end - 1) if end is not None else "…"
+        title += f" {since}–{until}"
+        shown = (items[str(quote_id)] for quote_id in ids[first:first + QUOTES_PER_PAGE])
+    else:
+        shown = itertools.islice(items.values(), first, first + QUOTES_PER_PAGE)
+    embed = discord.Embed(
+        title=f"{title} (sida {page+1}/{max_page+1})",
+        color=0x0099ff
+    )
+    for q in shown:
+        embed.add_field(name=f"#{q['id']}", value=format_quote(q), inline=False)
+    embed.set_footer(text=f"Totalt: {total} citat")
+
+    view = discord.ui.View(timeout=None)
+    view.add_item(QuotePageButton(page - 1, "⬅️", start, end, disabled=page == 0))
+    view.add_item(QuotePageButton(page + 1, "➡️", start, end, disabled=page >= max_page))
+    return embed, view
+
+class QuotePageButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"quotes:page:(?P<page>-?\d+)(?::(?P<start>\d*)-(?P<end>\d*))?"
+):
+    """Bläddringsknapp som bär sin målsida (och datumintervall) i
+    custom_id, så den fungerar även efter en omstart och utan en vy per
+    meddelande i minnet."""
+
+    def __init__(self, page: int, label: str, start: int = None, end: int = None, disabled: bool = False):
+        custom_id = f"quotes:page:{page}"
+        if start is not None or end is not None:
+            custom_id += f":{'' if start is None else start}-{'' if end is None else end}"
+        super().__init__(discord.ui.Button(
+            label=label,
+            style=discord.ButtonStyle.secondary,
+            custom_id=custom_id,
+            disabled=disabled
+        ))
+        self.page = page
+        self.start = start
+        self.end = end
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        start = int(match["start"]) if match["start"] else None
+        end = int(match["end"]) if match["end"] else None
+        return cls(int(match["page"]), item.label, start, end)
+
+    async def callback(self, interaction: discord.Interaction):
+        embed, view = await quote_page(interaction.guild.id, self.page, self.start, self.end)
+        await interaction.response.edit_message(embed=embed, view=view)
 
 class Quotes(commands.Cog):
     def __init__(self, bot):
@@ -51,57 +196,225 @@ class Quotes(commands.Cog):
         if not author:
             author = interaction.user.display_name
 
-        quotes = await dm.load_json("quotes", interaction.guild.id, [])
-        quotes.append({
-            "quote": quote,
-            "user": author,
-            "date": datetime.now().strftime("%d/%m/%y")
-        })
-        await dm.save_json("quotes", interaction.guild.id, quotes)
+        async with edit_quotes(interaction.guild.id) as store:
+            quote_id = store["next_id"]
+            store["next_id"] += 1
+            now = datetime.now()
+            new_quote = {
+                "id": quote_id,
+                "quote": quote,
+                "user": author,
+                "date": now.strftime("%d/%m/%y"),
+                "ts": int(now.timestamp())
+            }
+            store["items"][str(quote_id)] = new_quote
+        _index_add(interaction.guild.id, new_quote)
 
         embed = discord.Embed(
-            title="✅ Quote tillagd",
-            description=f"\"{quote}\" – {author} – {datetime.now().strftime('%d/%m/%y')}",
+            title=f"✅ Quote #{quote_id} tillagd",
+            description=format_quote(new_quote),
             color=0x33cc33
         )
-        await interaction.response.send_message(embed=embed, delete_after=60)
+        await respond_temp(interaction, embed=embed)
 
     @app_commands.command(
         name="quotes",
         description="Visa quotes",
-        extras={"cog": "Citat", "help_text": "Visar alla sparade citat med sidvisning."}
+        extras={"cog": "Citat", "help_text": "Visar alla sparade citat med sidvisning. Med `from`/`to` (t.ex. 27/11/25 eller 2025-11-27) visas bara citat från de datumen."}
     )
-    async def list_quotes(self, interaction: discord.Interaction):
-        quotes = await dm.load_json("quotes", interaction.guild.id, [])
-        if not quotes:
+    @app_commands.rename(from_="from")
+    @app_commands.describe(from_="Första datum (t.ex. 27/11/25)", to="Sista datum (t.ex. 2025-12-24)")
+    async def list_quotes(self, interaction: discord.Interaction, from_: str = None, to: str = None):
+        start = end = None
+        for text, is_end in ((from_, False), (to, True)):
+            if text is None:
+                continue
+            day = parse_date(text)
+            if day is None:
+                await interaction.response.send_message(f"❌ Förstår inte datumet \"{text}\" (prova 27/11/25 eller 2025-11-27).", ephemeral=True)
+                return
+            if is_end:
+                end = day_start(day + timedelta(days=1))
+            else:
+                start = day_start(day)
+        if start is not None and end is not None and start >= end:
+            await interaction.response.send_message("❌ `from` måste vara före `to`.", ephemeral=True)
+            return
+
+        store = await load_quotes(interaction.guild.id)
+        if not store["items"]:
             await interaction.response.send_message("Inga quotes än.", ephemeral=True)
             return
-        await interaction.response.send_message(
-            embed=QuotePaginator(quotes).get_embed(),
-            view=QuotePaginator(quotes)
-        )
+        embed, view = await quote_page(interaction.guild.id, 0, start, end)
+        await interaction.response.send_message(embed=embed, view=view)
+
+    @app_commands.command(
+        name="quote",
+        description="Visa en quote",
+        extras={"cog": "Citat", "help_text": "Visar citatet med angivet id, t.ex. `/quote 12`."}
+    )
+    async def show_quote(self, interaction: discord.Interaction, quote_id: int):
+        q = (await load_quotes(interaction.guild.id))["items"].get(str(quote_id))
+        if q is None:
+            await interaction.response.send_message(f"❌ Ingen quote med id {quote_id}.", ephemeral=True)
+            return
+        embed = discord.Embed(title=f"📜 Quote #{quote_id}", description=format_quote(q), color=0x0099ff)
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(
+        name="quoteoftheday",
+        description="Dagens quote",
+        extras={"cog": "Citat", "help_text": "Visar ett citat från samma datum ett tidigare år, annars ett citat som är dagens för hela servern."}
+    )
+    async def quote_of_the_day(self, interaction: discord.Interaction):
+        guild_id = interaction.guild.id
+        store, _, dates = await quote_indexes(guild_id)
+        today = date.today()
+        # Helst något som sades just den här dagen förr
+        earlier = dates.on_this_day(today)
+        quote_id = pick_of_the_day(earlier, guild_id, today) or pick_of_the_day(dates.between(), guild_id, today)
+        if quote_id is None:
+            await interaction.response.send_message("Inga quotes än.", ephemeral=True)
+            return
+
+        q = store["items"][str(quote_id)]
+        title = "📅 Dagens quote"
+        if earlier:
+            years = today.year - datetime.fromtimestamp(q["ts"]).year
+            title += f" – för {years} år sedan"
+        embed = discord.Embed(title=title, description=format_quote(q), color=0x0099ff)
+        embed.set_footer(text=f"#{quote_id}")
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(
+        name="searchquote",
+        description="Sök bland quotes",
+        extras={"cog": "Citat", "help_text": "Söker i citatens text och författare. Bäst matchning visas först."}
+    )
+    async def search_quote(self, interaction: discord.Interaction, query: str):
+        store, index, _ = await quote_indexes(interaction.guild.id)
+        hits = index.search(query, SEARCH_RESULTS)
+        if not hits:
+            await interaction.response.send_message(f"🔎 Inga quotes matchar \"{query}\".", ephemeral=True)
+            return
+
+        embed = discord.Embed(title=f"🔎 Quotes som matchar \"{query}\"", color=0x0099ff)
+        for q, _ in hits:
+            embed.add_field(name=f"#{q['id']}", value=format_quote(q), inline=False)
+        embed.set_footer(text=f"{len(hits)} bästa träffarna av {len(store['items'])} citat")
+        await interaction.response.send_message(embed=embed)
 
     @app_commands.command(
         name="delquote",
         description="Ta bort quote",
-        extras={"cog": "Citat", "help_text": "Tar bort ett citat med angivet index. Endast admin."}
+        extras={"cog": "Citat", "help_text": "Tar bort citatet med angivet id (se `/quotes`). Endast admin."}
     )
     @app_commands.default_permissions(administrator=True)
-    async def delete_quote(self, interaction: discord.Interaction, index: int):
-        quotes = await dm.load_json("quotes", interaction.guild.id, [])
-        if index < 1 or index > len(quotes):
-            await interaction.response.send_message(f"❌ Ingen quote på plats {index}.", ephemeral=True)
+    async def delete_quote(self, interaction: discord.Interaction, quote_id: int):
+        store = await load_quotes(interaction.guild.id)
+        target = None
+        if str(quote_id) in store["items"]:
+            async with edit_quotes(interaction.guild.id) as store:
+                target = store["items"].pop(str(quote_id), None)
+        if target is None:
+            await interaction.response.send_message(f"❌ Ingen quote med id {quote_id}.", ephemeral=True)
             return
 
-        target = quotes.pop(index - 1)
-        await dm.save_json("quotes", interaction.guild.id, quotes)
+        _index_remove(interaction.guild.id, target)
 
         embed = discord.Embed(
-            title="🗑️ Quote borttagen",
-            description=f"\"{target['quote']}\" – {target['user']} – {target['date']}",
+            title=f"🗑️ Quote #{quote_id} borttagen",
+            description=format_quote(target),
             color=0xff0000
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @app_commands.command(
+        name="importquotes",
+        description="Importera quotes från fil",
+        extras={"cog": "Citat", "help_text": "Importerar citat från en CSV- (quote,user,date) eller JSON Lines-fil. Dubbletter hoppas över. Endast admin."}
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def import_quotes(self, interaction: discord.Interaction, file: discord.Attachment):
+        limits = dm.config.get("limits", {})
+        max_bytes = int(limits.get("import_max_mb", 8) * 1024 * 1024)
+        if file.size > max_bytes:
+            await interaction.response.send_message(f"❌ Filen är för stor (max {max_bytes // (1024 * 1024)} MB).", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        guild_id = interaction.guild.id
+        fmt = detect_format(file.filename)
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY) as spool:
+            try:
+                # Filen strömmas i bitar; inget ligger i minnet två gånger
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(file.url) as resp:
+                        resp.raise_for_status()
+                        async for chunk in resp.content.iter_chunked(64 * 1024):
+                            spool.write(chunk)
+                spool.seek(0)
+
+                store = await load_quotes(guild_id)
+                seen = await asyncio.to_thread(existing_hashes, list(store["items"].values()))
+                new_quotes, counts = await asyncio.to_thread(
+                    read_quotes, spool, fmt,
+                    limits.get("import_limit", 5000), limits.get("max_quote_length", 2000), seen
+                )
+            except Exception as e:
+                logger.error(f"Import av {file.filename} misslyckades: {e}")
+                await interaction.followup.send(f"❌ Kunde inte läsa filen: {e}", ephemeral=True)
+                return
+
+        # Allt sparas i en enda skrivning
+        if new_quotes:
+            now = datetime.now()
+            today = now.strftime("%d/%m/%y")
+            async with edit_quotes(guild_id) as store:
+                for q in new_quotes:
+                    quote_id = store["next_id"]
+                    store["next_id"] += 1
+                    ts = date_to_ts(q["date"]) if q["date"] else int(now.timestamp())
+                    q = {"id": quote_id, **q, "date": q["date"] or today, "ts": ts}
+                    store["items"][str(quote_id)] = q
+                    _index_add(guild_id, q)
+
+        embed = discord.Embed(title="📥 Import klar", color=0x33cc33)
+        embed.add_field(name="Importerade", value=str(len(new_quotes)))
+        embed.add_field(name="Dubbletter", value=str(counts["duplicates"]))
+        embed.add_field(name="Ogiltiga", value=str(counts["invalid"]))
+        if counts["truncated"]:
+            embed.add_field(name="⚠️ Gräns nådd", value=f"Max {limits.get('import_limit', 5000)} citat per import – resten av filen lästes inte")
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        logger.info(f"📥 Importerade {len(new_quotes)} citat till {guild_id} ({counts})")
+
+    @app_commands.command(
+        name="exportquotes",
+        description="Exportera quotes till fil",
+        extras={"cog": "Citat", "help_text": "Exporterar serverns alla citat som JSON Lines eller CSV. Endast admin."}
+    )
+    @app_commands.choices(format=[
+        app_commands.Choice(name="JSON Lines", value="jsonl"),
+        app_commands.Choice(name="CSV", value="csv"),
+    ])
+    @app_commands.default_permissions(administrator=True)
+    async def export_quotes(self, interaction: discord.Interaction, format: str = "jsonl"):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        store = await load_quotes(interaction.guild.id)
+        snapshot = list(store["items"].values())
+
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY) as spool:
+            # Serialiseringen görs i en tråd så en stor server inte stoppar event-loopen
+            count = await asyncio.to_thread(write_quotes, spool, snapshot, format)
+            await interaction.followup.send(
+                f"📤 {count} citat exporterade.",
+                file=discord.File(spool, filename=f"quotes_{interaction.guild.id}.{format}"),
+                ephemeral=True
+            )
+
 async def setup(bot):
+    bot.add_dynamic_items(QuotePageButton)
     await bot.add_cog(Quotes(bot))
+
+async def teardown(bot):
+    bot.remove_dynamic_items(QuotePageButton)
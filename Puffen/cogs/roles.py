@@ -1,12 +1,95 @@
 # ==================== ROLES.PY ====================
+import asyncio
+from typing import Dict
+
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils_core import dm, logger
+from cogs.utils_core import dm, logger
+
+# Max samtidiga reaktionsanrop mot Discord när en meny stäms av
+REACTION_CONCURRENCY = 4
 
 class Roles(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # 🗂️ Rollmenyer i minnet: {message_id: {emoji: role_id}}
+        self.menus: Dict[int, dict] = {}
+        # {guild_id: message_id} för att hitta serverns gamla meny
+        self.menu_by_guild: Dict[int, int] = {}
+        # Servrar vars meny (eller avsaknad av meny) finns i indexet
+        self.indexed_guilds = set()
+        self.index_ready = asyncio.Event()
+
+    async def cog_load(self):
+        self._index_task = asyncio.create_task(self._build_index())
+
+    async def cog_unload(self):
+        self._index_task.cancel()
+
+    async def _build_index(self):
+        """Läser in alla servrars rollmenyer när botten är redo."""
+        try:
+            await self.bot.wait_until_ready()
+            for guild in self.bot.guilds:
+                try:
+                    await self._index_guild(guild.id)
+                except Exception as e:
+                    # Servern läses i stället vid första reaktionen
+                    logger.error(f"Kunde inte indexera rollmenyn för {guild.id}: {e}")
+            logger.info(f"🗂️ Indexerade {len(self.menus)} rollmeny(er)")
+        finally:
+            # Reaktioner väntar på indexet – de får aldrig hänga kvar
+            self.index_ready.set()
+
+    async def _index_guild(self, guild_id: int):
+        menu = await dm.load_json("role_menu", guild_id, {})
+        mapping = await dm.load_json("reaction_roles", guild_id, {})
+        self._index(guild_id, menu, mapping)
+
+    def _index(self, guild_id: int, menu: dict, mapping: dict):
+        """Uppdaterar indexet för en server efter en ändring."""
+        old = self.menu_by_guild.pop(guild_id, None)
+        if old is not None:
+            self.menus.pop(old, None)
+        if menu and "message_id" in menu:
+            self.menus[menu["message_id"]] = dict(mapping)
+            self.menu_by_guild[guild_id] = menu["message_id"]
+        self.indexed_guilds.add(guild_id)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        # Servern fanns inte i bot.guilds när indexet byggdes
+        await self._index_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self._index(guild.id, {}, {})
+        self.indexed_guilds.discard(guild.id)
+
+    async def _fetch_menu(self, guild: discord.Guild, menu: dict):
+        """Hämtar rollmenyns meddelande med ett enda anrop via sparat channel_id.
+        Äldre menyer utan channel_id letas upp en gång och kompletteras."""
+        if "channel_id" in menu:
+            channel = guild.get_channel(menu["channel_id"])
+            if channel is None:
+                logger.warning(f"Rollmenyns kanal {menu['channel_id']} finns inte längre i {guild.name}")
+                return None
+            try:
+                return await channel.fetch_message(menu["message_id"])
+            except Exception as e:
+                logger.warning(f"Kunde inte hämta rollmenyn i {guild.name}: {e}")
+                return None
+
+        for ch in guild.text_channels:
+            try:
+                msg = await ch.fetch_message(menu["message_id"])
+            except Exception:
+                continue
+            await dm.save_json("role_menu", guild.id, {**menu, "channel_id": ch.id})
+            logger.info(f"Sparade kanal {ch.id} för rollmenyn i {guild.name}")
+            return msg
+        return None
 
     async def _update_menu(self, guild: discord.Guild):
         """Uppdatera rollmenyns embed och reaktioner automatiskt."""
@@ -18,17 +101,8 @@ class Roles(commands.Cog):
         if not mapping:
             return
 
-        channel = None
-        # Hämta meddelandet
-        for ch in guild.text_channels:
-            try:
-                msg = await ch.fetch_message(menu["message_id"])
-                channel = ch
-                break
-            except Exception:
-                continue
-
-        if not channel:
+        msg = await self._fetch_menu(guild, menu)
+        if msg is None:
             return
 
         embed = discord.Embed(title="Välj dina roller!", color=0x00ff00)
@@ -37,12 +111,40 @@ class Roles(commands.Cog):
 
         try:
             await msg.edit(embed=embed)
-            # Rensa gamla reaktioner och lägg till aktuella
-            await msg.clear_reactions()
-            for emoji in mapping.keys():
-                await msg.add_reaction(emoji)
         except Exception as e:
             logger.error(f"Kunde inte uppdatera rollmenyn: {e}")
+            return
+        await self._sync_reactions(msg, mapping)
+
+    async def _sync_reactions(self, msg: discord.Message, mapping: dict):
+        """Stämmer av menyns reaktioner mot kopplingarna: lägger bara till
+        saknade och tar bara bort inaktuella, så användarnas val ligger kvar."""
+        current = {str(reaction.emoji): reaction for reaction in msg.reactions}
+        missing = [emoji for emoji in mapping if emoji not in current or not current[emoji].me]
+        stale = [reaction.emoji for emoji, reaction in current.items() if emoji not in mapping]
+        if not missing and not stale:
+            return
+
+        semaphore = asyncio.Semaphore(REACTION_CONCURRENCY)
+
+        async def call(action, emoji, what: str):
+            async with semaphore:
+                try:
+                    await action(emoji)
+                except Exception as e:
+                    logger.warning(f"Kunde inte {what} reaktion {emoji}: {e}")
+
+        async def add_in_order():
+            # Reaktioner visas i den ordning de lades till, så de läggs till en
+            # i taget för att menyn ska följa kopplingarnas ordning
+            for emoji in missing:
+                await call(msg.add_reaction, emoji, "lägga till")
+
+        await asyncio.gather(
+            *(call(msg.clear_reaction, emoji, "ta bort") for emoji in stale),
+            add_in_order()
+        )
+        logger.info(f"Rollmeny avstämd: +{len(missing)} / -{len(stale)} reaktioner")
 
     @app_commands.command(
         name="rollmeny",
@@ -62,14 +164,11 @@ class Roles(commands.Cog):
 
         await interaction.response.send_message(embed=embed)
         msg = await interaction.original_response()
+        await self._sync_reactions(msg, mapping)
 
-        for emoji in mapping.keys():
-            try:
-                await msg.add_reaction(emoji)
-            except Exception as e:
-                logger.warning(f"Kunde inte lägga till reaktion {emoji}: {e}")
-
-        await dm.save_json("role_menu", interaction.guild.id, {"message_id": msg.id})
+        menu = {"message_id": msg.id, "channel_id": msg.channel.id}
+        await dm.save_json("role_menu", interaction.guild.id, menu)
+        self._index(interaction.guild.id, menu, mapping)
 
     @app_commands.command(
         name="setrole",
@@ -78,9 +177,9 @@ class Roles(commands.Cog):
     )
     @app_commands.default_permissions(administrator=True)
     async def setrole(self, interaction: discord.Interaction, emoji: str, role: discord.Role):
-        mapping = await dm.load_json("reaction_roles", interaction.guild.id, {})
-        mapping[emoji] = role.id
-        await dm.save_json("reaction_roles", interaction.guild.id, mapping)
+        async with dm.edit("reaction_roles", interaction.guild.id) as mapping:
+            mapping[emoji] = role.id
+        self._index(interaction.guild.id, await dm.load_json("role_menu", interaction.guild.id, {}), mapping)
         await interaction.response.send_message(f"✅ {emoji} → {role.mention}", ephemeral=True)
         await self._update_menu(interaction.guild)
 
@@ -91,13 +190,13 @@ class Roles(commands.Cog):
     )
     @app_commands.default_permissions(administrator=True)
     async def delete_role(self, interaction: discord.Interaction, emoji: str):
-        mapping = await dm.load_json("reaction_roles", interaction.guild.id, {})
-        if emoji not in mapping:
+        if emoji not in await dm.load_json("reaction_roles", interaction.guild.id, {}):
             await interaction.response.send_message(f"❌ Ingen koppling för {emoji}", ephemeral=True)
             return
 
-        removed = mapping.pop(emoji)
-        await dm.save_json("reaction_roles", interaction.guild.id, mapping)
+        async with dm.edit("reaction_roles", interaction.guild.id) as mapping:
+            removed = mapping.pop(emoji, None)
+        self._index(interaction.guild.id, await dm.load_json("role_menu", interaction.guild.id, {}), mapping)
         await interaction.response.send_message(f"🗑️ Tog bort {emoji} → <@&{removed}>", ephemeral=True)
         await self._update_menu(interaction.guild)
 
@@ -117,21 +216,28 @@ class Roles(commands.Cog):
             embed.add_field(name=e, value=f"<@&{r}>", inline=False)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    async def _menu_mapping(self, payload: discord.RawReactionActionEvent):
+        """Emoji → roll för menyn som reaktionen gäller, eller None. Läser
+        bara från disk första gången en server som saknas i indexet reagerar."""
+        if not self.index_ready.is_set():
+            await self.index_ready.wait()
+        mapping = self.menus.get(payload.message_id)
+        if mapping is None and payload.guild_id is not None and payload.guild_id not in self.indexed_guilds:
+            await self._index_guild(payload.guild_id)
+            mapping = self.menus.get(payload.message_id)
+        return mapping
+
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
         if payload.member and payload.member.bot:
             return
 
-        menu = await dm.load_json("role_menu", payload.guild_id, {})
-        if not menu or payload.message_id != menu.get("message_id"):
+        mapping = await self._menu_mapping(payload)
+        if mapping is None:
             return
 
-        mapping = await dm.load_json("reaction_roles", payload.guild_id, {})
         emoji_str = str(payload.emoji)
-
         guild = self.bot.get_guild(payload.guild_id)
-        channel = guild.get_channel(payload.channel_id)
-        message = await channel.fetch_message(payload.message_id)
 
         if emoji_str in mapping:
             role = guild.get_role(mapping[emoji_str])
@@ -144,7 +250,9 @@ class Roles(commands.Cog):
                 except Exception as e:
                     logger.error(f"Kunde inte lägga till roll {role.name}: {e}")
         else:
+            # Ett PartialMessage räcker för att ta bort reaktionen – inget fetch behövs
             try:
+                message = guild.get_channel(payload.channel_id).get_partial_message(payload.message_id)
                 await message.remove_reaction(payload.emoji, payload.member)
                 logger.info(f"Tog bort ogiltig reaktion {emoji_str} från {payload.member.display_name}")
             except Exception as e:
@@ -152,11 +260,10 @@ class Roles(commands.Cog):
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
-        menu = await dm.load_json("role_menu", payload.guild_id, {})
-        if not menu or payload.message_id != menu.get("message_id"):
+        mapping = await self._menu_mapping(payload)
+        if mapping is None:
             return
 
-        mapping = await dm.load_json("reaction_roles", payload.guild_id, {})
         emoji_str = str(payload.emoji)
 
         if emoji_str in mapping:
@@ -1,24 +1,27 @@
 # ==================== UTILS_CORE.PY ====================
-import asyncio, json, logging
+import asyncio, heapq, json, logging, time, weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 
 import discord
 from discord.ext import commands
 from discord import app_commands
 
+from cogs.guild_store import guild_path, read_guild, write_guild
+from shared.atomic import write_json_atomic
+
 # === Logger setup ===
 logger = logging.getLogger(__name__)
+# Hanteraren kopplas på i main.py
 temp_logger = logging.getLogger("temp_messages")
-temp_handler = logging.FileHandler("logs/temp_messages.log", encoding="utf-8")
-temp_handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
-temp_logger.addHandler(temp_handler)
-temp_logger.setLevel(logging.INFO)
 
 # === Paths ===
 DATA_DIR = Path("data")
 CONFIG_FILE = Path("config.json")
+PENDING_DELETIONS_FILE = DATA_DIR / "pending_deletions.json"
 
 # === Dataclass för användarstatistik ===
 @dataclass
@@ -38,14 +41,25 @@ class UserStats:
 # === DataManager för JSON och config ===
 class DataManager:
     def __init__(self):
-        self.locks: Dict[str, asyncio.Lock] = {}
+        # 🔒 Ett lås per fil. Bara den som håller eller väntar på låset har
+        # en stark referens, så oanvända lås städas bort av sig själva.
+        self.locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
         self.config: dict = self._load_config()
         self.config_lock = asyncio.Lock()
+        self.write_stats = {"writes": 0, "last_ms": 0.0, "max_ms": 0.0, "total_ms": 0.0, "max_encode_ms": 0.0}
+        # 🗃️ Läscache: {guild_id: (inläst, dokument)}, äldst använd först
+        self.cache: "OrderedDict[int, tuple]" = OrderedDict()
+        # Varje cachad servers funktioner som färdig JSON-text: {guild_id: {namn: text}}
+        self.encoded: Dict[int, Dict[str, str]] = {}
+        self.cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
 
     def _get_lock(self, key: str) -> asyncio.Lock:
-        if key not in self.locks:
-            self.locks[key] = asyncio.Lock()
-        return self.locks[key]
+        """Låset för en fil. Spara det inte – använd det direkt i ``async with``."""
+        lock = self.locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self.locks[key] = lock
+        return lock
 
     def _load_config(self) -> dict:
         try:
@@ -57,7 +71,8 @@ class DataManager:
         return {
             "xp": {"per_message": 5, "per_pending": 2, "base_xp": 100},
             "timeouts": {"default": 60, "quotes": 600},
-            "limits": {"dice_amount": 50, "dice_sides": 1000, "import_limit": 5000}
+            "limits": {"dice_amount": 50, "dice_sides": 1000, "import_limit": 5000},
+            "cache": {"ttl": 300, "max_entries": 512}
         }
 
     async def reload_config(self) -> dict:
@@ -69,34 +84,299 @@ class DataManager:
     def get_timeout(self, key: str = "default") -> int:
         return self.config.get("timeouts", {}).get(key, 60)
 
+    def _cache_get(self, guild_id: int) -> Optional[dict]:
+        entry = self.cache.get(guild_id)
+        if entry is None:
+            return None
+        loaded_at, doc = entry
+        if time.monotonic() - loaded_at > self.config.get("cache", {}).get("ttl", 300):
+            del self.cache[guild_id]
+            return None
+        self.cache.move_to_end(guild_id)
+        return doc
+
+    def _cache_put(self, guild_id: int, doc: dict):
+        self.cache[guild_id] = (time.monotonic(), doc)
+        self.cache.move_to_end(guild_id)
+        max_entries = self.config.get("cache", {}).get("max_entries", 512)
+        while len(self.cache) > max_entries:
+            evicted, _ = self.cache.popitem(last=False)
+            self.encoded.pop(evicted, None)
+            self.cache_stats["evictions"] += 1
+
+    def invalidate(self, guild_id: int):
+        """Glömmer cachad data, t.ex. om filen ändrats utanför botten."""
+        self.cache.pop(guild_id, None)
+        self.encoded.pop(guild_id, None)
+
+    async def _load_guild(self, guild_id: int) -> dict:
+        """Serverns hela dokument, via cachen. Anroparen håller låset."""
+        doc = self._cache_get(guild_id)
+        if doc is not None:
+            self.cache_stats["hits"] += 1
+            return doc
+        self.cache_stats["misses"] += 1
+        doc = await asyncio.to_thread(read_guild, DATA_DIR, guild_id)
+        # Nya objekt från disken; texterna kodas vid nästa skrivning
+        self.encoded.pop(guild_id, None)
+        self._cache_put(guild_id, doc)
+        return doc
+
     async def load_json(self, filename: str, guild_id: int, default: Any = None) -> Any:
-        file = DATA_DIR / f"{filename}_{guild_id}.json"
+        """Läser en funktions data ur serverns dokument. Objektet delas
+        mellan anropare och får bara ändras inne i ``edit()``."""
+        doc = self._cache_get(guild_id)
+        if doc is not None:
+            self.cache_stats["hits"] += 1
+        else:
+            file = guild_path(DATA_DIR, guild_id)
+            try:
+                async with self._get_lock(str(file)):
+                    doc = await self._load_guild(guild_id)
+            except json.JSONDecodeError:
+                logger.warning(f"Korrupt JSON i {file}, använder default")
+                return default if default is not None else {}
+            except Exception as e:
+                logger.error(f"Fel vid läsning av {file}: {e}")
+                return default if default is not None else {}
+        if filename in doc:
+            return doc[filename]
+        return default if default is not None else {}
+
+    @asynccontextmanager
+    async def edit(self, filename: str, guild_id: int, default: Any = None, convert=None):
+        """Läs-ändra-spara av en funktions data under serverns lås::
+
+            async with dm.edit("reaction_roles", guild_id) as mapping:
+                mapping[emoji] = role.id
+
+        Datan sparas när blocket lämnas utan fel. ``convert`` får byta ut
+        den inlästa datan (t.ex. uppgradera ett äldre format) innan blocket
+        körs. Skrivningen kodar datan i en tråd medan låset hålls, så delade
+        objekt från load_json får bara ändras här inne."""
+        file = guild_path(DATA_DIR, guild_id)
+        async with self._get_lock(str(file)):
+            doc = await self._load_guild(guild_id)
+            data = doc[filename] if filename in doc else (default if default is not None else {})
+            if convert is not None:
+                data = convert(data)
+            try:
+                yield data
+            except BaseException:
+                # Halvgjorda ändringar får inte ligga kvar i cachen
+                self.invalidate(guild_id)
+                raise
+            await self._write(file, guild_id, doc, filename, data)
+
+    async def save_json(self, filename: str, guild_id: int, data: Any) -> bool:
+        """Sparar ``data`` som funktionens data. Använd ``edit()`` för att
+        ändra befintlig data – ``data`` får inte ändras medan den sparas."""
+        file = guild_path(DATA_DIR, guild_id)
         try:
             async with self._get_lock(str(file)):
-                with open(file, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except FileNotFoundError:
-            return default if default is not None else {}
-        except json.JSONDecodeError:
-            logger.warning(f"Korrupt JSON i {file}, använder default")
-            return default if default is not None else {}
+                doc = await self._load_guild(guild_id)
+                return await self._write(file, guild_id, doc, filename, data)
         except Exception as e:
-            logger.error(f"Fel vid läsning av {file}: {e}")
-            return default if default is not None else {}
+            logger.error(f"Fel vid sparande av {filename} till {file}: {e}")
+            return False
 
-    async def save_json(self, filename: str, guild_id: int, data: dict) -> bool:
-        file = DATA_DIR / f"{filename}_{guild_id}.json"
+    async def _write(self, file: Path, guild_id: int, doc: dict, filename: str, data: Any) -> bool:
+        """Skriver dokumentet i en tråd. Anroparen håller serverns lås, så
+        ingen ändrar datan medan tråden kodar den. Bara den ändrade
+        funktionen kodas om; övriga tas från ``encoded``."""
         try:
-            async with self._get_lock(str(file)):
-                DATA_DIR.mkdir(exist_ok=True)
-                await asyncio.to_thread(lambda: json.dump(data, open(file, "w", encoding="utf-8"), indent=2))
-                return True
+            # Write-through: nästa läsning får det vi sparar
+            doc[filename] = data
+            started = time.perf_counter()
+            encoded, encode_ms = await asyncio.to_thread(
+                write_guild, file, doc, self.encoded.get(guild_id, {}), filename
+            )
+            self._record_write((time.perf_counter() - started) * 1000, encode_ms, file)
+            self.encoded[guild_id] = encoded
+            self._cache_put(guild_id, doc)
+            return True
         except Exception as e:
-            logger.error(f"Fel vid sparande till {file}: {e}")
+            self.invalidate(guild_id)
+            logger.error(f"Fel vid sparande av {filename} till {file}: {e}")
             return False
 
+    def _record_write(self, ms: float, encode_ms: float, file: Path):
+        stats = self.write_stats
+        stats["writes"] += 1
+        stats["last_ms"] = ms
+        stats["max_ms"] = max(stats["max_ms"], ms)
+        stats["total_ms"] += ms
+        stats["max_encode_ms"] = max(stats["max_encode_ms"], encode_ms)
+        logger.debug(f"💾 Sparade {file} på {ms:.1f} ms (varav {encode_ms:.1f} ms kodning)")
+
 dm = DataManager()
 
+# === Schemaläggare för radering av tillfälliga meddelanden ===
+# Discord tillåter bulk delete bara för meddelanden yngre än 14 dagar
+BULK_DELETE_MAX_AGE = 14 * 24 * 3600 - 60
+# Väntande raderingar sparas till disk högst så här ofta (sekunder)
+PERSIST_INTERVAL = 5.0
+
+class DeletionScheduler:
+    """En task för alla tillfälliga meddelanden i stället för en sovande
+    coroutine per meddelande. Väntande raderingar ligger i en heap sorterad
+    på tidpunkt och sparas till disk, så de överlever en omstart."""
+
+    def __init__(self, file: Path):
+        self.file = file
+        # (radera vid unix-tid, channel_id, message_id)
+        self.heap: List[Tuple[float, int, int]] = []
+        self.bot = None
+        # Kanalerna meddelandena skickades i, så de kan raderas även innan
+        # start() fått botten (och utan fetch_channel)
+        self.channels: Dict[int, Any] = {}
+        self.stats = {"scheduled": 0, "deleted": 0, "bulk_calls": 0, "single_calls": 0, "failed": 0}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+        self._last_persist = 0.0
+        self._stopping = False
+        self._loaded = False
+
+    def start(self, bot=None):
+        """Läser in sparade raderingar och startar schemaläggaren."""
+        if bot is not None:
+            self.bot = bot
+        if self._task is None:
+            self._stopping = False
+            if not self._loaded:
+                self._loaded = True
+                self.heap.extend(self._load())
+                heapq.heapify(self.heap)
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"🗑️ Schemaläggare startad med {len(self.heap)} väntande raderingar")
+
+    async def stop(self):
+        if self._task is not None:
+            # wait_for kan svälja en cancel som sammanfaller med en väckning
+            self._stopping = True
+            self._wakeup.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._persist()
+
+    def schedule(self, message: discord.Message, delay: float):
+        """Raderar meddelandet om ``delay`` sekunder. Startar schemaläggaren
+        om ingen har gjort det än, så inget meddelande blir liggande kvar."""
+        self.channels[message.channel.id] = message.channel
+        heapq.heappush(self.heap, (time.time() + delay, message.channel.id, message.id))
+        self.stats["scheduled"] += 1
+        self._dirty = True
+        self._wakeup.set()
+        if self._task is None:
+            self.start()
+
+    def _load(self) -> list:
+        try:
+            with open(self.file, "r", encoding="utf-8") as f:
+                return [tuple(entry) for entry in json.load(f)]
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logger.error(f"Kunde inte läsa {self.file}: {e}")
+            return []
+
+    async def _persist(self):
+        self._dirty = False
+        self._last_persist = time.monotonic()
+        try:
+            self.file.parent.mkdir(exist_ok=True)
+            await asyncio.to_thread(write_json_atomic, self.file, list(self.heap))
+        except Exception as e:
+            self._dirty = True
+            logger.error(f"Kunde inte spara väntande raderingar: {e}")
+
+    async def _run(self):
+        while not self._stopping:
+            self._wakeup.clear()
+            now = time.time()
+            due = []
+            while self.heap and self.heap[0][0] <= now:
+                due.append(heapq.heappop(self.heap))
+            if due:
+                self._dirty = True
+                try:
+                    await self._delete_due(due)
+                except Exception as e:
+                    logger.error(f"Fel vid radering av tillfälliga meddelanden: {e}")
+
+            timeout = max(0.0, self.heap[0][0] - time.time()) if self.heap else None
+            if self._dirty:
+                persist_in = self._last_persist + PERSIST_INTERVAL - time.monotonic()
+                if persist_in <= 0:
+                    await self._persist()
+                else:
+                    timeout = persist_in if timeout is None else min(timeout, persist_in)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _delete_due(self, due: list):
+        """Raderar förfallna meddelanden, grupperade per kanal."""
+        by_channel: Dict[int, List[int]] = {}
+        for _, channel_id, message_id in due:
+            by_channel.setdefault(channel_id, []).append(message_id)
+
+        for channel_id, message_ids in by_channel.items():
+            channel = self.bot.get_channel(channel_id) if self.bot else None
+            channel = channel or self.channels.get(channel_id)
+            if channel is None and self.bot is None:
+                # Sparad radering från förra körningen; försök igen när cogen gett oss botten
+                retry_at = time.time() + PERSIST_INTERVAL
+                for message_id in message_ids:
+                    heapq.heappush(self.heap, (retry_at, channel_id, message_id))
+                continue
+            if channel is None:
+                try:
+                    channel = await self.bot.fetch_channel(channel_id)
+                except Exception as e:
+                    self.stats["failed"] += len(message_ids)
+                    temp_logger.warning(f"Kanal {channel_id} finns inte, hoppar över {len(message_ids)} meddelanden: {e}")
+                    continue
+
+            cutoff = time.time() - BULK_DELETE_MAX_AGE
+            young, single = [], []
+            for message_id in message_ids:
+                is_young = discord.utils.snowflake_time(message_id).timestamp() > cutoff
+                (young if is_young else single).append(message_id)
+            if len(young) > 1 and hasattr(channel, "delete_messages"):
+                for start in range(0, len(young), 100):
+                    chunk = young[start:start + 100]
+                    try:
+                        await channel.delete_messages([discord.Object(id=i) for i in chunk])
+                        self.stats["bulk_calls"] += 1
+                        self.stats["deleted"] += len(chunk)
+                    except discord.HTTPException as e:
+                        # T.ex. saknad Manage Messages – radera ett i taget
+                        temp_logger.info(f"Bulk delete misslyckades i {channel_id} ({e}), raderar ett i taget")
+                        single.extend(chunk)
+            else:
+                single.extend(young)
+
+            for message_id in single:
+                try:
+                    self.stats["single_calls"] += 1
+                    await discord.PartialMessage(channel=channel, id=message_id).delete()
+                    self.stats["deleted"] += 1
+                except discord.NotFound:
+                    self.stats["deleted"] += 1
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    temp_logger.warning(f"Kunde inte radera {message_id} i {channel_id}: {e}")
+        temp_logger.info(f"[TEMP] Raderade {len(due)} meddelande(n) i {len(by_channel)} kanal(er)")
+
+scheduler = DeletionScheduler(PENDING_DELETIONS_FILE)
+
 # === Tillfälligt meddelande med AI‑flagga och config‑styrd timeout ===
 async def send_temp(target, content: Optional[str] = None, embed: Optional[discord.Embed] = None, timeout_key: str = "default", is_ai: bool = False):
     """
@@ -111,18 +391,29 @@ async def send_temp(target, content: Optional[str] = None, embed: Optional[disco
 
         delay = dm.get_timeout(timeout_key)
         msg = await target.send(content=content, embed=embed)
+        scheduler.schedule(msg, delay)
         temp_logger.info(f"[TEMP] Skickade meddelande som raderas om {delay}s: {content or embed.title}")
-        await asyncio.sleep(delay)
-        await msg.delete()
-        temp_logger.info(f"[TEMP] Raderade meddelande: {content or embed.title}")
+        return msg
     except Exception as e:
         temp_logger.warning(f"Fel i send_temp: {e}")
 
+async def respond_temp(interaction: discord.Interaction, timeout_key: str = "default", **kwargs):
+    """Svarar på en interaction och låter schemaläggaren radera svaret."""
+    response = await interaction.response.send_message(**kwargs)
+    message = getattr(response, "resource", None) or await interaction.original_response()
+    scheduler.schedule(message, dm.get_timeout(timeout_key))
+
 # === Slash-kommando för att ladda om config ===
 class UtilsCore(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def cog_load(self):
+        scheduler.start(self.bot)
+
+    async def cog_unload(self):
+        await scheduler.stop()
+
     @app_commands.command(
         name="reloadconfig",
         description="Ladda om config.json",
@@ -138,6 +429,26 @@ class UtilsCore(commands.Cog):
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @app_commands.command(
+        name="cachestats",
+        description="Visa statistik för datacachen",
+        extras={"cog": "System", "help_text": "Visar träffar, missar och skrivtider för datalagret."}
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def cache_stats(self, interaction: discord.Interaction):
+        cache, writes = dm.cache_stats, dm.write_stats
+        lookups = cache["hits"] + cache["misses"]
+        hit_rate = cache["hits"] / lookups * 100 if lookups else 0.0
+        avg_ms = writes["total_ms"] / writes["writes"] if writes["writes"] else 0.0
+        embed = discord.Embed(title="🗃️ Datacache", color=0x0099ff)
+        embed.add_field(name="Träffar", value=str(cache["hits"]))
+        embed.add_field(name="Missar", value=str(cache["misses"]))
+        embed.add_field(name="Träffgrad", value=f"{hit_rate:.1f}%")
+        embed.add_field(name="Poster", value=f"{len(dm.cache)} (utkastade: {cache['evictions']})")
+        embed.add_field(name="Skrivningar", value=f"{writes['writes']} (snitt {avg_ms:.1f} ms, max {writes['max_ms']:.1f} ms)")
+        embed.add_field(name="Kodning (i tråd)", value=f"max {writes['max_encode_ms']:.1f} ms")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 # === Hjälpembed-generator ===
 def generate_help_embed(commands: list, is_admin: bool) -> discord.Embed:
     grouped: Dict[str, list] = {}
@@ -1,33 +1,56 @@
 # ==================== MAIN.PY ====================
-import discord, os, asyncio, logging
-from logging.handlers import RotatingFileHandler
+import discord, os, sys, asyncio, logging, time
 from discord.ext import commands
 from discord import app_commands
 from dotenv import load_dotenv
-from config import config  # <-- laddar din config
+from config import config, BASE_DIR  # <-- laddar din config
 
-# Se till att log-mappen finns
-os.makedirs("logs", exist_ok=True)
+# Kod som delas med Puffen-RPG ligger i shared/ i repots rot
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.logqueue import queued, rotating_file, stop_listeners
+from shared.command_sync import force_requested, sync_if_changed
+
+# Hash per scope för senast synkade kommandoträd
+COMMAND_SYNC_FILE = "data/command_sync.json"
+
+# Se till att log-mappen finns – bredvid botten oavsett var den startas
+LOG_DIR = os.path.join(BASE_DIR, "logs")
+os.makedirs(LOG_DIR, exist_ok=True)
 os.makedirs("data", exist_ok=True)
 
+# All loggning går via köer – filerna skrivs, roteras och gzippas i bakgrundstrådar
+log_level = getattr(logging, str(config.logging.get("level", "INFO")).upper(), logging.INFO)
+log_rotation = {
+    "max_mb": config.logging.get("max_size_mb", 5),
+    "backups": config.logging.get("backup_count", 3),
+    "compress": config.logging.get("compress", True),
+}
+
 # Grundläggande loggning till konsolen
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logging.getLogger().setLevel(log_level)
+if config.logging.get("console", True):
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logging.getLogger().addHandler(queued(console_handler))
 logger = logging.getLogger(__name__)
 
 # Kommandologg (roterande)
 command_logger = logging.getLogger("commands")
-command_handler = RotatingFileHandler("logs/commands.log", maxBytes=5*1024*1024, backupCount=3, encoding="utf-8")
-command_handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
-command_logger.addHandler(command_handler)
 command_logger.setLevel(logging.INFO)
 
 # Errorlogg (roterande)
 error_logger = logging.getLogger("errors")
-error_handler = RotatingFileHandler("logs/errors.log", maxBytes=5*1024*1024, backupCount=3, encoding="utf-8")
-error_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-error_logger.addHandler(error_handler)
 error_logger.setLevel(logging.WARNING)
 
+# Logg för tillfälliga meddelanden (respond_temp)
+temp_logger = logging.getLogger("temp_messages")
+temp_logger.setLevel(logging.INFO)
+
+if config.logging.get("file", True):
+    command_logger.addHandler(queued(rotating_file(os.path.join(LOG_DIR, "commands.log"), "%(asctime)s - %(message)s", **log_rotation)))
+    error_logger.addHandler(queued(rotating_file(os.path.join(LOG_DIR, "errors.log"), "%(asctime)s - %(levelname)s - %(message)s", **log_rotation)))
+    temp_logger.addHandler(queued(rotating_file(os.path.join(LOG_DIR, "temp_messages.log"), "%(asctime)s - %(message)s", **log_rotation)))
+
 # Token och intents
 BOT_NAME = "Puffen"
 TOKEN = os.getenv(f"{BOT_NAME.upper().replace('-', '_')}_TOKEN")
@@ -61,21 +84,26 @@ async def setup_hook():
         except Exception as e:
             logger.error(f"⚠️ Kunde inte ladda {ext}: {e}")
 
-    # Synka slash-commands
+    # Synka slash-commands – bara om trädet ändrats sedan förra synken (eller --force-sync)
+    force = force_requested()
+    sync_started = time.perf_counter()
     for guild in bot.guilds:
         try:
             bot.tree.clear_commands(guild=guild)
-            synced = await bot.tree.sync(guild=guild)
-            logger.info(f"🧹 Synkade {len(synced)} kommandon för {guild.name} ({guild.id})")
+            synced = await sync_if_changed(bot.tree, COMMAND_SYNC_FILE, guild=guild, force=force)
+            if synced is not None:
+                logger.info(f"🧹 Synkade {len(synced)} kommandon för {guild.name} ({guild.id})")
         except Exception as e:
             logger.error(f"⚠️ Kunde inte synka kommandon för {guild.name}: {e}")
 
     if not bot.guilds:
         try:
-            synced = await bot.tree.sync()
-            logger.info(f"🌍 Global sync: {len(synced)} kommandon registrerade")
+            synced = await sync_if_changed(bot.tree, COMMAND_SYNC_FILE, force=force)
+            if synced is not None:
+                logger.info(f"🌍 Global sync: {len(synced)} kommandon registrerade")
         except Exception as e:
             logger.error(f"⚠️ Global sync misslyckades: {e}")
+    logger.info(f"⏱️ Kommandosynk klar på {(time.perf_counter() - sync_started) * 1000:.0f} ms")
 
 @bot.event
 async def on_ready():
@@ -128,3 +156,5 @@ if __name__ == "__main__":
     except Exception as e:
         logger.error(f"🛑 Botten kraschade: {e}")
         raise
+    finally:
+        stop_listeners()
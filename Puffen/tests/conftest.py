@@ -0,0 +1,15 @@
+# ==================== CONFTEST.PY ====================
+"""Testerna körs från en tom arbetsmapp (botten använder relativa
+sökvägar som data/ och logs/) med Puffen-mappen på sökvägen, så
+cogs importeras som cogs.<namn> precis som när main.py laddar dem."""
+import os, sys, tempfile
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+# shared/ i repots rot, som main.py lägger till
+sys.path.insert(0, os.path.dirname(BOT_DIR))
+
+WORK_DIR = tempfile.mkdtemp(prefix="puffen-tests-")
+os.makedirs(os.path.join(WORK_DIR, "logs"))
+os.makedirs(os.path.join(WORK_DIR, "data"))
+os.chdir(WORK_DIR)
@@ -0,0 +1,24 @@
+# ==================== TEST_ATOMIC_WRITE.PY ====================
+import json, os
+
+import pytest
+
+from shared.atomic import write_json_atomic, write_text_atomic
+
+def test_rename_is_made_durable(tmp_path, monkeypatch):
+    synced = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(os.path.realpath(f"/proc/self/fd/{fd}")) or fsync(fd))
+    write_json_atomic(tmp_path / "a.json", {"å": 1})
+    assert json.loads((tmp_path / "a.json").read_text(encoding="utf-8")) == {"å": 1}
+    # Först den temporära filen, sedan mappen med det nya namnet
+    assert synced[-1] == os.path.realpath(tmp_path)
+
+def test_failed_write_keeps_old_file(tmp_path, monkeypatch):
+    target = tmp_path / "a.json"
+    write_text_atomic(target, "gammal")
+    monkeypatch.setattr(os, "replace", lambda *_: (_ for _ in ()).throw(OSError("disk full")))
+    with pytest.raises(OSError):
+        write_text_atomic(target, "ny")
+    assert target.read_text(encoding="utf-8") == "gammal"
+    assert os.listdir(tmp_path) == ["a.json"]
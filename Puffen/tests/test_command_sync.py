@@ -0,0 +1,80 @@
+# ==================== TEST_COMMAND_SYNC.PY ====================
+import asyncio, sys
+from types import SimpleNamespace
+
+from shared.command_sync import FORCE_FLAG, force_requested, sync_if_changed
+
+class FakeCommand:
+    def __init__(self, name: str, description: str = "test"):
+        self.name = name
+        self.description = description
+
+    def to_dict(self, tree):
+        return {"type": 1, "name": self.name, "description": self.description}
+
+class FakeTree:
+    """Ett kommandoträd som räknar sina sync-anrop."""
+    def __init__(self, *commands):
+        self.client = SimpleNamespace(application_id=1)
+        self.commands = {None: list(commands)}
+        self.syncs = []
+
+    def get_commands(self, guild=None):
+        return self.commands.get(guild.id if guild else None, [])
+
+    async def sync(self, guild=None):
+        self.syncs.append(guild.id if guild else None)
+        return self.get_commands(guild=guild)
+
+def test_unchanged_tree_skips_sync(tmp_path):
+    state_file = str(tmp_path / "command_sync.json")
+
+    async def main():
+        tree = FakeTree(FakeCommand("quote"), FakeCommand("roll"))
+        assert await sync_if_changed(tree, state_file) is not None
+        assert await sync_if_changed(tree, state_file) is None
+        # Laddordningen påverkar inte hashen
+        tree.commands[None].reverse()
+        assert await sync_if_changed(tree, state_file) is None
+        assert tree.syncs == [None]
+    asyncio.run(main())
+
+def test_changed_command_or_new_scope_syncs(tmp_path):
+    state_file = str(tmp_path / "command_sync.json")
+
+    async def main():
+        tree = FakeTree(FakeCommand("quote"))
+        await sync_if_changed(tree, state_file)
+        tree.commands[None] = [FakeCommand("quote", "ny beskrivning")]
+        assert await sync_if_changed(tree, state_file) is not None
+
+        guild = SimpleNamespace(id=42)
+        tree.commands[42] = [FakeCommand("setrole")]
+        assert await sync_if_changed(tree, state_file, guild=guild) is not None
+        assert await sync_if_changed(tree, state_file, guild=guild) is None
+        assert tree.syncs == [None, None, 42]
+    asyncio.run(main())
+
+def test_force_overrides_unchanged_hash(tmp_path, monkeypatch):
+    state_file = str(tmp_path / "command_sync.json")
+
+    async def main():
+        tree = FakeTree(FakeCommand("quote"))
+        await sync_if_changed(tree, state_file)
+        assert await sync_if_changed(tree, state_file, force=True) is not None
+        assert tree.syncs == [None, None]
+    asyncio.run(main())
+    monkeypatch.setattr(sys, "argv", ["main.py", FORCE_FLAG])
+    assert force_requested()
+
+def test_missing_or_corrupt_state_file_syncs(tmp_path):
+    async def main():
+        state = tmp_path / "saknas" / "command_sync.json"
+        tree = FakeTree(FakeCommand("quote"))
+        assert await sync_if_changed(tree, str(state)) is not None
+        state.write_text("{inte json", encoding="utf-8")
+        assert await sync_if_changed(tree, str(state)) is not None
+        # Filen skrevs om och nästa start hoppar över synken
+        assert await sync_if_changed(tree, str(state)) is None
+        assert tree.syncs == [None, None]
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+# ==================== TEST_DATA_MANAGER.PY ====================
+import asyncio, json, os, threading
+
+import cogs.roles
+from cogs import guild_store
+from cogs.guild_store import guild_path
+from cogs.utils_core import DATA_DIR, DataManager
+
+def test_save_writes_through_to_cache():
+    async def main():
+        dm = DataManager()
+        data = {"a": 1}
+        assert await dm.save_json("quotes", 101, data)
+        assert await dm.load_json("quotes", 101) is data
+        assert dm.cache_stats["hits"] == 1
+        with open(guild_path(DATA_DIR, 101), encoding="utf-8") as f:
+            assert json.load(f) == {"quotes": {"a": 1}}
+    asyncio.run(main())
+
+def test_edits_interleave_with_saves():
+    """Ändringar via edit() och sparningar turas om under serverns lås;
+    ingen skrivning får krascha eller tappa en ändring."""
+    async def main():
+        dm = DataManager()
+
+        async def add(i):
+            async with dm.edit("quotes", 102, {"items": {}}) as store:
+                store["items"][str(i)] = {"n": i}
+
+        async def save_other(i):
+            return await dm.save_json("role_menu", 102, {"message_id": i})
+
+        results = await asyncio.gather(*(add(i) for i in range(200)), *(save_other(i) for i in range(40)))
+        assert all(r is not False for r in results)
+        with open(guild_path(DATA_DIR, 102), encoding="utf-8") as f:
+            saved = json.load(f)
+        assert saved["quotes"]["items"] == {str(i): {"n": i} for i in range(200)}
+        assert "message_id" in saved["role_menu"]
+    asyncio.run(main())
+
+def test_save_only_encodes_the_changed_section(monkeypatch):
+    async def main():
+        dm = DataManager()
+        await dm.save_json("quotes", 105, {"items": {str(i): {"n": i} for i in range(100)}})
+        encoded = []
+        real = guild_store.encode_section
+        monkeypatch.setattr(guild_store, "encode_section", lambda data: encoded.append(data) or real(data))
+        async with dm.edit("reaction_roles", 105) as mapping:
+            mapping["🐧"] = 1
+        assert encoded == [{"🐧": 1}]
+        with open(guild_path(DATA_DIR, 105), encoding="utf-8") as f:
+            saved = json.load(f)
+        assert saved["reaction_roles"] == {"🐧": 1}
+        assert len(saved["quotes"]["items"]) == 100
+    asyncio.run(main())
+
+def test_encoding_runs_off_the_event_loop(monkeypatch):
+    async def main():
+        dm = DataManager()
+        loop_thread = threading.get_ident()
+        threads = []
+        real = guild_store.encode_section
+        monkeypatch.setattr(guild_store, "encode_section", lambda data: threads.append(threading.get_ident()) or real(data))
+        await dm.save_json("quotes", 106, {"items": {}})
+        assert threads and loop_thread not in threads
+    asyncio.run(main())
+
+def test_failed_edit_is_not_saved():
+    async def main():
+        dm = DataManager()
+        await dm.save_json("reaction_roles", 107, {"a": 1})
+        try:
+            async with dm.edit("reaction_roles", 107) as mapping:
+                mapping["b"] = 2
+                raise RuntimeError("avbrutet")
+        except RuntimeError:
+            pass
+        # Cachen glömdes, så den halvgjorda ändringen läses inte tillbaka
+        assert await dm.load_json("reaction_roles", 107) == {"a": 1}
+    asyncio.run(main())
+
+def test_reloaded_cache_config_reaches_the_cogs_dm():
+    async def main():
+        dm = cogs.roles.dm
+        with open("config.json", "w", encoding="utf-8") as f:
+            json.dump({"cache": {"ttl": -1, "max_entries": 1}}, f)
+        try:
+            await dm.reload_config()
+            await dm.save_json("role_menu", 103, {"x": 1})
+            misses = dm.cache_stats["misses"]
+            # ttl -1: allt i cachen har gått ut, så läsningen går till disk
+            assert await dm.load_json("role_menu", 103) == {"x": 1}
+            assert dm.cache_stats["misses"] == misses + 1
+            await dm.save_json("role_menu", 104, {"y": 1})
+            assert len(dm.cache) == 1
+        finally:
+            os.remove("config.json")
+            await dm.reload_config()
+    asyncio.run(main())
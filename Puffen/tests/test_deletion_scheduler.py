@@ -0,0 +1,103 @@
+# ==================== TEST_DELETION_SCHEDULER.PY ====================
+import asyncio, itertools, json, time
+from datetime import datetime, timezone
+
+from discord.utils import time_snowflake
+
+import cogs.fun, cogs.help, cogs.quotes, cogs.roles
+from cogs import utils_core
+from cogs.utils_core import DeletionScheduler
+
+_ids = itertools.count()
+
+class FakeChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.deleted = []
+
+    async def delete_messages(self, messages):
+        self.deleted.extend(m.id for m in messages)
+
+class FakeMessage:
+    def __init__(self, channel: FakeChannel):
+        self.channel = channel
+        self.id = time_snowflake(datetime.now(timezone.utc)) + next(_ids)
+
+class FakeResponse:
+    def __init__(self, channel: FakeChannel):
+        self.channel = channel
+
+    async def send_message(self, **kwargs):
+        return type("Callback", (), {"resource": FakeMessage(self.channel)})()
+
+class FakeInteraction:
+    def __init__(self, channel: FakeChannel):
+        self.response = FakeResponse(channel)
+
+class FakeBot:
+    def __init__(self, *channels):
+        self.channels = {c.id: c for c in channels}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+async def _wait_for(predicate, timeout: float = 3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "tidsgränsen gick ut"
+        await asyncio.sleep(0.01)
+
+def test_cogs_share_one_utils_core():
+    assert cogs.fun.respond_temp is utils_core.respond_temp
+    assert cogs.quotes.respond_temp is utils_core.respond_temp
+    assert cogs.quotes.dm is utils_core.dm
+    assert cogs.roles.dm is utils_core.dm
+    assert cogs.help.generate_help_embed is utils_core.generate_help_embed
+
+def test_respond_temp_deletes_without_cog_load():
+    """Samma väg som /coinflip: inget cog_load har startat schemaläggaren."""
+    async def main():
+        utils_core.dm.config.setdefault("timeouts", {})["default"] = 0
+        channel = FakeChannel(1)
+        await cogs.fun.respond_temp(FakeInteraction(channel), content="a")
+        await cogs.fun.respond_temp(FakeInteraction(channel), content="b")
+        assert utils_core.scheduler._task is not None
+        await _wait_for(lambda: len(channel.deleted) == 2)
+        await utils_core.scheduler.stop()
+        with open(utils_core.scheduler.file, encoding="utf-8") as f:
+            assert json.load(f) == []
+    asyncio.run(main())
+
+def test_pending_deletions_survive_restart(tmp_path):
+    file = tmp_path / "pending.json"
+    channel = FakeChannel(2)
+    messages = [FakeMessage(channel), FakeMessage(channel)]
+
+    async def first_run():
+        scheduler = DeletionScheduler(file)
+        for message in messages:
+            scheduler.schedule(message, 0.3)
+        await scheduler.stop()
+
+    async def second_run():
+        scheduler = DeletionScheduler(file)
+        scheduler.start(FakeBot(channel))
+        assert len(scheduler.heap) == 2
+        await _wait_for(lambda: len(channel.deleted) == 2)
+        await scheduler.stop()
+
+    asyncio.run(first_run())
+    assert channel.deleted == []
+    assert len(json.loads(file.read_text(encoding="utf-8"))) == 2
+    asyncio.run(second_run())
+    assert sorted(channel.deleted) == sorted(m.id for m in messages)
+
+def test_restart_does_not_duplicate_loaded_entries(tmp_path):
+    async def main():
+        scheduler = DeletionScheduler(tmp_path / "pending.json")
+        scheduler.schedule(FakeMessage(FakeChannel(3)), 60)
+        await scheduler.stop()
+        scheduler.start()
+        assert len(scheduler.heap) == 1
+        await scheduler.stop()
+    asyncio.run(main())
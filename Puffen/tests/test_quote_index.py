@@ -0,0 +1,67 @@
+# ==================== TEST_QUOTE_INDEX.PY ====================
+import asyncio, math, random
+
+import cogs.quotes
+from cogs.quote_index import QuoteIndex, tokenize
+from cogs.utils_core import dm
+
+def ranking_keys(index: QuoteIndex, query: str, keys) -> list:
+    """(antal träffade ord, tf·idf) per citat, avrundat så lika poäng jämförs lika."""
+    tokens = set(tokenize(query))
+    result = []
+    for key in keys:
+        hits = [t for t in tokens if index.terms[key].get(t)]
+        score = sum(index.terms[key][t] * math.log(1 + len(index) / len(index.postings[t])) for t in hits)
+        result.append((len(hits), round(score, 9)))
+    return result
+
+def test_common_term_matches_are_not_skipped():
+    quotes = {"1": {"quote": "puffin", "user": "Anna"}}
+    for i in range(2, 60):
+        quotes[str(i)] = {"quote": f"och {i}", "user": "Bosse"}
+    hits = QuoteIndex.build(quotes.items()).search("puffin och", limit=10)
+    assert len(hits) == 10
+    assert hits[0][0]["quote"] == "puffin"
+
+def test_matches_reference_ranking():
+    rng = random.Random(5)
+    words = ["och", "är", "kaffe", "katt", "regn", "pizza", "bugg"]
+    quotes = {
+        str(i): {"quote": " ".join(rng.choices(words, [8, 6, 3, 2, 2, 1, 1], k=5)), "user": rng.choice(["Anna", "Bosse"])}
+        for i in range(400)
+    }
+    index = QuoteIndex.build(quotes.items())
+    key_of = {id(q): key for key, q in quotes.items()}
+    for query in ("och", "och är", "kaffe katt", "pizza bugg regn", "anna och", "saknas", "saknas kaffe"):
+        # Facit: alla citat rankade utan index
+        expected = sorted((k for k in ranking_keys(index, query, quotes) if k[0]), reverse=True)
+        for limit in (3, 10, 50):
+            got = ranking_keys(index, query, [key_of[id(q)] for q, _ in index.search(query, limit)])
+            assert got == expected[:limit], (query, limit)
+
+def test_index_survives_cache_expiry_without_rebuild(monkeypatch):
+    async def main():
+        builds = []
+        build = cogs.quotes._build_indexes
+        monkeypatch.setattr(cogs.quotes, "_build_indexes", lambda items: builds.append(1) or build(items))
+        guild = 501
+        await dm.save_json("quotes", guild, {
+            "next_id": 3, "timestamps": True,
+            "items": {"1": {"id": 1, "quote": "kaffe", "user": "Anna", "date": "01/01/25", "ts": 1735686000},
+                      "2": {"id": 2, "quote": "regn", "user": "Bosse", "date": "02/01/25", "ts": 1735772400}}
+        })
+        _, index, _ = await cogs.quotes.quote_indexes(guild)
+
+        # Cachen går ut; citaten läses in som nya objekt och ändras utanför indexet
+        dm.invalidate(guild)
+        store = await cogs.quotes.load_quotes(guild)
+        del store["items"]["2"]
+        store["items"]["3"] = {"id": 3, "quote": "kaffe igen", "user": "Cissi", "date": "03/01/25", "ts": 1735858800}
+        _, again, dates = await cogs.quotes.quote_indexes(guild)
+
+        assert builds == [1]
+        assert again is index
+        assert sorted(index.quotes) == ["1", "3"]
+        assert dates.between() == [1, 3]
+        assert [q["id"] for q, _ in index.search("kaffe")] == [1, 3]
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+# ==================== TEST_ROLES.PY ====================
+import asyncio, random
+from types import SimpleNamespace
+
+from cogs.roles import Roles
+
+class FakeMenu:
+    """Ett meddelande vars reaktioner hamnar i den ordning anropen blir klara."""
+    def __init__(self, reactions=()):
+        self.reactions = [SimpleNamespace(emoji=e, me=True) for e in reactions]
+        self.rng = random.Random(3)
+
+    async def add_reaction(self, emoji):
+        await asyncio.sleep(self.rng.random() / 100)
+        self.reactions.append(SimpleNamespace(emoji=emoji, me=True))
+
+    async def clear_reaction(self, emoji):
+        await asyncio.sleep(self.rng.random() / 100)
+        self.reactions = [r for r in self.reactions if r.emoji != emoji]
+
+def test_missing_reactions_follow_mapping_order():
+    async def main():
+        roles = Roles(bot=None)
+        msg = FakeMenu(reactions=["🍎", "🗑️", "🧹"])
+        mapping = {e: i for i, e in enumerate(["🍎", "🐸", "🦆", "🐝", "🦊", "🐢"])}
+        await roles._sync_reactions(msg, mapping)
+        assert [r.emoji for r in msg.reactions] == list(mapping)
+    asyncio.run(main())
+
+def test_guild_missing_from_index_is_loaded_on_first_reaction():
+    async def main():
+        from cogs.utils_core import dm
+        roles = Roles(bot=None)
+        roles.index_ready.set()
+        await dm.save_json("role_menu", 601, {"message_id": 9001, "channel_id": 1})
+        await dm.save_json("reaction_roles", 601, {"🐸": 42})
+
+        payload = SimpleNamespace(message_id=9001, guild_id=601)
+        assert await roles._menu_mapping(payload) == {"🐸": 42}
+        # En server utan meny läses bara in en gång
+        other = SimpleNamespace(message_id=9002, guild_id=602)
+        assert await roles._menu_mapping(other) is None
+        assert 602 in roles.indexed_guilds
+    asyncio.run(main())
+
+def test_joined_guild_is_indexed():
+    async def main():
+        from cogs.utils_core import dm
+        roles = Roles(bot=None)
+        await dm.save_json("role_menu", 603, {"message_id": 9003, "channel_id": 1})
+        await dm.save_json("reaction_roles", 603, {"🦆": 7})
+        await roles.on_guild_join(SimpleNamespace(id=603))
+        assert roles.menus[9003] == {"🦆": 7}
+        await roles.on_guild_remove(SimpleNamespace(id=603))
+        assert 9003 not in roles.menus
+    asyncio.run(main())
+
+def test_failing_guild_does_not_block_the_index():
+    async def main():
+        async def ready():
+            pass
+        bot = SimpleNamespace(wait_until_ready=ready, guilds=[SimpleNamespace(id=604), SimpleNamespace(id=605)])
+        roles = Roles(bot=bot)
+        indexed = []
+
+        async def index_guild(guild_id):
+            if guild_id == 604:
+                raise OSError("trasig fil")
+            indexed.append(guild_id)
+
+        roles._index_guild = index_guild
+        await roles._build_index()
+        assert indexed == [605]
+        assert roles.index_ready.is_set()
+    asyncio.run(main())
@@ -11,6 +11,7 @@ source ./venv/bin/activate
 
 restart_bot() {
     BOT_NAME=$1
+    shift
     BOT_DIR="./$BOT_NAME"
     MAIN="$BOT_DIR/main.py"
     LOG="$BOT_DIR/logs/bot.log"
@@ -52,7 +53,7 @@ restart_bot() {
     git pull origin main
 
     echo "🚀 Startar $BOT_NAME..."
-    nohup python3 "$MAIN" > "$LOG" 2>&1 &
+    nohup python3 "$MAIN" "$@" > "$LOG" 2>&1 &
     echo $! > "$PIDFILE"
 
     echo "✅ $BOT_NAME är nu omstartad (PID: $(cat $PIDFILE))"
@@ -63,6 +64,8 @@ restart_bot() {
 }
 
 BOT_NAME=$1
+shift
+# Övriga argument (t.ex. --force-sync) skickas vidare till main.py
 
 if [ -z "$BOT_NAME" ]; then
     echo "❌ Ange botnamn som parameter: ./restart.sh Puffen-RPG eller ./restart.sh all"
@@ -70,8 +73,8 @@ if [ -z "$BOT_NAME" ]; then
 fi
 
 if [ "$BOT_NAME" == "all" ]; then
-    restart_bot "Puffen"
-    restart_bot "Puffen-RPG"
+    restart_bot "Puffen" "$@"
+    restart_bot "Puffen-RPG" "$@"
 else
-    restart_bot "$BOT_NAME"
+    restart_bot "$BOT_NAME" "$@"
 fi
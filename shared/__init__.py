@@ -0,0 +1,3 @@
+# ==================== SHARED ====================
+"""Kod som båda bottarna använder: atomisk skrivning, loggning via kö
+och slash-synk. Bottarna lägger repots rot på sökvägen vid start."""
@@ -0,0 +1,32 @@
+# ==================== ATOMIC.PY ====================
+"""Atomisk och beständig skrivning av filer."""
+import json, os, tempfile
+from typing import Any
+
+def write_text_atomic(path, text: str):
+    """Skriver till en temporär fil, fsyncar och byter namn atomiskt,
+    och fsyncar sedan mappen så att namnbytet överlever ett strömavbrott.
+    En krasch mitt i skrivningen lämnar alltid den gamla filen orörd."""
+    directory = os.path.dirname(os.fspath(path)) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Mappar kan inte öppnas så här på Windows
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def write_json_atomic(path, data: Any):
+    write_text_atomic(path, json.dumps(data, indent=2, ensure_ascii=False))
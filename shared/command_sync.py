@@ -0,0 +1,58 @@
+# ==================== COMMAND_SYNC.PY ====================
+"""Synkar slash-kommandon bara när de faktiskt ändrats.
+
+Kommandoträdet serialiseras på samma sätt som tree.sync() skickar det,
+och en hash per scope (global eller en server) sparas i en JSON-fil.
+Är hashen oförändrad sedan förra synken hoppas anropet till Discord
+över. Starta med --force-sync för att alltid synka."""
+import hashlib, json, logging, os, sys, time
+
+from shared.atomic import write_json_atomic
+
+FORCE_FLAG = "--force-sync"
+logger = logging.getLogger(__name__)
+
+def force_requested() -> bool:
+    return FORCE_FLAG in sys.argv
+
+def tree_hash(tree, guild=None) -> str:
+    """Stabil hash av kommandona för ett scope (oberoende av laddordning)."""
+    payload = [cmd.to_dict(tree) for cmd in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda cmd: (cmd.get("type", 1), cmd["name"]))
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def _read_state(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_state(path: str, state: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    write_json_atomic(path, state)
+
+async def sync_if_changed(tree, state_file: str, guild=None, force: bool = False):
+    """Synkar scopet om hashen ändrats (eller force). Returnerar listan
+    från tree.sync(), eller None om synken hoppades över."""
+    scope = f"{tree.client.application_id}:{guild.id if guild else 'global'}"
+    started = time.perf_counter()
+    digest = tree_hash(tree, guild)
+    state = _read_state(state_file)
+    previous = state.get(scope, {})
+
+    if not force and previous.get("hash") == digest:
+        elapsed = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"⏭️ Kommandon oförändrade för {scope} – synk hoppades över "
+            f"({elapsed:.1f} ms i stället för ~{previous.get('sync_ms', 0):.0f} ms)"
+        )
+        return None
+
+    synced = await tree.sync(guild=guild)
+    elapsed = (time.perf_counter() - started) * 1000
+    state[scope] = {"hash": digest, "sync_ms": round(elapsed, 1), "synced_at": int(time.time())}
+    _write_state(state_file, state)
+    logger.info(f"🔁 Synkade {len(synced)} kommandon för {scope} på {elapsed:.0f} ms" + (" (tvingad)" if force else ""))
+    return synced
@@ -0,0 +1,46 @@
+# ==================== LOGQUEUE.PY ====================
+"""Loggning via kö: loggarna lägger bara posten i en kö och en
+bakgrundstråd skriver, roterar och gzippar filerna. Ingen disk-I/O
+sker på event-loopen."""
+import atexit, gzip, logging, os, queue, shutil
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+_listeners = []
+
+class GzipRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler som gzippar roterade filer (bot.log.1.gz ...)."""
+
+    def __init__(self, filename, compress: bool = True, **kwargs):
+        super().__init__(filename, **kwargs)
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = _gzip_rotator
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def rotating_file(filename: str, fmt: str, max_mb: float = 5, backups: int = 3, compress: bool = True) -> GzipRotatingFileHandler:
+    handler = GzipRotatingFileHandler(
+        filename, compress=compress, maxBytes=int(max_mb * 1024 * 1024), backupCount=backups, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter(fmt))
+    return handler
+
+def queued(handler: logging.Handler) -> QueueHandler:
+    """Lägger en handler bakom en kö med en egen bakgrundstråd."""
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return QueueHandler(log_queue)
+
+@atexit.register
+def stop_listeners():
+    """Tömmer köerna och stänger filerna (körs även vid avslut)."""
+    while _listeners:
+        listener = _listeners.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()